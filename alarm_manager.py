@@ -0,0 +1,235 @@
+# alarm_manager.py
+import os
+import time
+import wave
+from abc import ABC, abstractmethod
+from threading import Lock
+from PySide6.QtCore import QThread, Signal, QTimer, Qt
+from metrics import REGISTRY
+
+ALARMS_RAISED = REGISTRY.counter("sailui_alarms_raised_total", "Alarms raised, by rule.", ("rule",))
+ALARMS_ACTIVE = REGISTRY.gauge("sailui_alarms_active", "Alarms currently raised, acknowledged or not.")
+
+ALARM, WARNING = "alarm", "warning" # An alarm sounds at once; a warning only if nobody acknowledges it for WARNING_SILENT_S
+ESCALATION = ((0, 0.5), (30, 0.75), (60, 1.0)) # (seconds sounding unacknowledged, volume)
+WARNING_SILENT_S = 60.0
+REMIND_S = 600.0      # An acknowledged alarm that is still raised sounds again after this
+STALE_S = 10.0
+SHALLOW_DEPTH_M = 2.0; SHALLOW_CLEAR_M = 2.3
+WIND_LIMIT_MPS = 25 / 1.94384; WIND_CLEAR_MPS = 22 / 1.94384
+
+class Rule(ABC):
+    """
+    A condition on the InstrumentStore. check() returns {key: message} for
+    each alarm it wants raised now (most rules have one key; the stale data
+    rule has one per channel). The condition has to hold for raise_s before
+    the alarm is raised, and be gone for clear_s before it clears, so a
+    flapping reading raises one alarm, not one per flap.
+    """
+    def __init__(self, name, severity=ALARM, raise_s=0.0, clear_s=0.0):
+        self.name = name; self.severity = severity; self.raise_s = raise_s; self.clear_s = clear_s
+
+    @abstractmethod
+    def check(self, store, now, active):
+        """active: the keys currently raised, for rules with a different limit to clear than to raise."""
+
+class AnchorDragRule(Rule):
+    """AnchorWatch already requires a run of fixes outside the zone, so this one raises at once."""
+    def __init__(self): super().__init__("anchor_drag", ALARM, clear_s=10.0)
+    def check(self, store, now, active):
+        return {"anchor_drag": "ANCHOR DRAGGING"} if store.get("anchor_state") == "dragging" else {}
+
+class ThresholdRule(Rule):
+    """Raised beyond limit, cleared only back past clear (on the other side of it): below for depth, above for wind."""
+    def __init__(self, name, channel, limit, clear, message, severity=ALARM, raise_s=0.0, clear_s=0.0):
+        super().__init__(name, severity, raise_s, clear_s)
+        self.channel = channel; self.limit = limit; self.clear = clear; self.message = message
+        self.above = clear < limit
+
+    def check(self, store, now, active):
+        value = store.get(self.channel, STALE_S, now) # A stale reading is the stale rule's business
+        if value is None: return {}
+        threshold = self.clear if self.name in active else self.limit
+        beyond = value > threshold if self.above else value < threshold
+        return {self.name: self.message} if beyond else {}
+
+class StaleDataRule(Rule):
+    """A channel that has been heard from but has gone quiet for stale_s. Channels never heard don't count."""
+    def __init__(self, channels, stale_s=STALE_S):
+        super().__init__("data_stale", WARNING, clear_s=2.0)
+        self.channels = channels; self.stale_s = stale_s
+
+    def check(self, store, now, active):
+        alarms = {}
+        for channel, label in self.channels.items():
+            age = store.age(channel, now)
+            if age is not None and age > self.stale_s: alarms[f"data_stale:{channel}"] = f"NO {label} DATA"
+        return alarms
+
+def default_rules():
+    return [AnchorDragRule(),
+            ThresholdRule("shallow_depth", "depth_m", SHALLOW_DEPTH_M, SHALLOW_CLEAR_M, "SHALLOW WATER", raise_s=2.0, clear_s=5.0),
+            ThresholdRule("wind_limit", "aws_mps", WIND_LIMIT_MPS, WIND_CLEAR_MPS, "WIND OVER 25 KN", WARNING, raise_s=10.0, clear_s=30.0),
+            StaleDataRule({"depth_m": "DEPTH", "aws_mps": "WIND", "position": "GPS"})]
+
+def load_sound(path):
+    """Decodes a PCM wav into memory once: (params, frames), or None."""
+    if not path: return None
+    if not os.path.exists(path):
+        print(f"Alarm sound file {path} not found; alarms will be silent."); return None
+    with wave.open(path, 'rb') as f: return f.getparams(), f.readframes(f.getnframes())
+
+class AlarmSound:
+    """
+    The preloaded sound looped through a QAudioSink. Created on the alarm
+    thread, so playing it needs neither the disk nor the GUI thread. The
+    escalation level is the volume.
+    """
+    def __init__(self, params, frames):
+        from PySide6.QtCore import QBuffer, QByteArray, QIODevice
+        from PySide6.QtMultimedia import QAudio, QAudioFormat, QAudioSink, QMediaDevices
+        audio_format = QAudioFormat()
+        audio_format.setSampleRate(params.framerate); audio_format.setChannelCount(params.nchannels)
+        audio_format.setSampleFormat({1: QAudioFormat.UInt8, 2: QAudioFormat.Int16, 4: QAudioFormat.Int32}[params.sampwidth])
+        self.buffer = QBuffer(); self.buffer.setData(QByteArray(frames)); self.buffer.open(QIODevice.ReadOnly)
+        self.sink = QAudioSink(QMediaDevices.defaultAudioOutput(), audio_format)
+        self.idle = QAudio.State.IdleState; self.volume = 0.0
+        self.sink.stateChanged.connect(self._on_state_changed)
+
+    def set_volume(self, volume):
+        if volume == self.volume: return
+        if volume and not self.volume: self._restart()
+        elif not volume: self.sink.stop()
+        self.volume = volume; self.sink.setVolume(volume)
+
+    def _restart(self):
+        self.buffer.seek(0); self.sink.start(self.buffer)
+
+    def _on_state_changed(self, state):
+        if state == self.idle and self.volume: QTimer.singleShot(0, self._restart) # Played to the end: loop
+
+    def stop(self): self.set_volume(0.0)
+
+class AlarmManager(QThread):
+    """
+    Evaluates the rules against the InstrumentStore every interval_s on its
+    own thread, with its own event loop and audio output, so an alarm
+    sounds on time however long the GUI thread takes to render.
+
+    Each alarm is keyed (one per rule, or per channel for stale data), so
+    re-checking a condition that's already raised changes nothing. An
+    unacknowledged alarm gets louder (ESCALATION); an acknowledged one is
+    silent but stays raised until its condition clears, and sounds again
+    after REMIND_S if it hasn't. alarms_changed carries the list the
+    dashboard shows whenever an alarm is raised, acknowledged, escalated or
+    cleared.
+
+    The sound (a 1.5 MB wav, and QtMultimedia) isn't needed for the first
+    second: it is loaded on this thread once load_audio() asks for it in
+    the deferred startup stage, or by the first alarm that sounds before then.
+    """
+    alarms_changed = Signal(list)
+
+    def __init__(self, store, rules=None, sound_path=None, interval_s=0.25, parent=None):
+        super().__init__(parent)
+        self.store = store; self.rules = rules if rules is not None else default_rules()
+        self.interval_s = interval_s; self.sound_path = sound_path
+        self.player = None; self._audio_wanted = False; self._audio_loaded = False
+        self.alarms = {}; self._pending = {}; self._clearing = {}
+        self._lock = Lock(); self._shown = None
+
+    def load_audio(self):
+        """Asks for the sound to be loaded on the next tick (on this thread, which the player has to live on)."""
+        self._audio_wanted = True
+
+    def _load_audio(self):
+        self._audio_loaded = True
+        sound = load_sound(self.sound_path)
+        if sound is None: return
+        try: self.player = AlarmSound(*sound)
+        except (ImportError, KeyError, RuntimeError) as e: print(f"No alarm audio output ({e}); alarms will be silent.")
+
+    def run(self):
+        timer = QTimer(); timer.setInterval(int(self.interval_s * 1000))
+        timer.timeout.connect(lambda: self.tick(time.monotonic()), Qt.DirectConnection) # Here, not on the GUI thread
+        timer.start()
+        self.exec()
+        timer.stop()
+        if self.player: self.player.stop()
+
+    def stop(self):
+        self.quit(); self.wait(2000)
+
+    def acknowledge(self, key=None, now=None):
+        """Silences one alarm, or all of them, from the next tick on. Called from the GUI thread."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for alarm in self.alarms.values():
+                if key in (None, alarm['key']) and not alarm['acknowledged']: alarm['acknowledged'] = now
+
+    def tick(self, now):
+        with self._lock:
+            wanted = {}
+            for rule in self.rules:
+                for key, message in rule.check(self.store, now, self.alarms).items(): wanted[key] = (rule, message)
+            for key, (rule, message) in wanted.items():
+                self._clearing.pop(key, None)
+                if key in self.alarms: continue
+                since = self._pending.setdefault(key, now)
+                if now - since >= rule.raise_s:
+                    del self._pending[key]
+                    sounds_at = now if rule.severity == ALARM else now + WARNING_SILENT_S
+                    self.alarms[key] = {'key': key, 'rule': rule.name, 'severity': rule.severity, 'message': message,
+                                        'raised': now, 'sounds_at': sounds_at, 'acknowledged': None, 'level': None}
+                    ALARMS_RAISED.inc(rule.name)
+            for key in [key for key in self._pending if key not in wanted]: del self._pending[key]
+            for key, alarm in list(self.alarms.items()):
+                if key in wanted: continue
+                since = self._clearing.setdefault(key, now)
+                if now - since >= self._rule(alarm['rule']).clear_s: del self.alarms[key]; del self._clearing[key]
+            volume = 0.0
+            for alarm in self.alarms.values():
+                if alarm['acknowledged'] and now - alarm['acknowledged'] >= REMIND_S: alarm['acknowledged'] = None; alarm['sounds_at'] = now
+                level = None
+                if not alarm['acknowledged'] and now >= alarm['sounds_at']:
+                    level = sum(1 for after, _ in ESCALATION if now - alarm['sounds_at'] >= after) - 1
+                    volume = max(volume, ESCALATION[level][1])
+                alarm['level'] = level
+            ALARMS_ACTIVE.set(len(self.alarms))
+            shown = [dict(alarm) for alarm in sorted(self.alarms.values(), key=lambda a: (a['acknowledged'] is not None, a['severity'] != ALARM, a['raised']))]
+        if not self._audio_loaded and (volume or self._audio_wanted): self._load_audio()
+        if self.player: self.player.set_volume(volume)
+        state = [(a['key'], a['acknowledged'] is not None, a['level']) for a in shown]
+        if state != self._shown: self._shown = state; self.alarms_changed.emit(shown)
+        return volume
+
+    def _rule(self, name):
+        return next(rule for rule in self.rules if rule.name == name)
+
+if __name__ == "__main__":
+    # Drives tick() on a virtual clock: shallow water with a noisy sounder, a wind gust, a lost GPS, a drag.
+    from instrument_store import InstrumentStore
+    store = InstrumentStore(); manager = AlarmManager(store) # Silent: no sound_path
+    log = []; manager.alarms_changed.connect(lambda alarms: log.append([(a['key'], a['level'], bool(a['acknowledged'])) for a in alarms]))
+    volumes = {}
+    for step in range(0, 4000):
+        now = step * 0.25
+        # Shoaling to 1.8 m, then a noisy 1.65..2.15 m: across the 2 m limit but never back over the 2.3 m clear
+        depth = 2.5 if now < 100 else 1.8 if now < 110 else 1.9 + 0.25 * ((step % 4) - 1.5) / 1.5
+        store.set("depth_m", depth, now)
+        store.set("aws_mps", 14.0 if 200 <= now < 205 else 8.0, now) # A 5 s gust: shorter than raise_s
+        if now < 300: store.set("position", (47.6, -122.3), now)
+        store.set("anchor_state", "dragging" if 500 <= now < 600 else "holding", now)
+        if now == 150: manager.acknowledge("shallow_depth", now)
+        volumes[now] = manager.tick(now)
+    raised = {key: count for (key,), count in ALARMS_RAISED.values.items()}
+    print(f"raised {raised}; volume at 101 s {volumes[101.0]}, 103 s {volumes[103.0]}, 140 s {volumes[140.0]}, 160 s {volumes[160.0]}, "
+          f"320 s {volumes[320.0]}, 375 s {volumes[375.0]}")
+    assert raised == {"shallow_depth": 1, "data_stale": 1, "anchor_drag": 1}, raised
+    assert volumes[101.0] == 0.0 and volumes[103.0] == 0.5 and volumes[140.0] == 0.75 and volumes[160.0] == 0.0 # Escalating, then acknowledged
+    assert volumes[320.0] == 0.0 and volumes[375.0] == 0.5 # Stale GPS (from 310 s) is a warning: silent for its first minute
+    assert all(key != "anchor_drag" for key, _, _ in log[-1]) # Cleared after the drag stopped
+    start = time.perf_counter()
+    for i in range(10000): manager.tick(1000.0)
+    print(f"tick {(time.perf_counter() - start) / 10000 * 1e6:.1f} us; {len(log)} dashboard updates")
+    print("OK")
@@ -0,0 +1,255 @@
+# anchor_watch.py
+import json
+import math
+import os
+from array import array
+from threading import Lock, Thread, Event
+from spatial_index import LocalProjection
+
+DEFAULT_RADIUS_M = 22.86     # 75 feet
+GPS_ACCURACY_M = 5.0         # Typical consumer GPS; a fix this far past the limit may still be noise
+CONFIRM_FIXES = 3            # Consecutive fixes needed to change state, so one wild fix doesn't
+HISTORY_INTERVAL_S = 4.0     # One point kept every 4 s ...
+HISTORY_SLOTS = 1800         # ... for two hours
+FIT_INTERVAL_S = 60.0
+FIT_MIN_POINTS = 30
+FIT_MIN_ARC_DEG = 90.0       # Less than a quarter turn of swing doesn't pin the centre down
+SAVE_INTERVAL_S = 600.0      # History is written this often (state changes are written at once)
+OFF, HOLDING, DRAGGING = "off", "holding", "dragging"
+
+def _polygon_excess(polygon, x, y):
+    """Distance outside the polygon in metres; negative (the distance to the nearest edge) inside."""
+    inside = False; nearest = float('inf')
+    for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1]):
+        if (y0 > y) != (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / (y1 - y0): inside = not inside
+        dx, dy = x1 - x0, y1 - y0
+        k = max(0.0, min(1.0, ((x - x0) * dx + (y - y0) * dy) / (dx * dx + dy * dy or 1.0)))
+        nearest = min(nearest, math.hypot(x - x0 - k * dx, y - y0 - k * dy))
+    return -nearest if inside else nearest
+
+class AnchorWatch:
+    """
+    Watches the boat swing at anchor. Positions are projected to metres
+    around the anchor (LocalProjection), so a fix costs a subtraction, a
+    hypot and a few compares against the watch zone: a circle (radius_m) or
+    a polygon. A fix more than the GPS accuracy outside the zone for
+    CONFIRM_FIXES fixes in a row is dragging; back inside for as many, it's
+    holding again. update() returns the new state only on a transition.
+
+    A point every HISTORY_INTERVAL_S goes into a ring, and running sums of
+    it feed an algebraic (Kasa) circle fit: once the boat has swung through
+    FIT_MIN_ARC_DEG about a consistent centre, that centre is the anchor,
+    wherever the button was pressed. The ring's sums are adjusted as points
+    are added and evicted, and recomputed once per lap of the ring.
+
+    State (anchor, zone, fitted centre, history) is kept in a JSON file, so
+    a restart carries on watching. update() runs on the reader thread and
+    set_anchor()/clear() on the UI thread, hence the lock. Saving only
+    copies the state; a writer thread encodes and writes the latest copy,
+    so the reader never waits on JSON or the disk.
+    """
+    def __init__(self, path=None, radius_m=DEFAULT_RADIUS_M, accuracy_m=GPS_ACCURACY_M):
+        self.path = path; self.default_radius_m = radius_m; self.accuracy_m = accuracy_m
+        self._lock = Lock()
+        self._pending = None; self._wake = Event(); self._closing = False; self._writer = None
+        self.last_fix = None # (t, lat, lon), whether or not a watch is set
+        self._reset()
+        if path and os.path.exists(path): self._load()
+
+    def _reset(self):
+        self.state = OFF; self.anchor = None; self.projection = None
+        self.radius_m = self.default_radius_m; self.polygon = None; self.polygon_latlon = None
+        self.set_at = None; self.centre = (0.0, 0.0); self.fitted = None
+        self.distance_m = None; self._streak = 0
+        self.times = array('d', [0.0]) * HISTORY_SLOTS; self.xs = array('d', [0.0]) * HISTORY_SLOTS; self.ys = array('d', [0.0]) * HISTORY_SLOTS
+        self.count = 0; self.head = 0; self._sums = [0.0] * 9
+        self._last_point = self._last_fit = self._last_save = -math.inf
+
+    # --- Setting and clearing ---
+    def set_anchor(self, lat=None, lon=None, radius_m=None, polygon=None, t=None):
+        """Starts a watch at (lat, lon), default the last fix. polygon is [(lat, lon), ...] and replaces the circle."""
+        with self._lock:
+            if lat is None:
+                if self.last_fix is None: return None
+                t_fix, lat, lon = self.last_fix; t = t if t is not None else t_fix
+            self._reset()
+            self.anchor = (lat, lon); self.projection = LocalProjection(lat, lon); self.set_at = t
+            if radius_m is not None: self.radius_m = radius_m
+            if polygon:
+                self.polygon_latlon = [tuple(p) for p in polygon]
+                self.polygon = [self.projection.to_xy(*p) for p in self.polygon_latlon]
+            self.state = HOLDING; self.distance_m = 0.0
+            self._save(t)
+            return self.snapshot()
+
+    def clear(self):
+        with self._lock:
+            self._reset(); self._save(None)
+            return self.snapshot()
+
+    # --- Per fix ---
+    def update(self, t, lat, lon, accuracy_m=None):
+        """Returns HOLDING or DRAGGING when the state changes on this fix, else None."""
+        self.last_fix = (t, lat, lon)
+        if self.state == OFF: return None
+        with self._lock:
+            if self.projection is None: return None
+            x, y = self.projection.to_xy(lat, lon)
+            cx, cy = self.centre
+            self.distance_m = math.hypot(x - cx, y - cy)
+            excess = _polygon_excess(self.polygon, x, y) if self.polygon else self.distance_m - self.radius_m
+            # Hysteresis: out by more than the GPS error to start dragging, back inside the zone to stop.
+            crossing = excess > (accuracy_m or self.accuracy_m) if self.state == HOLDING else excess < 0
+            self._streak = self._streak + 1 if crossing else 0
+            changed = None
+            if self._streak >= CONFIRM_FIXES:
+                self.state = DRAGGING if self.state == HOLDING else HOLDING; self._streak = 0; changed = self.state
+            if t - self._last_point >= HISTORY_INTERVAL_S:
+                self._add_point(t, x, y); self._last_point = t
+                # Refit while holding only: a drag track is not a swing, and mustn't drag the centre along with it.
+                if self.state == HOLDING and t - self._last_fit >= FIT_INTERVAL_S: self._fit(); self._last_fit = t
+            if changed or t - self._last_save >= SAVE_INTERVAL_S: self._save(t)
+            return changed
+
+    # --- Swing circle ---
+    def _add_point(self, t, x, y):
+        if self.count == HISTORY_SLOTS: self._accumulate(self.xs[self.head], self.ys[self.head], -1.0)
+        else: self.count += 1
+        self.times[self.head] = t; self.xs[self.head] = x; self.ys[self.head] = y
+        self._accumulate(x, y, 1.0)
+        self.head = (self.head + 1) % HISTORY_SLOTS
+        if self.head == 0: self._rebuild_sums() # Once a lap, so rounding from the removals never builds up
+
+    def _accumulate(self, x, y, sign):
+        z = x * x + y * y; s = self._sums
+        s[0] += sign; s[1] += sign * x; s[2] += sign * y; s[3] += sign * x * x; s[4] += sign * x * y
+        s[5] += sign * y * y; s[6] += sign * x * z; s[7] += sign * y * z; s[8] += sign * z
+
+    def _rebuild_sums(self):
+        self._sums = [0.0] * 9
+        for x, y in self.points(): self._accumulate(x, y, 1.0)
+
+    def points(self):
+        """History as (x, y) metres from the anchor, oldest first."""
+        start = (self.head - self.count) % HISTORY_SLOTS
+        return [(self.xs[(start + i) % HISTORY_SLOTS], self.ys[(start + i) % HISTORY_SLOTS]) for i in range(self.count)]
+
+    def fit_circle(self):
+        """(cx, cy, radius, arc_deg, rms_m) for the history, or None. Solves x^2+y^2 + Dx + Ey + F = 0 in least squares."""
+        n, sx, sy, sxx, sxy, syy, sxz, syz, sz = self._sums
+        if n < 3: return None
+        # Normal equations [[sxx sxy sx] [sxy syy sy] [sx sy n]] . [D E F] = -[sxz syz sz], by Cramer's rule
+        a = ((sxx, sxy, sx), (sxy, syy, sy), (sx, sy, n)); b = (-sxz, -syz, -sz)
+        def det(m): return (m[0][0] * (m[1][1] * m[2][2] - m[1][2] * m[2][1]) - m[0][1] * (m[1][0] * m[2][2] - m[1][2] * m[2][0])
+                            + m[0][2] * (m[1][0] * m[2][1] - m[1][1] * m[2][0]))
+        d = det(a)
+        if abs(d) < 1e-9 * max(1.0, abs(sxx * syy * n)): return None # Points on a line, or all in one place
+        solution = [det([[b[r] if c == col else a[r][c] for c in range(3)] for r in range(3)]) / d for col in range(3)]
+        cx, cy = -solution[0] / 2, -solution[1] / 2
+        r2 = cx * cx + cy * cy - solution[2]
+        if r2 <= 0: return None
+        radius = math.sqrt(r2); points = self.points()
+        rms = math.sqrt(sum((math.hypot(x - cx, y - cy) - radius) ** 2 for x, y in points) / len(points))
+        bearings = sorted(math.degrees(math.atan2(y - cy, x - cx)) for x, y in points)
+        gaps = [b - a for a, b in zip(bearings, bearings[1:])] + [bearings[0] + 360.0 - bearings[-1]]
+        return cx, cy, radius, 360.0 - max(gaps), rms
+
+    def _fit(self):
+        if self.count < FIT_MIN_POINTS: return
+        fit = self.fit_circle()
+        if fit is None: return
+        cx, cy, radius, arc, rms = fit
+        # Take the centre only from a real swing: a wide enough arc, points close to the circle, and inside the zone.
+        if arc >= FIT_MIN_ARC_DEG and rms <= max(self.accuracy_m, 0.2 * radius) and math.hypot(cx, cy) + radius <= self.radius_m + self.accuracy_m:
+            self.centre = (cx, cy); self.fitted = {'radius_m': radius, 'arc_deg': arc, 'rms_m': rms}
+
+    # --- State ---
+    def snapshot(self):
+        centre = self.projection.to_latlon(*self.centre) if self.projection else None
+        return {'state': self.state, 'anchor': self.anchor, 'centre': centre, 'radius_m': self.radius_m,
+                'polygon': self.polygon_latlon, 'distance_m': self.distance_m, 'swing': self.fitted}
+
+    def _save(self, t):
+        """Called under the lock: hands a copy of the state (the ring is three memcpys) to the writer thread."""
+        if not self.path: return
+        self._last_save = t if t is not None else -math.inf
+        self._pending = ({'version': 1, 'state': self.state, 'anchor': self.anchor, 'radius_m': self.radius_m, 'polygon': self.polygon_latlon,
+                          'set_at': self.set_at, 'centre': self.centre, 'swing': self.fitted},
+                         self.times[:], self.xs[:], self.ys[:], self.head, self.count)
+        if self._writer is None:
+            self._writer = Thread(target=self._write_loop, daemon=True); self._writer.start()
+        self._wake.set()
+
+    def _write_loop(self):
+        while not self._closing:
+            self._wake.wait(); self._wake.clear()
+            self._write_pending()
+
+    def _write_pending(self):
+        with self._lock: pending, self._pending = self._pending, None # Only the latest copy: older ones are stale
+        if pending is None: return
+        state, times, xs, ys, head, count = pending
+        start = (head - count) % HISTORY_SLOTS
+        state['history'] = [[times[i], round(xs[i], 2), round(ys[i], 2)] for i in ((start + k) % HISTORY_SLOTS for k in range(count))]
+        temp = self.path + ".tmp"
+        with open(temp, 'w') as f: json.dump(state, f)
+        os.replace(temp, self.path) # A crash mid-write leaves the previous file, not half of this one
+
+    def _load(self):
+        try:
+            with open(self.path) as f: state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read anchor watch state {self.path}: {e}"); return
+        if state.get('version') != 1 or state.get('state') == OFF or not state.get('anchor'): return
+        self.anchor = tuple(state['anchor']); self.projection = LocalProjection(*self.anchor)
+        self.state = state['state']; self.radius_m = state['radius_m']; self.set_at = state.get('set_at')
+        if state.get('polygon'):
+            self.polygon_latlon = [tuple(p) for p in state['polygon']]
+            self.polygon = [self.projection.to_xy(*p) for p in self.polygon_latlon]
+        self.centre = tuple(state.get('centre') or (0.0, 0.0)); self.fitted = state.get('swing')
+        for t, x, y in state.get('history', [])[-HISTORY_SLOTS:]: self._add_point(t, x, y)
+        if self.count: self._last_point = self.times[(self.head - 1) % HISTORY_SLOTS]
+
+    def close(self):
+        """Stops the writer and writes the final state on this thread, so it's on disk when close() returns."""
+        with self._lock:
+            if self.state != OFF: self._save(self.last_fix[0] if self.last_fix else None)
+        if self._writer:
+            self._closing = True; self._wake.set(); self._writer.join(timeout=5)
+            self._writer = None; self._closing = False
+        self._write_pending()
+
+if __name__ == "__main__":
+    # Two hours swinging on 15 m of rode about a point 8 m downwind of where "Set" was pressed, with 2 m GPS noise
+    # and the odd wild fix; then a restart, then the anchor drags.
+    import random, tempfile, time
+    rng = random.Random(7); lat0, lon0 = 47.6062, -122.3321
+    projection = LocalProjection(lat0, lon0); path = os.path.join(tempfile.mkdtemp(), "anchor.json")
+    def fix(x, y): return projection.to_latlon(x + rng.gauss(0, 2.0), y + rng.gauss(0, 2.0))
+    watch = AnchorWatch(path); watch.update(0.0, lat0, lon0); watch.set_anchor(t=0.0)
+    events = []; start = time.perf_counter()
+    for s in range(1, 7200):
+        angle = math.radians(130 * math.sin(s / 900.0)) # Swinging back and forth through 260 degrees
+        x, y = 15 * math.sin(angle), -8 - 15 * math.cos(angle)
+        if s % 1000 == 0: x += 40 # One wild fix
+        change = watch.update(float(s), *fix(x, y))
+        if change: events.append((s, change))
+    per_fix = (time.perf_counter() - start) / 7200 * 1e6; start = time.perf_counter()
+    for i in range(10000): watch.update(7199.5, lat0, lon0) # Inside a history interval: the check alone
+    check = (time.perf_counter() - start) / 10000 * 1e6
+    print(f"update {check:.1f} us/fix, {per_fix:.1f} us/fix with the fits and saves; fitted {watch.fitted}, centre {watch.centre}")
+    assert not events, events
+    assert abs(watch.centre[0]) < 2 and abs(watch.centre[1] + 8) < 2 and abs(watch.fitted['radius_m'] - 15) < 2
+    watch.close(); watch = AnchorWatch(path) # Restart
+    assert watch.state == HOLDING and watch.count == HISTORY_SLOTS and abs(watch.centre[1] + 8) < 2
+    for s in range(7200, 7500):
+        change = watch.update(float(s), *fix(0.5 * (s - 7200), -23)) # Dragging east at 0.5 m/s
+        if change: events.append((s, change))
+    print(f"events after restart: {events}, distance {watch.distance_m:.1f} m")
+    assert len(events) == 1 and events[0][1] == DRAGGING and events[0][0] < 7200 + 70
+    # Polygon zone: a 40 x 20 m box, leaving through the short side
+    watch.set_anchor(lat0, lon0, polygon=[projection.to_latlon(x, y) for x, y in ((-20, -10), (20, -10), (20, 10), (-20, 10))], t=0.0)
+    changes = [watch.update(float(s), *projection.to_latlon(s + 0.5, 0.0)) for s in range(40)]
+    assert [(s, c) for s, c in enumerate(changes) if c] == [(27, DRAGGING)], [(s, c) for s, c in enumerate(changes) if c]
+    watch.clear(); watch.close(); assert AnchorWatch(path).state == OFF
+    print("OK")
@@ -0,0 +1,231 @@
+# barometer.py
+import math
+import os
+import struct
+from array import array
+
+# Tiers of (bucket width in seconds, slots): 6 h of minutes, 48 h of 10 minutes, 14 days of hours.
+TIERS = ((60, 360), (600, 288), (3600, 336))
+MAGIC = b'SAILBARO'
+VERSION = 1
+HEADER = struct.Struct('<8sHH')   # magic, version, tier count
+TIER_HEADER = struct.Struct('<II') # bucket width s, slots
+RECORD = struct.Struct('<Id')      # bucket index (time // width), mean pressure Pa
+EMPTY = 0xFFFFFFFF
+
+STEADY_PA = 10                # 0.1 hPa: "steady" in WMO and Met Office usage
+FALL_ALERTS_PA_3H = ((600, "falling very rapidly"), (360, "falling quickly"))
+FALL_ALERT_PA_1H = 100        # 1 hPa in an hour is the usual sign of an approaching gale
+ALERT_CLEAR_RATIO = 0.8       # Hysteresis: an alert clears once the fall is back under 80% of its threshold
+
+def tendency_description(change_pa):
+    """Met Office wording for a 3-hour change: steady, rising/falling (slowly | quickly | very rapidly)."""
+    hpa = abs(change_pa) / 100.0
+    if hpa < 0.1: return "steady"
+    direction = "rising" if change_pa > 0 else "falling"
+    if hpa <= 1.5: return f"{direction} slowly"
+    if hpa <= 3.5: return direction
+    if hpa <= 6.0: return f"{direction} quickly"
+    return f"{direction} very rapidly"
+
+def wmo_characteristic(first_pa, second_pa, steady_pa=STEADY_PA):
+    """
+    WMO code table 0200 (characteristic of pressure tendency, 0-8) from the
+    change over the first and second 90 minutes of the 3-hour period.
+    """
+    total = first_pa + second_pa
+    up1, down1 = first_pa > steady_pa, first_pa < -steady_pa
+    up2, down2 = second_pa > steady_pa, second_pa < -steady_pa
+    if abs(total) <= steady_pa: # Same as 3 hours ago
+        if up1 and down2: return 0
+        if down1 and up2: return 5
+        return 4
+    if total > 0: # Higher
+        if up1 and down2: return 0
+        if up1 and not up2: return 1
+        if up1 and up2: return 1 if second_pa < first_pa / 2 else 3 if second_pa > first_pa * 2 else 2
+        return 3 # Decreasing or steady, then increasing
+    if down1 and up2: return 5
+    if down1 and not down2: return 6
+    if down1 and down2: return 6 if -second_pa < -first_pa / 2 else 8 if -second_pa > -first_pa * 2 else 7
+    return 8 # Steady or increasing, then decreasing
+
+class BarometerRecorder:
+    """
+    Downsamples raw pressure into minute, 10-minute and hourly means. Each
+    tier is a direct-mapped ring (slot = bucket % slots, valid while the
+    stored bucket index matches), mirrored in memory and in a fixed-size
+    file, so a closed bucket costs one 12-byte write and nothing is ever
+    rescanned: the 3-hour tendency reads six minute buckets and a sparkline
+    reads one tier. After a restart the open 10-minute and hourly buckets
+    are rebuilt from the tier below.
+
+    update() runs on the data source thread and returns True when a minute
+    closes, which is when tendency, alert and sparkline change.
+    """
+    def __init__(self, path=None, tiers=TIERS):
+        self.path = path; self.tiers = tuple(tiers)
+        self.buckets = [array('I', [EMPTY]) * slots for _, slots in self.tiers]
+        self.means = [array('d', [math.nan]) * slots for _, slots in self.tiers]
+        self._open = [None] * len(self.tiers) # Per tier: [bucket, sum, count]
+        self._file = None
+        self.tendency = None; self.alert = None
+        if path: self._open_file()
+
+    # --- Storage ---
+    def _record_offset(self, tier, slot):
+        before = sum(slots for _, slots in self.tiers[:tier])
+        return HEADER.size + TIER_HEADER.size * len(self.tiers) + (before + slot) * RECORD.size
+
+    def _header(self):
+        return HEADER.pack(MAGIC, VERSION, len(self.tiers)) + b''.join(TIER_HEADER.pack(width, slots) for width, slots in self.tiers)
+
+    def _open_file(self):
+        header = self._header()
+        size = self._record_offset(len(self.tiers), 0)
+        if os.path.exists(self.path) and os.path.getsize(self.path) == size:
+            with open(self.path, 'rb') as f: data = f.read()
+            if data[:len(header)] == header:
+                offset = len(header)
+                for tier, (_, slots) in enumerate(self.tiers):
+                    for slot, (bucket, mean) in enumerate(RECORD.iter_unpack(data[offset:offset + slots * RECORD.size])):
+                        self.buckets[tier][slot] = bucket; self.means[tier][slot] = mean
+                    offset += slots * RECORD.size
+                self._file = open(self.path, 'r+b')
+                return
+            print(f"Barometer history {self.path} has a different layout; starting a new one.")
+        with open(self.path, 'wb') as f:
+            f.write(header)
+            empty = RECORD.pack(EMPTY, math.nan)
+            for _, slots in self.tiers: f.write(empty * slots)
+        self._file = open(self.path, 'r+b')
+
+    def _store(self, tier, bucket, mean):
+        slot = bucket % self.tiers[tier][1]
+        self.buckets[tier][slot] = bucket; self.means[tier][slot] = mean
+        if self._file:
+            self._file.seek(self._record_offset(tier, slot)); self._file.write(RECORD.pack(bucket, mean)); self._file.flush()
+
+    def close(self):
+        if self._file: self._file.close(); self._file = None
+
+    def value(self, tier, bucket):
+        """Mean for a closed bucket, or None if it's not (or no longer) recorded."""
+        slot = bucket % self.tiers[tier][1]
+        return self.means[tier][slot] if self.buckets[tier][slot] == bucket else None
+
+    # --- Recording ---
+    def update(self, t, pressure_pa):
+        bucket = int(t // self.tiers[0][0])
+        current = self._open[0]
+        if current is None:
+            self._restore_open_buckets(bucket)
+            self._open[0] = [bucket, pressure_pa, 1]
+            return False
+        if bucket < current[0]: return False # Older than the open minute (e.g. a replay rewound)
+        if bucket == current[0]:
+            current[1] += pressure_pa; current[2] += 1
+            return False
+        self._close(0)
+        self._open[0] = [bucket, pressure_pa, 1]
+        self._update_tendency(bucket - 1)
+        return True
+
+    def _close(self, tier):
+        bucket, total, count = self._open[tier]
+        mean = total / count
+        self._store(tier, bucket, mean)
+        self._open[tier] = None
+        if tier + 1 == len(self.tiers): return
+        parent_bucket = bucket * self.tiers[tier][0] // self.tiers[tier + 1][0]
+        parent = self._open[tier + 1]
+        if parent is not None and parent[0] != parent_bucket:
+            self._close(tier + 1); parent = None
+        if parent is None: self._open[tier + 1] = [parent_bucket, mean, 1]
+        else: parent[1] += mean; parent[2] += 1
+
+    def _restore_open_buckets(self, minute_bucket):
+        """Refills each open upper-tier bucket from the closed buckets below it (after a restart)."""
+        t = minute_bucket * self.tiers[0][0]
+        for tier in range(1, len(self.tiers)):
+            width, child_width = self.tiers[tier][0], self.tiers[tier - 1][0]
+            bucket = t // width
+            first_child = bucket * width // child_width; open_child = t // child_width
+            values = [v for v in (self.value(tier - 1, child) for child in range(first_child, open_child)) if v is not None]
+            if values: self._open[tier] = [bucket, sum(values), len(values)]
+
+    # --- Tendency and alerts ---
+    def _average(self, last_minute, minutes_ago, span=5):
+        values = [v for v in (self.value(0, last_minute - minutes_ago - i) for i in range(span)) if v is not None]
+        return sum(values) / len(values) if values else None
+
+    def _update_tendency(self, last_minute):
+        per_minute = 60 // self.tiers[0][0]
+        now = self._average(last_minute, 0)
+        hour_ago = self._average(last_minute, 60 * per_minute)
+        mid = self._average(last_minute, 90 * per_minute); then = self._average(last_minute, 180 * per_minute)
+        change_1h = now - hour_ago if hour_ago is not None else None
+        if None in (mid, then):
+            self.tendency = {'change_pa': None, 'change_1h_pa': change_1h, 'description': None, 'characteristic': None}
+        else:
+            change = now - then
+            self.tendency = {'change_pa': change, 'change_1h_pa': change_1h, 'description': tendency_description(change),
+                             'characteristic': wmo_characteristic(mid - then, now - mid)}
+        self._update_alert(self.tendency['change_pa'], change_1h)
+
+    def _update_alert(self, change_3h, change_1h):
+        fall_3h = -change_3h if change_3h is not None else 0.0
+        fall_1h = -change_1h if change_1h is not None else 0.0
+        alert = None
+        for threshold, name in FALL_ALERTS_PA_3H:
+            # Keep an alert that's already raised until the fall drops well below its threshold.
+            limit = threshold * ALERT_CLEAR_RATIO if self.alert == name else threshold
+            if fall_3h >= limit: alert = name; break
+        if alert is None:
+            limit = FALL_ALERT_PA_1H * ALERT_CLEAR_RATIO if self.alert == "falling quickly" else FALL_ALERT_PA_1H
+            if fall_1h >= limit: alert = "falling quickly"
+        self.alert = alert
+
+    def sparkline(self, tier=1, count=144):
+        """The last `count` bucket means of a tier (None where missing), oldest first, ending with the open bucket."""
+        width = self.tiers[tier][0]
+        minute = self._open[0]
+        if minute is None: return []
+        last = minute[0] * self.tiers[0][0] // width
+        points = [self.value(tier, bucket) for bucket in range(last - count + 1, last)]
+        open_bucket = self._open[tier] if tier else minute
+        points.append(open_bucket[1] / open_bucket[2] if open_bucket and open_bucket[0] == last else self.value(tier, last))
+        return points
+
+    def snapshot(self):
+        """What the dashboard shows: tendency, alert, and 24 h of 10-minute means."""
+        return {'tendency': self.tendency, 'alert': self.alert, 'sparkline': self.sparkline(1, 144)}
+
+if __name__ == "__main__":
+    # 50 h at 1 Hz: steady, then a front (falling 8 hPa over 3 h), then recovery, with a restart at 22 h.
+    import random, tempfile, time
+    rng = random.Random(5)
+    path = os.path.join(tempfile.mkdtemp(), "barometer.ring")
+    def pressure(t):
+        h = t / 3600.0
+        base = 101800.0 if h < 20 else 101800.0 - 800.0 * min(h - 20, 3) / 3 if h < 26 else 101000.0 + 300.0 * min(h - 26, 6) / 6
+        return base + rng.gauss(0, 3)
+    recorder = BarometerRecorder(path); start = time.perf_counter(); alerts = []; t0 = 1.7e9
+    for s in range(50 * 3600):
+        if s == 22 * 3600:
+            recorder.close(); recorder = BarometerRecorder(path) # Restart mid-front
+        if recorder.update(t0 + s, pressure(s)) and recorder.alert and (not alerts or alerts[-1][1] != recorder.alert):
+            alerts.append((round(s / 3600, 2), recorder.alert))
+        if s == 23 * 3600: during = dict(recorder.tendency)
+    per_sample = (time.perf_counter() - start) / (50 * 3600) * 1e6
+    print(f"update {per_sample:.2f} us/sample; file {os.path.getsize(path)} bytes")
+    print(f"At 23 h: {during['change_pa'] / 100:+.1f} hPa/3h, {during['description']}, WMO {during['characteristic']}")
+    print(f"Alerts: {alerts}; now: {recorder.tendency['description']}, WMO {recorder.tendency['characteristic']}")
+    assert during['description'] == "falling very rapidly" and during['characteristic'] == 7
+    assert alerts and alerts[0][1] == "falling quickly" and 20 < alerts[0][0] < 21.5 and recorder.alert is None
+    points = recorder.sparkline()
+    assert len(points) == 144 and all(p is not None for p in points), points.count(None)
+    reloaded = BarometerRecorder(path)
+    assert all(a == b or (math.isnan(a) and math.isnan(b)) for a, b in zip(reloaded.means[1], recorder.means[1]))
+    print(f"Sparkline 24 h: {min(points) / 100:.1f}..{max(points) / 100:.1f} hPa")
+    print("OK")
@@ -0,0 +1,284 @@
+# benchmark_suite.py
+"""
+End-to-end benchmarks for the display pipeline, headless (offscreen QPA):
+
+    python benchmark_suite.py                        # all, saved to benchmark_results/<commit>.json
+    python benchmark_suite.py --filter=shared_image  # groups whose name contains 'shared_image'
+    python benchmark_suite.py --compare=benchmark_results/abc1234.json --threshold=0.15
+
+--compare prints the change in best round time per benchmark (the least
+noisy figure, as with timeit) and exits 1 if any got slower by more than
+--threshold (default 10%).
+"""
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from threading import Thread, Event
+from types import SimpleNamespace
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_results")
+BENCHMARKS = []
+
+def benchmark(func):
+    """Registers a benchmark group: a generator of (name, result) pairs."""
+    BENCHMARKS.append(func)
+    return func
+
+def measure(func, inner=1, repeat=7, min_round_s=0.1, setup=None):
+    """
+    Times func over `repeat` rounds, calibrating the number of calls per
+    round so each round lasts at least min_round_s (unless setup is given,
+    which runs untimed before every single call). inner: operations per call,
+    so results are per operation.
+    """
+    number = 1
+    if setup is None:
+        while True:
+            start = time.perf_counter()
+            for _ in range(number): func()
+            if time.perf_counter() - start >= min_round_s or number >= 1 << 20: break
+            number *= 2
+    rounds = []
+    for _ in range(repeat):
+        elapsed = 0.0
+        for _ in range(number):
+            if setup: setup()
+            start = time.perf_counter(); func(); elapsed += time.perf_counter() - start
+        rounds.append(elapsed / (number * inner))
+    median = statistics.median(rounds)
+    return {'median_s': median, 'min_s': min(rounds), 'mean_s': statistics.fmean(rounds),
+            'stdev_s': statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+            'ops_per_s': 1.0 / median if median else None, 'rounds': repeat, 'iterations': number * inner}
+
+def rate(count, seconds):
+    """A throughput figure in the same shape as measure()."""
+    per_op = seconds / count if count else float('inf')
+    return {'median_s': per_op, 'min_s': per_op, 'mean_s': per_op, 'stdev_s': 0.0,
+            'ops_per_s': count / seconds if seconds else None, 'rounds': 1, 'iterations': count}
+
+# --- Shared fixtures (created once, on first use) ---
+_context = {}
+
+def context():
+    if not _context:
+        from PySide6.QtWidgets import QApplication
+        from sail_ui import SailUI
+        from dashboard_ui import DashboardUI
+        _context['app'] = QApplication.instance() or QApplication(sys.argv[:1])
+        _context['sail_ui'] = SailUI(); _context['dashboard_ui'] = DashboardUI()
+        _context['sail_ui'].load_race_course("w1")
+        _context['tmp'] = tempfile.mkdtemp(prefix="sailui-bench-")
+    return _context
+
+SAMPLE_FIELDS = {
+    130306: {'WindSpeed': 6.2, 'WindAngle': 0.7, 'Reference': "Apparent"},
+    127250: {'Heading': 1.2},
+    128267: {'Depth': 12.3},
+    129025: {'Latitude': math.radians(34.05), 'Longitude': math.radians(-118.25)},
+    130314: {'Pressure': 101325.0},
+}
+
+@benchmark
+def parse_pgn():
+    from nmea_reader import NMEA2000Parser, encode_pgn
+    parse = NMEA2000Parser().parse_pgn
+    for pgn, fields in SAMPLE_FIELDS.items():
+        data = encode_pgn(pgn, fields).data
+        def run(pgn=pgn, data=data):
+            for _ in range(1000): parse(pgn, data)
+        yield f"parse_pgn[{pgn}]", measure(run, inner=1000)
+
+@benchmark
+def signal_fanout():
+    """Reader signals into SailUI and DashboardUI, connected as in MainApplication."""
+    from PySide6.QtCore import QThread
+    from nmea_reader import NMEA2000Reader
+    from data_sources import make_source
+    from log_manager import LogManager
+    ctx = context(); sail, dash = ctx['sail_ui'], ctx['dashboard_ui']
+    map_widget = sail.race_view.map_widget
+    reader = NMEA2000Reader(LogManager(os.path.join(ctx['tmp'], "fanout.json")), source=make_source("mock"))
+    reader.wind_data_received.connect(sail.update_wind_display); reader.wind_data_received.connect(dash.update_wind_display)
+    reader.true_wind_data_received.connect(sail.update_true_wind_display); reader.true_wind_data_received.connect(dash.update_true_wind_display)
+    reader.depth_data_received.connect(sail.update_depth_display); reader.depth_data_received.connect(dash.update_depth_display)
+    reader.speed_data_received.connect(sail.update_speed_display)
+    reader.pressure_data_received.connect(dash.update_pressure_display)
+    reader.position_data_received.connect(map_widget.update_boat_position); reader.position_data_received.connect(dash.update_position_display)
+    reader.heading_data_received.connect(map_widget.update_boat_heading); reader.heading_data_received.connect(dash.update_heading_display)
+    lat, lon = math.radians(34.0515), math.radians(-118.2442)
+    # Emitted from the UI thread, so every connection runs directly: this is the cost of the slots themselves.
+    yield "fanout.wind", measure(lambda: reader.wind_data_received.emit(6.2, 0.7, "Apparent"))
+    yield "fanout.true_wind", measure(lambda: reader.true_wind_data_received.emit(7.0, 0.9, 0.3))
+    yield "fanout.depth", measure(lambda: reader.depth_data_received.emit(12.3))
+    yield "fanout.speed", measure(lambda: reader.speed_data_received.emit(5.5))
+    yield "fanout.pressure", measure(lambda: reader.pressure_data_received.emit(101325.0))
+    yield "fanout.position", measure(lambda: reader.position_data_received.emit(lat, lon, 0.0, 1.0, 2.0))
+    yield "fanout.heading", measure(lambda: reader.heading_data_received.emit(20.0))
+
+    class Burst(QThread):
+        def run(self):
+            for _ in range(1000): reader.wind_data_received.emit(6.2, 0.7, "Apparent")
+    burst = Burst()
+    def emit_burst(): burst.start(); burst.wait()
+    # 1000 wind values queued from another thread, timed while the UI thread delivers them.
+    yield "fanout.wind_queued", measure(ctx['app'].processEvents, inner=1000, repeat=5, setup=emit_burst)
+
+@benchmark
+def race_map_paint():
+    from PySide6.QtGui import QPixmap
+    ctx = context(); map_widget = ctx['sail_ui'].race_view.map_widget
+    map_widget.resize(500, 440)
+    map_widget.update_boat_position(math.radians(34.0515), math.radians(-118.2442), 0.0); map_widget.update_boat_heading(20)
+    pixmap = QPixmap(map_widget.size())
+    yield "race_map.paint", measure(lambda: map_widget.render(pixmap))
+
+@benchmark
+def instrument_refresh():
+    """One 10 Hz tick of new values into a shown window, including the repaint it causes."""
+    ctx = context(); sail, dash, app = ctx['sail_ui'], ctx['dashboard_ui'], ctx['app']
+    lat, lon = math.radians(34.0515), math.radians(-118.2442)
+    trends = {'wind': {'change_per_window': 1.2}, 'pressure': {'change_per_window': -40.0}}
+    tick = [0]; noise = random.Random(1)
+    def values():
+        tick[0] += 1; i = tick[0] % 50
+        return 5.0 + i * 0.1, 0.5 + i * 0.02, 12.0 + i * 0.1
+    def steady_values():
+        # Sensor noise smaller than a display step, with wind (9.5 kn) and depth (39.35 ft) on a rounding boundary
+        return 4.887 + noise.gauss(0, 0.02), 0.5 + noise.gauss(0, 0.001), 11.994 + noise.gauss(0, 0.005)
+    def refresh_dashboard(values=values):
+        speed, angle, depth = values()
+        dash.update_wind_display(speed, angle, "Apparent"); dash.update_true_wind_display(speed, angle, angle + 0.2)
+        dash.update_depth_display(depth); dash.update_heading_display(angle * 50); dash.update_pressure_display(101325.0 + depth)
+        dash.update_position_display(lat + depth * 1e-7, lon); dash.update_trip_display(depth * 100, depth * 60)
+        dash.update_trend_display(trends)
+        app.processEvents()
+    def refresh_sail():
+        speed, angle, depth = values()
+        sail.update_wind_display(speed, angle, "Apparent"); sail.update_true_wind_display(speed, angle, angle + 0.2)
+        sail.update_depth_display(depth); sail.update_speed_display(speed); sail.update_trend_display(trends)
+        app.processEvents()
+    dash.resize(1024, 600); dash.show(); app.processEvents()
+    yield "instrument_refresh[dashboard]", measure(refresh_dashboard, repeat=5)
+    yield "instrument_refresh[dashboard steady]", measure(lambda: refresh_dashboard(steady_values), repeat=5)
+    def refresh_wind():
+        speed, angle, _ = values()
+        sail.update_wind_display(speed, angle, "Apparent"); app.processEvents()
+    dash.hide(); sail.show()
+    for view in (0, 2):
+        sail.setView(view); app.processEvents()
+        yield f"instrument_refresh[sail view {view}]", measure(refresh_sail, repeat=5)
+        if view == 0: yield "instrument_refresh[wind gauge]", measure(refresh_wind, repeat=5)
+    sail.hide()
+
+@benchmark
+def theme_switch():
+    """SailUI.setTheme alternating dark and light, alone and followed by the layout and repaint it causes."""
+    from PySide6.QtGui import QPixmap
+    ctx = context(); sail = ctx['sail_ui']; sail.resize(800, 480)
+    pixmap = QPixmap(sail.size()); state = [False]
+    def switch():
+        state[0] = not state[0]; sail.setTheme(state[0])
+    def switch_and_render():
+        switch(); ctx['app'].processEvents(); sail.render(pixmap)
+    for view in (0, 2):
+        sail.setView(view)
+        yield f"theme_switch[view {view}]", measure(switch, repeat=5)
+        yield f"theme_switch_render[view {view}]", measure(switch_and_render, repeat=5)
+    sail.setTheme(False)
+
+@benchmark
+def shared_image_update():
+    """MainApplication.update_shared_image: render, convert to 1-bit, BMP encode."""
+    from main_app import MainApplication
+    from shared_image import SharedImage
+    ctx = context(); ctx['sail_ui'].resize(800, 480)
+    app_state = SimpleNamespace(sail_ui=ctx['sail_ui'], shared_image=SharedImage())
+    for view in (0, 2):
+        ctx['sail_ui'].setView(view)
+        yield f"update_shared_image[view {view}]", measure(lambda: MainApplication.update_shared_image(app_state), repeat=3)
+
+@benchmark
+def shared_image_contention():
+    """SharedImage.update_image while HTTP clients fetch /image.bmp on other threads."""
+    from PIL import Image
+    from shared_image import SharedImage
+    from image_server import create_image_server
+    image = Image.new("1", (800, 480)); shared = SharedImage(); shared.update_image(image)
+    server = create_image_server(shared)
+    for readers in (0, 1, 4):
+        stop = Event(); counts = [0] * readers
+        def read(i):
+            client = server.test_client()
+            while not stop.is_set():
+                client.get('/image.bmp'); counts[i] += 1
+        threads = [Thread(target=read, args=(i,), daemon=True) for i in range(readers)]
+        start = time.perf_counter()
+        for thread in threads: thread.start()
+        yield f"shared_image.update[{readers} readers]", measure(lambda: shared.update_image(image))
+        stop.set()
+        for thread in threads: thread.join()
+        if readers: yield f"shared_image.http_get[{readers} readers]", rate(sum(counts), time.perf_counter() - start)
+
+@benchmark
+def log_manager_io():
+    from log_manager import LogManager
+    ctx = context(); path = os.path.join(ctx['tmp'], "trips_10k.json")
+    trips = [{"id": f"2024{i:010d}", "start_time": 1.7e9 + i * 3600, "end_time": 1.7e9 + i * 3600 + 1800, "distance": 1234.5,
+              "max_wind_speed": 7.5, "min_wind_speed": 2.1, "max_boat_speed": 6.2, "min_boat_speed": 0.4, "wind_direction": "NW",
+              "people": 3, "type": "Race", "course": "w1", "line_crossings": []} for i in range(10000)]
+    with open(path, 'w') as f: json.dump(trips, f)
+    manager = LogManager(path)
+    yield "log_manager.save[10k trips]", measure(manager.save_trips, repeat=3)
+    yield "log_manager.load[10k trips]", measure(manager.load_trips, repeat=3)
+
+# --- Runner ---
+def environment():
+    try: commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError: commit = None
+    try:
+        import PySide6; qt = PySide6.__version__
+    except ImportError: qt = None
+    return {'commit': commit, 'timestamp': time.time(), 'python': platform.python_version(), 'pyside6': qt,
+            'machine': platform.machine(), 'platform': platform.platform()}
+
+def run(name_filter=None):
+    results = {}
+    for bench in BENCHMARKS:
+        if name_filter and name_filter not in bench.__name__: continue
+        for name, result in bench():
+            results[name] = result
+            print(f"{name:44s} {result['median_s'] * 1e6:12.2f} us  {result['ops_per_s'] or 0:14.1f} ops/s")
+    return results
+
+def compare(results, baseline, threshold):
+    """Prints best-round changes against a saved run; returns names that regressed beyond threshold."""
+    regressions = []
+    print(f"\nAgainst {baseline['environment'].get('commit')}:")
+    for name, result in results.items():
+        old = baseline['results'].get(name)
+        if not old: continue
+        change = result['min_s'] / old['min_s'] - 1
+        flag = " REGRESSION" if change > threshold else ""
+        if flag: regressions.append(name)
+        print(f"{name:44s} {change * 100:+7.1f}%{flag}")
+    return regressions
+
+if __name__ == "__main__":
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    env = environment()
+    results = run(options.get('filter'))
+    output = options.get('output') or os.path.join(RESULTS_DIR, f"{env['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f: json.dump({'environment': env, 'results': results}, f, indent=2)
+    print(f"Saved {len(results)} results to {output}")
+    if 'compare' in options:
+        with open(options['compare']) as f: baseline = json.load(f)
+        if compare(results, baseline, float(options.get('threshold', 0.1))): sys.exit(1)
@@ -1,48 +1,201 @@
+# bluetooth_manager.py
 import subprocess
 import re
-from PySide6.QtCore import QObject, Signal, QTimer
+from queue import Queue, Empty
+from threading import Thread, Event
+from PySide6.QtCore import QObject, Signal, Slot, QTimer, SLOT
+from PySide6.QtDBus import QDBusConnection, QDBusError, QDBusMessage, QDBusVariant
+
+BLUEZ_SERVICE = "org.bluez"
+ADAPTER_PATH = "/org/bluez/hci0"
+ADAPTER_INTERFACE = "org.bluez.Adapter1"
+DEVICE_INTERFACE = "org.bluez.Device1"
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+INTROSPECTABLE_INTERFACE = "org.freedesktop.DBus.Introspectable"
+
+def parse_bluetoothctl_info(output):
+    """Turns `bluetoothctl info` output into the status text shown on the dashboard."""
+    name_match = re.search(r"Name: (.+)", output)
+    connected_match = re.search(r"Connected: yes", output)
+    if name_match and connected_match:
+        return f"Connected: {name_match.group(1)}"
+    return "Disconnected"
+
+def _plain(value):
+    """Unwraps QDBusVariant values that QtDBus hands back inside a{sv} maps."""
+    return value.variant() if isinstance(value, QDBusVariant) else value
+
+class _DevicePropertiesQuery(QObject):
+    """One in-flight Properties.GetAll call; remembers which device it was for."""
+    def __init__(self, path, monitor):
+        super().__init__(monitor)
+        self.path = path; self.monitor = monitor
+
+    @Slot("QVariantMap")
+    def on_reply(self, properties):
+        self.monitor.handle_device_properties(self.path, {key: _plain(value) for key, value in properties.items()})
+        self.deleteLater()
+
+    @Slot(QDBusError)
+    def on_error(self, error):
+        self.deleteLater()
+
+class DBusBluetoothMonitor(QObject):
+    """
+    Follows BlueZ device connections through PropertiesChanged signals on the
+    system bus instead of polling. A change on a device triggers one
+    asynchronous GetAll for that device. The startup snapshot is the same
+    thing for every device node under the adapter (from an asynchronous
+    Introspect, whose string reply PySide6 can read where GetManagedObjects'
+    a{oa{sa{sv}}} is out of reach), so a device connected at startup is in
+    connected_devices like any other, and every update lands on this thread
+    in bus order.
+    """
+    status_changed = Signal(str)
+
+    def __init__(self, bus=None, adapter_path=ADAPTER_PATH, parent=None):
+        super().__init__(parent)
+        self.bus = bus if bus is not None else QDBusConnection.systemBus()
+        self.adapter_path = adapter_path
+        self.connected_devices = {}
+        self.device_names = {}
+        self._discoverable_timer = QTimer(self)
+        self._discoverable_timer.setSingleShot(True)
+        self._discoverable_timer.timeout.connect(lambda: self._set_discoverable(False))
+
+    def start(self):
+        if not self.bus.isConnected(): return False
+        ok = self.bus.connect(BLUEZ_SERVICE, "", PROPERTIES_INTERFACE, "PropertiesChanged",
+                              self, SLOT("_on_properties_changed(QDBusMessage)"))
+        if ok: self.snapshot()
+        return ok
+
+    def stop(self):
+        self.bus.disconnect(BLUEZ_SERVICE, "", PROPERTIES_INTERFACE, "PropertiesChanged",
+                            self, SLOT("_on_properties_changed(QDBusMessage)"))
+        self._discoverable_timer.stop()
+
+    def snapshot(self):
+        """Lists the adapter's device nodes, then reads each one as if it had just changed."""
+        request = QDBusMessage.createMethodCall(BLUEZ_SERVICE, self.adapter_path, INTROSPECTABLE_INTERFACE, "Introspect")
+        self.bus.callWithCallback(request, self, SLOT("_on_adapter_nodes(QString)"), SLOT("_on_snapshot_error(QDBusError)"))
+
+    @Slot(str)
+    def _on_adapter_nodes(self, xml):
+        paths = [f"{self.adapter_path}/{name}" for name in re.findall(r'<node name="(dev_[0-9A-Fa-f_]+)"', xml)]
+        for path in paths: self.refresh_device(path)
+        if not paths: self.status_changed.emit(self.current_status())
+
+    @Slot(QDBusError)
+    def _on_snapshot_error(self, error):
+        print(f"Could not list Bluetooth devices: {error.message()}")
+        self.status_changed.emit(self.current_status())
+
+    @Slot(QDBusMessage)
+    def _on_properties_changed(self, message):
+        # PySide6 cannot read the a{sv} payload of a raw message, so re-read the device with a typed reply instead.
+        arguments = message.arguments()
+        if arguments and arguments[0] == DEVICE_INTERFACE: self.refresh_device(message.path())
+
+    def refresh_device(self, path):
+        query = _DevicePropertiesQuery(path, self)
+        request = QDBusMessage.createMethodCall(BLUEZ_SERVICE, path, PROPERTIES_INTERFACE, "GetAll")
+        request.setArguments([DEVICE_INTERFACE])
+        self.bus.callWithCallback(request, query, SLOT("on_reply(QVariantMap)"), SLOT("on_error(QDBusError)"))
+
+    def handle_device_properties(self, path, properties):
+        name = properties.get("Alias") or properties.get("Name")
+        if name: self.device_names[path] = name
+        was_connected = path in self.connected_devices
+        if properties.get("Connected"): self.connected_devices[path] = True
+        else: self.connected_devices.pop(path, None)
+        if was_connected or path in self.connected_devices: self.status_changed.emit(self.current_status())
+
+    def current_status(self):
+        if not self.connected_devices: return "Disconnected"
+        path = next(iter(self.connected_devices))
+        return f"Connected: {self.device_names.get(path, path.rsplit('/', 1)[-1])}"
+
+    def _set_discoverable(self, enabled):
+        message = QDBusMessage.createMethodCall(BLUEZ_SERVICE, self.adapter_path, PROPERTIES_INTERFACE, "Set")
+        message.setArguments([ADAPTER_INTERFACE, "Discoverable", QDBusVariant(enabled)])
+        self.bus.asyncCall(message)
+
+    def make_discoverable(self, duration=60):
+        """Fire-and-forget; discoverability is switched off again after `duration` seconds."""
+        self._set_discoverable(True)
+        self._discoverable_timer.start(duration * 1000)
+        print(f"Bluetooth discoverable for {duration} seconds.")
+
+class PollingBluetoothMonitor(QObject):
+    """Fallback for systems without D-Bus: polls bluetoothctl from a worker thread."""
+    status_changed = Signal(str)
+
+    def __init__(self, interval_s=5, parent=None):
+        super().__init__(parent)
+        self.interval_s = interval_s
+        self._commands = Queue()
+        self._stop_event = Event()
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop_event.set()
+        self._commands.put(None)
+        if self._thread: self._thread.join(timeout=2)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                result = subprocess.run(['bluetoothctl', 'info'], capture_output=True, text=True, timeout=5)
+                self.status_changed.emit(parse_bluetoothctl_info(result.stdout))
+            except (subprocess.TimeoutExpired, FileNotFoundError):
+                self.status_changed.emit("Error: bluetoothctl not found or timed out")
+            try:
+                command = self._commands.get(timeout=self.interval_s)
+                if command: self._run_command(*command)
+            except Empty:
+                pass
+
+    def _run_command(self, command, failure):
+        """Runs `bluetoothctl <command>`, printing failure if it can't run or exits non-zero."""
+        try: ok = subprocess.run(['bluetoothctl'] + command, capture_output=True, timeout=5).returncode == 0
+        except (subprocess.TimeoutExpired, FileNotFoundError): ok = False
+        if not ok: print(failure)
+
+    def make_discoverable(self, duration=60):
+        self._commands.put((['discoverable-timeout', str(duration)], "Could not set the discoverable timeout."))
+        self._commands.put((['discoverable', 'on'], "Could not make device discoverable."))
+        print(f"Bluetooth discoverable for {duration} seconds.")
 
 class BluetoothManager(QObject):
     connection_status_changed = Signal(str)
-    
-    def __init__(self, parent=None):
+
+    def __init__(self, parent=None, monitor=None):
         super().__init__(parent)
-        # Timer to periodically check connection status
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.check_connection_status)
-        self.timer.start(5000) # Check every 5 seconds
-
-    def check_connection_status(self):
-        """
-        Calls bluetoothctl info to see if a device is connected.
-        """
-        try:
-            # Run the command to get info on all known bluetooth devices
-            result = subprocess.run(['bluetoothctl', 'info'], capture_output=True, text=True, timeout=5)
-            output = result.stdout
-            
-            # Use regex to find the Name and if it's connected
-            name_match = re.search(r"Name: (.+)", output)
-            connected_match = re.search(r"Connected: yes", output)
-            
-            if name_match and connected_match:
-                device_name = name_match.group(1)
-                status_text = f"Connected: {device_name}"
-            else:
-                status_text = "Disconnected"
-                
+        self.status = None
+        self.monitor = monitor or DBusBluetoothMonitor(parent=self)
+        self.monitor.status_changed.connect(self._on_status)
+        if not self.monitor.start():
+            print("BlueZ D-Bus not available, polling bluetoothctl instead.")
+            self.monitor = PollingBluetoothMonitor(parent=self)
+            self.monitor.status_changed.connect(self._on_status)
+            self.monitor.start()
+
+    @Slot(str)
+    def _on_status(self, status_text):
+        """Only real transitions reach the UI."""
+        if status_text != self.status:
+            self.status = status_text
             self.connection_status_changed.emit(status_text)
-            
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            self.connection_status_changed.emit("Error: bluetoothctl not found or timed out")
 
     def make_discoverable(self, duration=60):
-        """
-        Makes the Pi discoverable for a short period.
-        """
-        try:
-            subprocess.run(['bluetoothctl', 'discoverable on'], timeout=2)
-            print(f"Bluetooth discoverable for {duration} seconds.")
-            # In a real implementation, you might turn it off after a duration
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            print("Could not make device discoverable.")
\ No newline at end of file
+        self.monitor.make_discoverable(duration)
+
+    def stop(self):
+        self.monitor.stop()
@@ -0,0 +1,139 @@
+# can_capture.py
+import gzip
+import os
+import shutil
+import time
+from datetime import datetime
+from queue import Queue, Full, Empty
+from threading import Thread, Event, Lock
+from can_replay import BINARY_MAGIC, BINARY_RECORD
+
+class CanCapture:
+    """
+    Tees raw CAN frames into rotating binary segments (the format CanLogReplay
+    reads). record() only packs the frame into an in-memory block; full blocks
+    are handed to a writer thread, so the decode path never waits on the SD
+    card. If the writer falls behind, whole blocks are dropped and counted.
+    Closed segments are gzipped in the background and the oldest deleted
+    beyond keep_segments.
+    """
+    def __init__(self, directory='captures', max_bytes=64 * 1024 * 1024, max_age_s=3600, block_records=1024,
+                 flush_interval_s=2.0, max_queued_blocks=256, compress=True, keep_segments=48):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.block_records = block_records
+        self.flush_interval_s = flush_interval_s
+        self.compress = compress
+        self.keep_segments = keep_segments
+        self._pending = []
+        self._pending_lock = Lock()
+        self._blocks = Queue(maxsize=max_queued_blocks)
+        self._stop_event = Event()
+        self._thread = None
+        self._compressors = []
+        self._segment = None; self._segment_path = None; self._segment_opened = 0.0; self._segment_bytes = 0
+        self.records = 0; self.dropped = 0; self.bytes_written = 0; self.segments = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread and self._thread.is_alive():
+            self._stop_event.set()
+            self._thread.join(timeout=5)
+        self._close_segment()
+        for compressor in self._compressors: compressor.join()
+
+    def record(self, msg):
+        """Listener for can.Notifier (or any frame sink): takes anything with timestamp, arbitration_id and data."""
+        data = bytes(msg.data)
+        block = None
+        with self._pending_lock:
+            self._pending.append(BINARY_RECORD.pack(msg.timestamp, msg.arbitration_id, len(data), data))
+            if len(self._pending) >= self.block_records: block = self._take_pending()
+        if block: self._enqueue(block)
+
+    # python-can Listener protocol
+    __call__ = on_message_received = record
+
+    def _take_pending(self):
+        block = b''.join(self._pending); count = len(self._pending)
+        self._pending = []
+        return block, count
+
+    def _enqueue(self, block):
+        try: self._blocks.put_nowait(block)
+        except Full: self.dropped += block[1]
+
+    def stats(self):
+        return {'records': self.records, 'dropped': self.dropped, 'bytes_written': self.bytes_written,
+                'segments': self.segments, 'queued_blocks': self._blocks.qsize()}
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try: block = self._blocks.get(timeout=self.flush_interval_s)
+            except Empty:
+                # Quiet bus: flush the partial block so a crash loses at most flush_interval_s.
+                with self._pending_lock: block = self._take_pending() if self._pending else None
+            if block: self._write(block)
+            elif self._segment and time.time() - self._segment_opened >= self.max_age_s: self._close_segment()
+        while True:
+            try: self._write(self._blocks.get_nowait())
+            except Empty: break
+        with self._pending_lock: block = self._take_pending() if self._pending else None
+        if block: self._write(block)
+
+    def _write(self, block):
+        data, count = block
+        if self._segment and (self._segment_bytes >= self.max_bytes or time.time() - self._segment_opened >= self.max_age_s):
+            self._close_segment()
+        if self._segment is None: self._open_segment()
+        self._segment.write(data)
+        self._segment.flush()
+        self._segment_bytes += len(data); self.bytes_written += len(data); self.records += count
+
+    def _open_segment(self):
+        self._segment_path = os.path.join(self.directory, f"can-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.bin")
+        self._segment = open(self._segment_path, 'wb', buffering=1024 * 1024)
+        self._segment.write(BINARY_MAGIC)
+        self._segment_opened = time.time(); self._segment_bytes = len(BINARY_MAGIC)
+        self.segments += 1
+
+    def _close_segment(self):
+        if self._segment is None: return
+        self._segment.close(); self._segment = None
+        if self.compress:
+            self._compressors = [thread for thread in self._compressors if thread.is_alive()]
+            compressor = Thread(target=self._compress, args=(self._segment_path,), daemon=True)
+            compressor.start(); self._compressors.append(compressor)
+        self._prune()
+
+    def _compress(self, path):
+        try:
+            with open(path, 'rb') as src, gzip.open(path + '.gz', 'wb', compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.remove(path)
+        except FileNotFoundError:
+            pass # Pruned before we got to it
+
+    def _prune(self):
+        segments = sorted(name for name in os.listdir(self.directory) if name.startswith('can-'))
+        closed = [name for name in segments if os.path.join(self.directory, name) != self._segment_path]
+        for name in closed[:max(0, len(closed) - self.keep_segments)]:
+            try: os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError: pass
+
+if __name__ == "__main__":
+    # Capture a simulated race at full speed into ./captures and report what reached disk.
+    import sys
+    from nmea_simulator import NMEASimulator
+    capture = CanCapture(directory=sys.argv[1] if len(sys.argv) > 1 else 'captures', max_bytes=1024 * 1024)
+    capture.start()
+    sim = NMEASimulator(encode_frames=True, speed=0, frame_sink=capture.record)
+    start = time.perf_counter(); sim.run_for(3600); elapsed = time.perf_counter() - start
+    capture.stop()
+    print(f"{sim.messages_emitted} frames in {elapsed:.2f} s; {capture.stats()}")
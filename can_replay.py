@@ -0,0 +1,216 @@
+# can_replay.py
+import bisect
+import gzip
+import mmap
+import os
+import struct
+import time
+from binascii import hexlify, unhexlify
+from threading import Thread, Event
+from nmea_reader import NMEA2000Parser, CanFrame
+
+CHUNK_SIZE = 1 << 20
+# Our own binary log: an 8 byte magic followed by fixed-size records (timestamp, id, dlc, data).
+BINARY_MAGIC = b'SAILCAN1'
+BINARY_RECORD = struct.Struct('<dIB3x8s')
+
+def format_candump(frame, channel='can0'):
+    """One `candump -l` line, e.g. `(1700000000.123456) can0 09FD0201#00F4019A02FAFFFF`."""
+    return b'(%.6f) %s %08X#%s\n' % (frame.timestamp, channel.encode(), frame.arbitration_id, hexlify(bytes(frame.data)).upper())
+
+def detect_format(head):
+    if head.startswith(BINARY_MAGIC): return 'binary'
+    for line in head.splitlines():
+        line = line.strip()
+        if not line: continue
+        if line.startswith(b'('): return 'candump'
+        if line[:1].isdigit() or line.startswith((b'date', b'base', b'internal', b'Begin', b'//')): return 'asc'
+    return 'candump'
+
+def _parse_candump(line):
+    # `(ts) can0 ID#DATA` from candump -l, or `(ts) can0 ID [8] 00 11 ...` from candump -ta.
+    parts = line.split()
+    if len(parts) < 3 or not parts[0].startswith(b'('): return None
+    if b'#' in parts[2]:
+        ident, _, payload = parts[2].partition(b'#')
+        data = unhexlify(payload)
+    else:
+        ident = parts[2]; data = unhexlify(b''.join(parts[4:]))
+    return float(parts[0][1:-1]), int(ident, 16), data
+
+def _parse_asc(line):
+    # Vector ASC: `0.012345 1 9FD0201x Rx d 8 00 F4 01 9A 02 FA FF FF`; header and event lines are skipped.
+    parts = line.split()
+    if len(parts) < 6 or parts[4] != b'd': return None
+    try: timestamp = float(parts[0])
+    except ValueError: return None
+    dlc = int(parts[5], 16)
+    return timestamp, int(parts[2].rstrip(b'x'), 16), unhexlify(b''.join(parts[6:6 + dlc]))
+
+class CanLogReplay:
+    """
+    Streams a recorded candump, ASC or binary log through NMEA2000Parser with
+    the same add_callback/start/stop interface as MockNMEA2000. The file is
+    memory-mapped and parsed a chunk at a time, so even multi-gigabyte logs
+    start instantly. Gzipped capture segments are decompressed into memory.
+
+    speed: 1.0 is real time, 50.0 is fifty times faster, 0 runs as fast as possible.
+    """
+    def __init__(self, path, speed=1.0, loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.parser = NMEA2000Parser()
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if path.endswith('.gz'): self._mm = gzip.decompress(self._file.read()) # Rotated capture segments
+        else: self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.format = detect_format(self._mm[:4096])
+        self._data_start = len(BINARY_MAGIC) if self.format == 'binary' else 0
+        self._parse_line = _parse_asc if self.format == 'asc' else _parse_candump
+        self._offset = self._data_start
+        self._stop_event = Event(); self._thread = None
+        self.reset_stats()
+
+    def add_callback(self, pgn, func):
+        self.parser.add_callback(pgn, func)
+
+    def reset_stats(self):
+        self.frames_read = 0; self.bytes_read = 0; self.decode_errors = 0; self.elapsed_s = 0.0
+        self._run_start = None # perf_counter() when the current run() began; None when not playing
+
+    def stats(self):
+        """Throughput so far, including a run still in progress (a looping replay's never ends)."""
+        run_start = self._run_start # Read once: run() may clear it meanwhile
+        elapsed_s = self.elapsed_s + (time.perf_counter() - run_start if run_start is not None else 0.0)
+        elapsed = elapsed_s or 1e-9
+        return {'frames': self.frames_read, 'errors': self.decode_errors, 'elapsed_s': elapsed_s,
+                'frames_per_s': self.frames_read / elapsed, 'mb_per_s': self.bytes_read / elapsed / 1e6}
+
+    def close(self):
+        self.stop()
+        if isinstance(self._mm, mmap.mmap): self._mm.close()
+        self._file.close()
+
+    def batches(self):
+        """Yields lists of (timestamp, arbitration_id, data) from the current offset, one chunk at a time."""
+        mm = self._mm; end = len(mm)
+        if self.format == 'binary':
+            step = BINARY_RECORD.size * (CHUNK_SIZE // BINARY_RECORD.size)
+            while self._offset + BINARY_RECORD.size <= end:
+                chunk_end = min(end - (end - self._data_start) % BINARY_RECORD.size, self._offset + step)
+                chunk = mm[self._offset:chunk_end]
+                self._offset = chunk_end; self.bytes_read += len(chunk)
+                yield [(t, ident, data[:dlc]) for t, ident, dlc, data in BINARY_RECORD.iter_unpack(chunk)]
+            return
+        parse = self._parse_line
+        while self._offset < end:
+            chunk_end = min(end, self._offset + CHUNK_SIZE)
+            if chunk_end < end:
+                newline = mm.rfind(b'\n', self._offset, chunk_end)
+                if newline < 0: newline = mm.find(b'\n', chunk_end) # A single line longer than a chunk
+                chunk_end = end if newline < 0 else newline + 1
+            chunk = mm[self._offset:chunk_end]
+            self._offset = chunk_end; self.bytes_read += len(chunk)
+            batch = []
+            for line in chunk.split(b'\n'):
+                try: frame = parse(line)
+                except ValueError: frame = None
+                if frame: batch.append(frame)
+            yield batch
+
+    def _timestamp_at(self, offset):
+        """First frame timestamp at or after offset, and where its line starts."""
+        mm = self._mm; end = len(mm)
+        if self.format == 'binary':
+            index = (offset - self._data_start) // BINARY_RECORD.size
+            start = self._data_start + index * BINARY_RECORD.size
+            if start + BINARY_RECORD.size > end: return None, end
+            return BINARY_RECORD.unpack_from(mm, start)[0], start
+        if offset > self._data_start:
+            newline = mm.find(b'\n', offset - 1)
+            offset = end if newline < 0 else newline + 1
+        while offset < end:
+            newline = mm.find(b'\n', offset)
+            line_end = end if newline < 0 else newline
+            try: frame = self._parse_line(mm[offset:line_end])
+            except ValueError: frame = None
+            if frame: return frame[0], offset
+            offset = line_end + 1
+        return None, end
+
+    def seek(self, timestamp):
+        """Positions playback at the first frame at or after `timestamp` (log time), by bisecting the file."""
+        lo, hi = self._data_start, len(self._mm)
+        if self.format == 'binary':
+            records = (hi - lo) // BINARY_RECORD.size
+            index = bisect.bisect_left(range(records), timestamp, key=lambda i: BINARY_RECORD.unpack_from(self._mm, lo + i * BINARY_RECORD.size)[0])
+            self._offset = lo + index * BINARY_RECORD.size
+            return
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_time, line_start = self._timestamp_at(mid)
+            if mid_time is None or mid_time >= timestamp: hi = mid
+            else: lo = line_start + 1
+        self._offset = self._timestamp_at(lo)[1]
+
+    def rewind(self):
+        self._offset = self._data_start
+
+    def run(self):
+        """Plays from the current offset until the end of the log (or stop()). Blocks."""
+        parser = self.parser; speed = self.speed
+        wall_start = self._run_start = time.perf_counter(); log_start = None
+        while True:
+            for batch in self.batches():
+                for timestamp, arbitration_id, data in batch:
+                    if self._stop_event.is_set(): break
+                    if speed:
+                        if log_start is None: log_start = timestamp; wall_start = time.perf_counter()
+                        delay = wall_start + (timestamp - log_start) / speed - time.perf_counter()
+                        if delay > 0.001: self._stop_event.wait(delay)
+                    try: parser.handle_message(CanFrame(arbitration_id, data, timestamp))
+                    except (struct.error, IndexError): self.decode_errors += 1
+                    self.frames_read += 1
+                if self._stop_event.is_set(): break
+            if not self.loop or self._stop_event.is_set(): break
+            self.rewind(); log_start = None
+        self.elapsed_s += time.perf_counter() - self._run_start; self._run_start = None
+
+    # --- Same threaded interface as MockNMEA2000 ---
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = Thread(target=self.run, daemon=True)
+            self._thread.start()
+            print(f"REPLAY: {self.path} ({self.format}) at {'max' if not self.speed else f'{self.speed:g}x'} speed.")
+
+    def stop(self):
+        if self._thread and self._thread.is_alive():
+            self._stop_event.set()
+            self._thread.join(timeout=2)
+            print(f"REPLAY: stopped after {self.frames_read} frames.")
+
+if __name__ == "__main__":
+    # Decoder regression benchmark:
+    #   python can_replay.py --make-sample sample.log 600   (writes a candump log from the simulator)
+    #   python can_replay.py sample.log [speed] [seek_s]
+    import sys
+    if len(sys.argv) > 2 and sys.argv[1] == '--make-sample':
+        from nmea_simulator import NMEASimulator
+        with open(sys.argv[2], 'wb') as out:
+            sim = NMEASimulator(encode_frames=True, speed=0, frame_sink=lambda frame: out.write(format_candump(frame)))
+            sim.run_for(float(sys.argv[3]) if len(sys.argv) > 3 else 600)
+        print(f"Wrote {sim.messages_emitted} frames to {sys.argv[2]}")
+        sys.exit()
+    replay = CanLogReplay(sys.argv[1], speed=float(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    decoded = {}
+    for pgn in (130306, 127250, 128267, 129025, 130314):
+        replay.add_callback(pgn, lambda pgn, data: decoded.__setitem__(pgn, decoded.get(pgn, 0) + 1))
+    if len(sys.argv) > 3: replay.seek(float(sys.argv[3]))
+    replay.run()
+    stats = replay.stats()
+    print(f"{replay.format}: {stats['frames']} frames, {stats['errors']} errors in {stats['elapsed_s']:.2f} s "
+          f"({stats['frames_per_s']:.0f} frames/s, {stats['mb_per_s']:.1f} MB/s)")
+    for pgn, count in sorted(decoded.items()): print(f"  PGN {pgn}: {count} decoded")
+    replay.close()
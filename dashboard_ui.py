@@ -1,22 +1,20 @@
 # dashboard_ui.py
 import os
 import math
-import time
-from collections import deque
 from datetime import datetime
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QTabWidget, QLabel,
                                QCheckBox, QPushButton, QGridLayout, QHBoxLayout, QListWidget,
                                QListWidgetItem, QTableWidget, QTableWidgetItem, QHeaderView, QInputDialog, QMessageBox)
-from PySide6.QtCore import Qt, Signal, Slot, QTimer, QSize, QPointF, QUrl
+from PySide6.QtCore import Qt, Signal, Slot, QTimer, QSize, QPointF
 from PySide6.QtGui import QKeyEvent, QPainter, QColor, QPolygonF, QBrush, QPen
-from PySide6.QtMultimedia import QSoundEffect
-
-# --- (Helper functions and widgets remain the same) ---
-def haversine_distance(lat1_rad, lon1_rad, lat2_rad, lon2_rad):
-    R = 6371000; dlat = lat2_rad - lat1_rad; dlon = lon2_rad - lon1_rad
-    a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-
+from anchor_watch import OFF
+from alarm_manager import ALARM
+from latency_tracer import tracer, STAGES
+from rolling_stats import trend_text
+from views.instrument_tile import InstrumentTile
+from display_binding import DisplayBinding, skip_ratios
+
+# --- (Helper widgets remain the same) ---
 class ArrowWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -31,37 +29,55 @@ class ArrowWidget(QWidget):
         painter.translate(self.width() / 2, self.height() / 2); painter.rotate(self.angle)
         painter.setBrush(QBrush(self.arrow_color)); painter.setPen(Qt.NoPen); painter.drawPolygon(self.arrow_polygon)
 
-class DataWidget(QWidget):
-    def __init__(self, title, unit="", title_size=18, value_size=64, unit_size=18):
-        super().__init__(); layout = QVBoxLayout(self); layout.setContentsMargins(0,0,0,0); layout.setSpacing(-25)
-        self.title_label = QLabel(title); self.title_label.setStyleSheet(f"font-family: Oxanium; font-weight: bold; font-size: {title_size}px; color: #888;")
-        self.value_label = QLabel("N/A"); self.value_label.setStyleSheet(f"font-family: Oxanium; font-weight: bold; font-size: {value_size}px; color: white;")
-        self.unit_label = QLabel(unit); self.unit_label.setStyleSheet(f"font-family: Oxanium; font-size: {unit_size}px; color: #888;")
-        layout.addWidget(self.title_label); layout.addWidget(self.value_label); layout.addWidget(self.unit_label)
+class SparklineWidget(QWidget):
+    """A small line chart; the polyline is built in setPoints so painting does no math."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedSize(QSize(150, 44)); self.line_color = QColor("#8AE2F8")
+        self.segments = [] # QPolygonF per unbroken run of points
+    def setPoints(self, points):
+        values = [p for p in points if p is not None]
+        self.segments = []
+        if len(values) >= 2:
+            low, high = min(values), max(values); span = max(high - low, 1e-9)
+            step = (self.width() - 4) / (len(points) - 1); height = self.height() - 4
+            segment = []
+            for i, p in enumerate(points):
+                if p is None:
+                    if len(segment) > 1: self.segments.append(QPolygonF(segment))
+                    segment = []
+                else: segment.append(QPointF(2 + i * step, 2 + height * (high - p) / span))
+            if len(segment) > 1: self.segments.append(QPolygonF(segment))
+        self.update()
+    def paintEvent(self, event):
+        if not self.segments: return
+        painter = QPainter(self); painter.setRenderHint(QPainter.Antialiasing)
+        pen = QPen(self.line_color); pen.setWidth(2); painter.setPen(pen)
+        for segment in self.segments: painter.drawPolyline(segment)
 
-class DirectionalDataWidget(QWidget):
+DASHBOARD_COLORS = ("white", "#888")
+
+def data_tile(title, unit="", value_size=64, value_sample="888.8", unit_sample=None):
+    tile = InstrumentTile(title, unit, value_size=value_size, value_sample=value_sample, unit_sample=unit_sample, spacing=8, colors=DASHBOARD_COLORS)
+    tile.setValue("N/A")
+    return tile
+
+class DirectionalDataWidget(InstrumentTile):
+    """A bearing in a fixed-width value area with its arrow alongside."""
     def __init__(self, title, unit="°"):
-        super().__init__(); main_layout=QVBoxLayout(self); main_layout.setSpacing(5)
-        self.title_label=QLabel(title); self.title_label.setStyleSheet("font-family:Oxanium;font-weight:bold;font-size:30px;color:#888;")
-        value_layout=QHBoxLayout(); value_layout.setSpacing(20)
-        self.value_label=QLabel("N/A"); self.value_label.setStyleSheet("font-family:Oxanium;font-weight:bold;font-size:106px;color:white;")
-        self.value_label.setFixedWidth(160); self.value_label.setAlignment(Qt.AlignLeft|Qt.AlignVCenter)
-        self.arrow_widget=ArrowWidget(); value_layout.addWidget(self.value_label); value_layout.addWidget(self.arrow_widget)
-        self.unit_label=QLabel(unit); self.unit_label.setStyleSheet("font-family:Oxanium;font-size:30px;color:#888;")
-        main_layout.addWidget(self.title_label); main_layout.addLayout(value_layout); main_layout.addWidget(self.unit_label)
-    def setValueText(self,text): self.value_label.setText(text)
-    def setArrowAngle(self,angle): self.arrow_widget.setAngle(angle)
-
-class TrendDataWidget(QWidget):
-    def __init__(self, title, unit=""):
-        super().__init__(); main_layout = QVBoxLayout(self); main_layout.setContentsMargins(0,0,0,0); main_layout.setSpacing(5)
-        self.title_label=QLabel(title); self.title_label.setStyleSheet("font-family:Oxanium;font-weight:bold;font-size:18px;color:#888;")
-        value_layout=QHBoxLayout(); value_layout.setSpacing(15)
-        self.value_label=QLabel("N/A"); self.value_label.setStyleSheet("font-family:Oxanium;font-weight:bold;font-size:64px;color:white;")
-        self.trend_label=QLabel(""); self.trend_label.setStyleSheet("font-family:Oxanium;font-weight:bold;font-size:25px;color:#888; padding-bottom: 10px;")
-        value_layout.addWidget(self.value_label); value_layout.addWidget(self.trend_label, alignment=Qt.AlignBottom); value_layout.addStretch()
-        self.unit_label=QLabel(unit); self.unit_label.setStyleSheet("font-family:Oxanium;font-size:18px;color:#888;")
-        main_layout.addWidget(self.title_label); main_layout.addLayout(value_layout); main_layout.addWidget(self.unit_label)
+        super().__init__(title, unit, title_size=30, value_size=106, unit_size=30, value_sample="888", spacing=8, accessory=ArrowWidget(),
+                         accessory_align=Qt.AlignVCenter, accessory_spacing=20, colors=DASHBOARD_COLORS)
+        self.setValue("N/A")
+    def setArrowAngle(self,angle): self.accessory.setAngle(angle)
+
+class TrendDataWidget(InstrumentTile):
+    """Value with its trend on the same baseline, and optionally a sparkline (self.sparkline)."""
+    def __init__(self, title, unit="", sparkline=False, value_sample="888", trend_sample="▼ 88.8", unit_sample=None):
+        sparkline = SparklineWidget() if sparkline else None
+        super().__init__(title, unit, value_sample=value_sample, unit_sample=unit_sample, trend_size=25, trend_sample=trend_sample,
+                         spacing=8, accessory=sparkline, colors=DASHBOARD_COLORS)
+        self.sparkline = sparkline
+        self.setValue("N/A")
 
 class DashboardUI(QWidget):
     race_selected = Signal(str)
@@ -77,7 +93,8 @@ class DashboardUI(QWidget):
     set_people_requested = Signal(str, int)
     trip_type_changed = Signal(str)
     trip_course_changed = Signal(str)
-    anchor_drift_alarm = Signal(bool)
+    alarm_acknowledged = Signal() # Dismiss: the AlarmManager silences what's raised now; the banner stays until it clears
+    anchor_watch_toggled = Signal(bool) # The reader's AnchorWatch sets or clears the watch and answers with update_anchor_watch
 
     def keyPressEvent(self, event: QKeyEvent):
         if event.key() == Qt.Key.Key_B and not event.isAutoRepeat():
@@ -97,8 +114,7 @@ class DashboardUI(QWidget):
         super().__init__()
         self.setWindowTitle("Sailing Dashboard"); self.setGeometry(0,0,1024,600)
         self.setStyleSheet("background-color: #1e1e1e; color: white;")
-        self.wind_history=deque(maxlen=300); self.pressure_history=deque(maxlen=300)
-        self.anchor_pos_rad=None; self.current_pos_rad=None; layout=QVBoxLayout(self)
+        layout=QVBoxLayout(self)
         self.tabs=QTabWidget(); self.tabs.setTabPosition(QTabWidget.South)
         self.tabs.setStyleSheet("""
             QTabBar::tab {
@@ -126,16 +142,12 @@ class DashboardUI(QWidget):
             }
         """)
 
-        self.dashboard_tab=QWidget(); self.log_tab = QWidget(); self.settings_tab=QWidget()
-        self.tabs.addTab(self.dashboard_tab,"Dashboard"); self.tabs.addTab(self.log_tab, "Ships log") ;self.tabs.addTab(self.settings_tab,"Settings")
-        layout.addWidget(self.tabs); self._setup_dashboard_grid(); self._setup_log_panel(); self._setup_settings_panel()
-        self.trend_timer=QTimer(self); self.trend_timer.timeout.connect(self.update_trends); self.trend_timer.start(5000)
-
-        self.alarm_sound = QSoundEffect()
-        script_dir = os.path.dirname(__file__)
-        sound_file_path = os.path.join(script_dir, "beep.wav") # Using .wav is more reliable
-        self.alarm_sound.setSource(QUrl.fromLocalFile(sound_file_path))
-        self.alarm_sound.setLoopCount(-2)
+        self.dashboard_tab=QWidget(); self.log_tab = QWidget(); self.settings_tab=QWidget(); self.debug_tab=QWidget()
+        self.tabs.addTab(self.dashboard_tab,"Dashboard"); self.tabs.addTab(self.log_tab, "Ships log") ;self.tabs.addTab(self.settings_tab,"Settings"); self.tabs.addTab(self.debug_tab,"Debug")
+        layout.addWidget(self.tabs); self._setup_dashboard_grid(); self._setup_settings_panel(); self._setup_debug_panel()
+        # The ships log is built the first time its tab is opened; trips passed in before that wait in _pending_trips.
+        self.log_table=None; self._pending_trips=[]
+        self.tabs.currentChanged.connect(self.on_tab_changed)
 
 
     def _setup_dashboard_grid(self):
@@ -143,11 +155,11 @@ class DashboardUI(QWidget):
         dashboard_layout.setContentsMargins(0, 0, 0, 0)
         dashboard_layout.setSpacing(0)
 
-        self.drift_alarm_banner = QWidget(self.dashboard_tab)
-        banner_layout = QHBoxLayout(self.drift_alarm_banner)
-        banner_label = QLabel("ANCHOR DRIFTING!")
-        banner_label.setStyleSheet("font-size: 24px; font-weight: bold; color: black;")
-        dismiss_button = QPushButton("Dismiss")
+        self.alarm_banner = QWidget(self.dashboard_tab)
+        banner_layout = QHBoxLayout(self.alarm_banner)
+        self.alarm_label = QLabel()
+        self.alarm_label.setStyleSheet("font-size: 24px; font-weight: bold; color: black;")
+        self.dismiss_button = dismiss_button = QPushButton("Dismiss")
         dismiss_button.setStyleSheet("""
             QPushButton {
                 font-family: Oxanium;
@@ -164,10 +176,10 @@ class DashboardUI(QWidget):
                 color: white;
             }
         """)
-        banner_layout.addWidget(banner_label, alignment=Qt.AlignLeft)
+        banner_layout.addWidget(self.alarm_label, alignment=Qt.AlignLeft)
         banner_layout.addWidget(dismiss_button, alignment=Qt.AlignRight)
-        self.drift_alarm_banner.setStyleSheet("background-color: #F28B82; padding: 10px; border-radius: 8px;")
-        self.drift_alarm_banner.hide()
+        self.alarm_banner.setStyleSheet("background-color: #F28B82; padding: 10px; border-radius: 8px;")
+        self.alarm_banner.hide()
         dismiss_button.clicked.connect(self.on_dismiss_alarm)
 
         grid_widget = QWidget()
@@ -176,22 +188,23 @@ class DashboardUI(QWidget):
         grid_layout.setVerticalSpacing(50)
         grid_layout.setHorizontalSpacing(80)
 
-        self.depth_widget = DataWidget("DEPTH", "feet")
-        self.depth_widget.layout().setContentsMargins(0, 20, 0, 0)
-        self.trip_dist_widget = DataWidget("TRIP DISTANCE", "miles")
-        self.trip_time_widget = DataWidget("TRIP TIME", "")
-        grid_layout.addWidget(self.depth_widget, 0, 0, alignment=Qt.AlignTop)
+        self.depth_widget = data_tile("DEPTH", "feet")
+        self.trip_dist_widget = data_tile("TRIP DISTANCE", "miles")
+        self.trip_time_widget = data_tile("TRIP TIME", "", value_sample="88:88")
+        depth_layout = QVBoxLayout(); depth_layout.setContentsMargins(0, 20, 0, 0); depth_layout.addWidget(self.depth_widget)
+        grid_layout.addLayout(depth_layout, 0, 0, alignment=Qt.AlignTop)
         grid_layout.addWidget(self.trip_dist_widget, 1, 0, alignment=Qt.AlignTop)
         grid_layout.addWidget(self.trip_time_widget, 2, 0, alignment=Qt.AlignTop)
         self.wind_dir_widget = DirectionalDataWidget("WIND DIR.", "")
         self.heading_widget = DirectionalDataWidget("HEADING", "°")
-        self.wind_speed_widget = TrendDataWidget("AP. WIND SPEED", "knots")
-        self.pressure_widget = TrendDataWidget("PRESSURE", "Pascal")
+        self.wind_speed_widget = TrendDataWidget("AP. WIND SPEED", "knots", value_sample="88")
+        self.pressure_widget = TrendDataWidget("PRESSURE", "Pascal", sparkline=True, value_sample="888888", trend_sample="▼ 888",
+                                               unit_sample="Pascal · falling very rapidly (-88.8 hPa/3h)")
         grid_layout.addWidget(self.wind_dir_widget, 0, 1, alignment=Qt.AlignTop)
         grid_layout.addWidget(self.wind_speed_widget, 1, 1, alignment=Qt.AlignTop)
         grid_layout.addWidget(self.pressure_widget, 2, 1, alignment=Qt.AlignTop)
-        self.position_widget = DataWidget("POSITION", "", value_size=30)
-        self.drag_widget = DataWidget("DRAG / DRIFT", "ft")
+        self.position_widget = data_tile("POSITION", "", value_size=30, value_sample="-88.8888°    -188.8888°", unit_sample="Latitude / Longitude")
+        self.drag_widget = data_tile("DRAG / DRIFT", "ft")
         drag_layout = QHBoxLayout()
         self.anchor_button = QPushButton("Set")
         self.anchor_button.setCheckable(True)
@@ -219,8 +232,15 @@ class DashboardUI(QWidget):
         grid_layout.addWidget(self.position_widget, 1, 2, alignment=Qt.AlignTop)
         grid_layout.addWidget(drag_container, 2, 2, alignment=Qt.AlignTop)
         self.anchor_button.toggled.connect(self.on_anchor_toggled)
+        # Each reading reaches its tile through a binding, which skips samples that wouldn't change the digits shown.
+        self.bindings = {name: DisplayBinding(channel, setter) for name, channel, setter in (
+            ("depth", "depth", self.depth_widget.setValue), ("trip_distance", "trip_distance", self.trip_dist_widget.setValue),
+            ("trip_time", "trip_time", self.trip_time_widget.setValue), ("wind_speed", "wind_speed", self.wind_speed_widget.setValue),
+            ("wind_dir", "wind_point", self.wind_dir_widget.setValue), ("pressure", "pressure", self.pressure_widget.setValue),
+            ("heading", "heading", self.heading_widget.setValue), ("position", "position", self.show_position),
+            ("drag", "drag", self.drag_widget.setValue))}
         
-        dashboard_layout.addWidget(self.drift_alarm_banner)
+        dashboard_layout.addWidget(self.alarm_banner)
         dashboard_layout.addWidget(grid_widget)
 
 
@@ -298,6 +318,56 @@ class DashboardUI(QWidget):
         log_layout.addLayout(button_layout)
 
 
+    def _setup_debug_panel(self):
+        debug_layout = QVBoxLayout(self.debug_tab)
+        debug_layout.setContentsMargins(20, 20, 20, 20)
+        debug_header = QLabel("Latency (CAN frame to image)")
+        debug_header.setStyleSheet("font-family: Oxanium; font-size: 24px; font-weight: bold; padding-bottom: 10px; color: #BDC1C6;")
+        controls = QHBoxLayout()
+        self.trace_toggle = QCheckBox("Trace latency")
+        self.trace_toggle.setStyleSheet("font-family: Oxanium; font-size: 18px;")
+        self.trace_toggle.setChecked(tracer.enabled)
+        self.trace_toggle.toggled.connect(tracer.set_enabled)
+        reset_button = QPushButton("Reset")
+        reset_button.setStyleSheet("font-family: Oxanium; font-size: 18px; font-weight: bold; background-color: #282828; border: none; padding: 10px; border-radius: 8px;")
+        reset_button.clicked.connect(tracer.reset)
+        controls.addWidget(self.trace_toggle); controls.addWidget(reset_button); controls.addStretch()
+
+        self.latency_table = QTableWidget(len(STAGES), 7)
+        self.latency_table.setHorizontalHeaderLabels(["Stage", "Count", "Avg ms", "p50 ms", "p95 ms", "p99 ms", "Max ms"])
+        self.latency_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.latency_table.verticalHeader().setVisible(False)
+        self.latency_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.latency_table.setShowGrid(False)
+        self.latency_table.setStyleSheet("QTableWidget { font-size: 16px; border: none; } QHeaderView::section { background-color: #1e1e1e; border: none; font-size: 14px; font-weight: bold; padding: 5px; }")
+        for row, stage in enumerate(STAGES): self.latency_table.setItem(row, 0, QTableWidgetItem(stage))
+
+        display_header = QLabel("Display updates")
+        display_header.setStyleSheet(debug_header.styleSheet())
+        self.display_table = QTableWidget(0, 4)
+        self.display_table.setHorizontalHeaderLabels(["Channel", "Samples", "Skipped", "Skip %"])
+        self.display_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.display_table.verticalHeader().setVisible(False)
+        self.display_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.display_table.setShowGrid(False)
+        self.display_table.setStyleSheet(self.latency_table.styleSheet())
+
+        debug_layout.addWidget(debug_header); debug_layout.addLayout(controls); debug_layout.addWidget(self.latency_table)
+        debug_layout.addWidget(display_header); debug_layout.addWidget(self.display_table)
+        # Only refreshed while the Debug tab is showing.
+        self.latency_timer = QTimer(self); self.latency_timer.timeout.connect(self.update_latency_table)
+
+    def update_latency_table(self):
+        summary = tracer.summary()
+        for row, stage in enumerate(STAGES):
+            values = summary.get(stage)
+            cells = [str(values['count'])] + [f"{values[key]:.2f}" for key in ('avg_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')] if values else ["0"] + ["-"] * 5
+            for column, text in enumerate(cells, start=1): self.latency_table.setItem(row, column, QTableWidgetItem(text))
+        ratios = skip_ratios()
+        self.display_table.setRowCount(len(ratios))
+        for row, (channel, (samples, skipped, ratio)) in enumerate(ratios.items()):
+            for column, text in enumerate((channel, str(samples), str(skipped), f"{ratio * 100:.1f}")): self.display_table.setItem(row, column, QTableWidgetItem(text))
+
     def _setup_settings_panel(self):
         main_settings_layout=QGridLayout(self.settings_tab)
         main_settings_layout.setContentsMargins(20, 20, 20, 20)
@@ -316,8 +386,7 @@ class DashboardUI(QWidget):
         race_courses_layout=QVBoxLayout()
         self.race_courses_label=QLabel("Race Courses")
         self.race_courses_label.setStyleSheet(header_style)
-        self.race_courses_list=QListWidget()
-        self.populate_race_courses()
+        self.race_courses_list=QListWidget() # Filled by load_deferred
 
         list_stylesheet="QListWidget{font-size:18px;font-family:Oxanium;border:none;}QListWidget::item{padding:15px;margin-bottom:5px;}QListWidget::item:selected{background-color:#ffffff;color:#252525;border-radius:8px;}"
         self.ui_config_list.setStyleSheet(list_stylesheet); self.race_courses_list.setStyleSheet(list_stylesheet)
@@ -385,6 +454,18 @@ class DashboardUI(QWidget):
         self.theme_checkbox.stateChanged.connect(self.on_theme_toggled); discoverable_button.clicked.connect(self.discoverable_clicked.emit); exit_button.clicked.connect(self.exit_app_clicked.emit)
         self.on_ui_config_changed(self.ui_config_list.currentItem())
 
+    def load_deferred(self):
+        """What the helm doesn't need in the first second: the race course list."""
+        if not self.race_courses_list.count(): self.populate_race_courses()
+
+    @Slot(int)
+    def on_tab_changed(self, index):
+        tab = self.tabs.widget(index)
+        if tab is self.log_tab and self.log_table is None:
+            self._setup_log_panel(); self.populate_log_table(self._pending_trips)
+        if tab is self.debug_tab: self.latency_timer.start(1000)
+        else: self.latency_timer.stop()
+
     def populate_race_courses(self):
         races_dir="races"; base_path=os.path.dirname(os.path.abspath(__file__)); full_races_dir=os.path.join(base_path,races_dir)
         if os.path.isdir(full_races_dir):
@@ -432,53 +513,69 @@ class DashboardUI(QWidget):
     @Slot(int)
     def on_theme_toggled(self,state): self.theme_changed.emit(bool(state))
     @Slot(float)
-    def update_depth_display(self,depth_m): self.depth_widget.value_label.setText(f"{depth_m*3.28084:.1f}")
+    def update_depth_display(self,depth_m): self.bindings["depth"](depth_m)
     @Slot(float,float)
     def update_trip_display(self,dist_m,time_s):
-        self.trip_dist_widget.value_label.setText(f"{dist_m/1609.34:.1f}"); h,rem=divmod(time_s,3600); m,_=divmod(rem,60)
-        self.trip_time_widget.value_label.setText(f"{int(h):02}:{int(m):02}")
+        self.bindings["trip_distance"](dist_m); self.bindings["trip_time"](time_s)
     @Slot(float,float,str)
     def update_wind_display(self,speed_mps,angle_rad,ref):
-        dirs=["N","NE","E","SE","S","SW","W","NW"]; angle_deg=math.degrees(angle_rad); idx=round(angle_deg/45)%8
-        self.wind_dir_widget.setValueText(dirs[idx]); self.wind_dir_widget.setArrowAngle(angle_deg); speed_knots=speed_mps*1.94384
-        self.wind_speed_widget.value_label.setText(f"{speed_knots:.0f}"); self.wind_history.append((time.time(),speed_knots))
+        if ref!="Apparent": return
+        self.bindings["wind_speed"](speed_mps)
+    @Slot(float,float,float)
+    def update_true_wind_display(self,speed_mps,angle_rad,direction_rad):
+        self.bindings["wind_dir"](direction_rad); self.wind_dir_widget.setArrowAngle(math.degrees(direction_rad))
     @Slot(float)
-    def update_pressure_display(self,pressure_pa):
-        self.pressure_widget.value_label.setText(f"{pressure_pa:.0f}"); self.pressure_history.append((time.time(),pressure_pa))
+    def update_pressure_display(self,pressure_pa): self.bindings["pressure"](pressure_pa)
+    @Slot(dict)
+    def update_barometer_display(self, barometer):
+        """24 h of 10-minute means as a sparkline, the 3-hour tendency in words, and any rate-of-fall alert in red."""
+        self.pressure_widget.sparkline.setPoints(barometer['sparkline'])
+        tendency = barometer['tendency'] or {}; alert = barometer['alert']
+        text = "Pascal"
+        if tendency.get('description'): text += f" · {tendency['description']} ({tendency['change_pa'] / 100:+.1f} hPa/3h)"
+        if alert: text = f"Pascal · {alert.upper()}"
+        self.pressure_widget.setUnit(text, "#F28B82" if alert else None)
     @Slot(float)
     def update_heading_display(self,heading_deg):
-        self.heading_widget.setValueText(f"{heading_deg:.0f}"); self.heading_widget.setArrowAngle(heading_deg)
-    @Slot(float,float)
-    def update_position_display(self,lat_rad,lon_rad):
-        self.current_pos_rad=(lat_rad,lon_rad)
-        self.position_widget.value_label.setText(f"{math.degrees(lat_rad):.4f}°    {math.degrees(lon_rad):.4f}°"); self.position_widget.unit_label.setText("Latitude / Longitude")
-        if self.anchor_pos_rad:
-            dist_m=haversine_distance(self.anchor_pos_rad[0],self.anchor_pos_rad[1],lat_rad,lon_rad)
-            self.drag_widget.value_label.setText(f"{dist_m*3.28084:.1f}")
-            if dist_m > 22.86: # 75 feet in meters
-                self.anchor_drift_alarm.emit(True)
-            else:
-                self.anchor_drift_alarm.emit(False)
+        self.bindings["heading"](heading_deg); self.heading_widget.setArrowAngle(heading_deg)
+    @Slot(float,float,float)
+    def update_position_display(self,lat_rad,lon_rad,fix_time=None):
+        self.bindings["position"](lat_rad,lon_rad)
+    @Slot(float)
+    def update_anchor_distance(self,dist_m): self.bindings["drag"](dist_m)
 
-    @Slot(bool)
-    def on_anchor_toggled(self,checked):
-        self.anchor_pos_rad=self.current_pos_rad if checked else None
-        if not checked:
-            self.drag_widget.value_label.setText("N/A")
-            self.anchor_button.setText("Set")
-            self.anchor_drift_alarm.emit(False)
-        else:
-            self.anchor_button.setText("Unset")
+    def show_position(self,text):
+        self.position_widget.setValue(text); self.position_widget.setUnit("Latitude / Longitude")
 
-    def update_trends(self):
-        if len(self.wind_history)>1:
-            diff=self.wind_history[-1][1]-self.wind_history[0][1]
-            self.wind_speed_widget.trend_label.setText(f"{'▲' if diff > 0 else '▼'} {abs(diff):.1f}*")
-        if len(self.pressure_history)>1:
-            diff=self.pressure_history[-1][1]-self.pressure_history[0][1]
-            self.pressure_widget.trend_label.setText(f"{'▲' if diff > 0 else '▼'} {abs(diff):.0f}*")
+    @Slot(bool)
+    def on_anchor_toggled(self,checked): self.anchor_watch_toggled.emit(checked)
+
+    @Slot(dict)
+    def update_anchor_watch(self,watch):
+        """AnchorWatch.snapshot() on set, clear and each holding/dragging transition (also once at startup, for a restored watch)."""
+        watching=watch['state']!=OFF
+        self.anchor_button.blockSignals(True); self.anchor_button.setChecked(watching); self.anchor_button.blockSignals(False)
+        self.anchor_button.setText("Unset" if watching else "Set")
+        if not watching: self.bindings["drag"].reset("N/A")
+
+    @Slot(list)
+    def update_alarms(self,alarms):
+        """The AlarmManager's raised alarms, unacknowledged and most severe first. Only shows them: the sound is the manager's."""
+        if not alarms: self.alarm_banner.hide(); return
+        top=alarms[0]; text=top['message']+(f"  (+{len(alarms)-1})" if len(alarms)>1 else "")
+        colour="#9AA0A6" if top['acknowledged'] else "#F28B82" if top['severity']==ALARM else "#FDD663"
+        self.alarm_label.setText(text); self.dismiss_button.setVisible(not top['acknowledged'])
+        self.alarm_banner.setStyleSheet(f"background-color: {colour}; padding: 10px; border-radius: 8px;")
+        self.alarm_banner.show(); self.alarm_banner.raise_()
+
+    @Slot(dict)
+    def update_trend_display(self, trends):
+        """Regression trend from the reader's TrendEngine: knots over 5 minutes, Pa over 3 hours."""
+        if 'wind' in trends: self.wind_speed_widget.setTrend(trend_text(trends['wind']['change_per_window'], 0.5))
+        if 'pressure' in trends: self.pressure_widget.setTrend(trend_text(trends['pressure']['change_per_window'], 10, decimals=0))
 
     def populate_log_table(self, trips):
+        if self.log_table is None: self._pending_trips = trips; return
         self.log_table.setRowCount(0) # Clear the table first
         sorted_trips = sorted(trips, key=lambda x: x['start_time'], reverse=True)
         self.log_table.setRowCount(len(sorted_trips))
@@ -549,19 +646,5 @@ class DashboardUI(QWidget):
             if ok:
                 self.set_people_requested.emit(trip_id, num_people)
 
-    @Slot(bool)
-    def on_anchor_drift_alarm(self, is_drifting):
-        if is_drifting:
-            self.drift_alarm_banner.show()
-            self.drift_alarm_banner.raise_()
-            if self.alarm_sound.source().isEmpty() or not os.path.exists(self.alarm_sound.source().toLocalFile()):
-                print("Alarm sound file not found.")
-                return
-            if not self.alarm_sound.isPlaying():
-                self.alarm_sound.play()
-        else:
-            self.drift_alarm_banner.hide()
-            self.alarm_sound.stop()
-            
     def on_dismiss_alarm(self):
-        self.anchor_button.setChecked(False)
\ No newline at end of file
+        self.alarm_acknowledged.emit()
\ No newline at end of file
@@ -0,0 +1,217 @@
+# data_sources.py
+import os
+import socket
+import struct
+import time
+from binascii import unhexlify
+from threading import Thread, Event
+from nmea_reader import NMEA2000Parser, CanFrame
+from metrics import FRAMES_DECODED
+
+DEFAULT_SOURCE = "mock"
+SOURCE_ENV = "SAILUI_SOURCE"
+
+class DataSource:
+    """
+    Everything NMEA2000Reader needs from a source: add_callback(pgn, func),
+    start(), stop() and stats(). Frame-based sources push CAN frames through
+    handle_frame(); callbacks are wrapped so every source reports the same
+    message rate and dispatch/latency figures.
+    """
+    name = "source"
+    live = True # Real instruments now; False for mock, sim and replay, whose data mustn't land in persisted history
+
+    def __init__(self):
+        self.parser = NMEA2000Parser()
+        self.frame_sink = None # e.g. CanCapture.record
+        self._frame_time = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.started_at = time.time()
+        self.frames = 0; self.messages = 0; self.errors = 0
+        self._dispatch_total = 0.0; self._dispatch_max = 0.0
+        self._age_total = 0.0; self._age_max = 0.0; self._age_count = 0
+
+    def add_callback(self, pgn, func):
+        self.parser.add_callback(pgn, self._instrument(func))
+
+    def _instrument(self, func):
+        def callback(pgn, data):
+            start = time.perf_counter()
+            func(pgn, data)
+            elapsed = time.perf_counter() - start
+            self.messages += 1; self._dispatch_total += elapsed
+            FRAMES_DECODED.inc(pgn)
+            if elapsed > self._dispatch_max: self._dispatch_max = elapsed
+            if self._frame_time:
+                # Live frames carry the kernel/gateway receive time; this is bus-to-UI-signal latency.
+                age = time.time() - self._frame_time
+                self._age_total += age; self._age_count += 1
+                if age > self._age_max: self._age_max = age
+        return callback
+
+    def handle_frame(self, frame, live=True):
+        self.frames += 1
+        if self.frame_sink: self.frame_sink(frame)
+        self._frame_time = frame.timestamp if live else None
+        try: self.parser.handle_message(frame)
+        except (struct.error, IndexError, ValueError): self.errors += 1
+
+    def stats(self):
+        uptime = max(time.time() - self.started_at, 1e-9)
+        return {
+            'source': self.name, 'frames': self.frames, 'messages': self.messages, 'errors': self.errors,
+            'messages_per_s': self.messages / uptime,
+            'dispatch_avg_us': self._dispatch_total / self.messages * 1e6 if self.messages else None,
+            'dispatch_max_us': self._dispatch_max * 1e6 if self.messages else None,
+            'latency_avg_ms': self._age_total / self._age_count * 1e3 if self._age_count else None,
+            'latency_max_ms': self._age_max * 1e3 if self._age_count else None
+        }
+
+    def start(self): self.reset_stats()
+    def stop(self): pass
+
+class WrappedSource(DataSource):
+    """Adapts the existing MockNMEA2000-style sources (mock, simulator, replay) to DataSource stats."""
+    live = False
+
+    def __init__(self, inner, name):
+        super().__init__()
+        self.inner = inner; self.name = name
+
+    def add_callback(self, pgn, func):
+        self.inner.add_callback(pgn, self._instrument(func))
+
+    def __setattr__(self, key, value):
+        super().__setattr__(key, value)
+        if key == 'frame_sink' and hasattr(self, 'inner') and hasattr(self.inner, 'frame_sink'): self.inner.frame_sink = value
+
+    def start(self):
+        super().start(); self.inner.start()
+
+    def stop(self):
+        self.inner.stop()
+
+    def stats(self):
+        stats = super().stats()
+        if hasattr(self.inner, 'stats'): stats.update({f"{self.name}_{key}": value for key, value in self.inner.stats().items()})
+        return stats
+
+class SocketCanSource(DataSource):
+    """Live bus through python-can, which is only imported when this source starts. See also socketcan_source."""
+    name = "python-can"
+
+    def __init__(self, channel='can0', interface='socketcan'):
+        super().__init__()
+        self.channel = channel; self.interface = interface
+        self.bus = None; self.notifier = None
+
+    def start(self):
+        import can
+        super().start()
+        self.bus = can.interface.Bus(channel=self.channel, interface=self.interface)
+        self.notifier = can.Notifier(self.bus, [self.handle_frame])
+
+    def stop(self):
+        if self.notifier: self.notifier.stop()
+        if self.bus: self.bus.shutdown()
+        self.notifier = None; self.bus = None
+
+class GatewaySource(DataSource):
+    """
+    NMEA 2000 WiFi/Ethernet gateways in RAW mode (Yacht Devices and compatible):
+    one frame per line, `17:33:21.107 R 19F51323 01 2F 30 70 00 2F 30 70`, over TCP or UDP.
+    Frames are stamped with the local receive time.
+    """
+    def __init__(self, protocol, host, port, reconnect_s=5.0):
+        super().__init__()
+        self.protocol = protocol; self.host = host; self.port = port
+        self.reconnect_s = reconnect_s
+        self.name = f"{protocol}-gateway"
+        self._stop_event = Event(); self._thread = None; self._sock = None
+
+    def start(self):
+        super().start()
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._sock:
+            try: self._sock.close()
+            except OSError: pass
+        if self._thread: self._thread.join(timeout=2)
+
+    def _open(self):
+        if self.protocol == 'udp':
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.host or '', self.port))
+        else:
+            sock = socket.create_connection((self.host, self.port), timeout=self.reconnect_s)
+        sock.settimeout(1.0)
+        return sock
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._sock = self._open()
+                pending = b''
+                while not self._stop_event.is_set():
+                    try: data = self._sock.recv(65536)
+                    except socket.timeout: continue
+                    if not data and self.protocol == 'tcp': break
+                    lines = (pending + data).split(b'\n')
+                    pending = lines.pop()
+                    for line in lines: self.handle_line(line)
+            except OSError as e:
+                if not self._stop_event.is_set(): print(f"Gateway {self.host}:{self.port} unavailable: {e}")
+            finally:
+                if self._sock: self._sock.close()
+            self._stop_event.wait(self.reconnect_s)
+
+    def handle_line(self, line):
+        parts = line.split()
+        if len(parts) < 3 or parts[1] not in (b'R', b'T'): return
+        try: self.handle_frame(CanFrame(int(parts[2], 16), unhexlify(b''.join(parts[3:11])), time.time()))
+        except ValueError: self.errors += 1
+
+def make_source(spec, speed=1.0):
+    """
+    Builds a source from a spec string, importing its backend only now:
+      mock | sim[:scenario] | replay:<log> | socketcan[:channel] | python-can[:channel] |
+      tcp:<host>:<port> | udp:[<host>:]<port>
+    """
+    kind, _, rest = spec.partition(':')
+    if kind == 'mock':
+        from mock_nmea_data import MockNMEA2000
+        return WrappedSource(MockNMEA2000(), 'mock')
+    if kind == 'sim':
+        from nmea_simulator import NMEASimulator
+        return WrappedSource(NMEASimulator(scenario=rest or "race", encode_frames=True, speed=speed), 'sim')
+    if kind == 'replay':
+        from can_replay import CanLogReplay
+        return WrappedSource(CanLogReplay(rest, speed=speed), 'replay')
+    if kind == 'socketcan':
+        from socketcan_source import RawSocketCanSource
+        return RawSocketCanSource(channel=rest or 'can0')
+    if kind == 'python-can':
+        return SocketCanSource(channel=rest or 'can0')
+    if kind in ('tcp', 'udp'):
+        host, _, port = rest.rpartition(':')
+        return GatewaySource(kind, host, int(port))
+    raise ValueError(f"Unknown data source '{spec}'")
+
+def source_from_args(argv, environ=os.environ):
+    """
+    --source=<spec> (or $SAILUI_SOURCE, default mock), --speed=<factor> for sim/replay,
+    --replay-from=<log timestamp>. --replay=<log> is shorthand for --source=replay:<log>.
+    """
+    options = dict(arg[2:].split('=', 1) for arg in argv if arg.startswith('--') and '=' in arg)
+    spec = options.get('source') or environ.get(SOURCE_ENV) or DEFAULT_SOURCE
+    if 'replay' in options: spec = f"replay:{options['replay']}"
+    source = make_source(spec, speed=float(options.get('speed', options.get('replay-speed', 1))))
+    if 'replay-from' in options and hasattr(getattr(source, 'inner', None), 'seek'): source.inner.seek(float(options['replay-from']))
+    return source
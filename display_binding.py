@@ -0,0 +1,150 @@
+# display_binding.py
+import math
+from metrics import REGISTRY
+
+DISPLAY_UPDATES = REGISTRY.counter("sailui_display_updates_total", "Instrument samples bound to a widget, by channel and result (applied, or skipped as unchanged).",
+                                   ("channel", "result"))
+_COUNTS = DISPLAY_UPDATES.values # Incremented in place: calling inc() would cost more than the rest of a skipped sample
+COMPASS_POINTS = ("N", "NE", "E", "SE", "S", "SW", "W", "NW")
+MPS_TO_KNOTS = 1.94384; M_TO_FT = 3.28084
+
+class Channel:
+    """
+    How one kind of reading is shown: scale from the signal's units to the
+    display's, the step the display resolves (its precision), hysteresis in
+    display units, and format, which gets one quantised value per argument
+    (a format string or a function). period wraps angles; floor quantises
+    down instead of to nearest, for clocks and counters.
+    """
+    __slots__ = ('name', 'scale', 'step', 'hysteresis', 'format', 'period', 'floor', 'placeholder')
+
+    def __init__(self, name, step, hysteresis=0.0, format="{:.0f}", scale=1.0, period=None, floor=False, placeholder="---"):
+        self.name = name; self.step = step; self.hysteresis = hysteresis; self.scale = scale
+        self.format = format.format if isinstance(format, str) else format
+        self.period = period; self.floor = floor; self.placeholder = placeholder
+
+def _clock(seconds): return f"{int(seconds // 3600):02}:{int(seconds % 3600 // 60):02}"
+def _countdown(seconds): return f"{int(seconds // 60)}:{int(seconds % 60):02}"
+
+# Hysteresis is a fraction of a step on top of the half step that rounding already allows, sized to the sensor's
+# noise: enough that a reading sitting on a rounding boundary doesn't flicker between two digits.
+CHANNELS = {channel.name: channel for channel in (
+    Channel("depth", 0.1, 0.03, "{:.1f}", scale=M_TO_FT),
+    Channel("boat_speed", 0.1, 0.03, "{:.1f}"),
+    Channel("wind_speed", 1, 0.2, scale=MPS_TO_KNOTS),
+    Channel("wind_point", 45, 5, lambda d: COMPASS_POINTS[round(d / 45) % 8], scale=180 / math.pi, period=360),
+    Channel("heading", 1, 0.3, period=360),
+    Channel("pressure", 1, 2),
+    Channel("position", 0.0001, 0.00002, "{:.4f}°    {:.4f}°", scale=180 / math.pi),
+    Channel("trip_distance", 0.1, 0, "{:.1f}", scale=1 / 1609.34),
+    Channel("trip_time", 60, 0, _clock, floor=True),
+    Channel("drag", 0.1, 0.05, "{:.1f}", scale=M_TO_FT),
+    Channel("line_distance", 1, 0.3, scale=M_TO_FT),
+    Channel("line_eta", 1, 0, _countdown, floor=True, placeholder="--"), # Not closing on the line
+    Channel("polar_percent", 1, 0.3),
+    Channel("target_twa", 1, 0.3),
+)}
+
+class DisplayBinding:
+    """
+    Binds a channel to one widget's text setter. Calling it with a sample
+    (in the signal's units) does nothing while the sample stays within half
+    a step plus the hysteresis of what the widget shows; otherwise it formats
+    the quantised value and calls the setter only if the string differs from
+    the last one it set. Each call counts as applied or skipped in
+    sailui_display_updates_total.
+    """
+    __slots__ = ('channel', 'setter', 'bounds', 'text', '_band', '_period', '_applied', '_skipped')
+
+    def __init__(self, channel, setter):
+        self.channel = CHANNELS[channel] if isinstance(channel, str) else channel; self.setter = setter
+        self.bounds = None; self.text = None # (low, high) per value around what's shown, in the signal's units
+        self._band = (self.channel.step / 2 + self.channel.hysteresis) / self.channel.scale
+        self._period = self.channel.period / self.channel.scale if self.channel.period else None
+        self._applied = (self.channel.name, "applied"); self._skipped = (self.channel.name, "skipped")
+        for key in (self._applied, self._skipped): _COUNTS.setdefault(key, 0)
+
+    def __call__(self, value, *more):
+        """Returns True if the widget was updated. The common case, one value inside its bounds, is two compares."""
+        bounds = self.bounds
+        if bounds is not None:
+            low, high = bounds[0]
+            if self._period: value = low + (value - low) % self._period # The turn that lands in [low, low + period)
+            if low <= value <= high: # A NaN fails the compare
+                for other, (low, high) in zip(more, bounds[1:]) if more else ():
+                    if self._period: other = low + (other - low) % self._period
+                    if not low <= other <= high: break
+                else:
+                    _COUNTS[self._skipped] += 1
+                    return False
+        return self._render((value,) + more)
+
+    def _render(self, values):
+        channel = self.channel; step = channel.step; scale = channel.scale
+        rounding = math.floor if channel.floor else round
+        try:
+            quantised = [rounding(value * scale / step) * step for value in values]
+        except (ValueError, OverflowError): # NaN or infinite: show the placeholder and take the next real value as new
+            self.bounds = None; text = channel.placeholder
+        else:
+            if channel.period: quantised = [q % channel.period for q in quantised]
+            text = channel.format(*quantised)
+            offset = step / 2 if channel.floor else 0 # floor's interval starts at the quantised value
+            band = self._band
+            self.bounds = [((q + offset) / scale - band, (q + offset) / scale + band) for q in quantised]
+        if text == self.text:
+            _COUNTS[self._skipped] += 1
+            return False
+        self.text = text; self.setter(text)
+        _COUNTS[self._applied] += 1
+        return True
+
+    def reset(self, text=None):
+        """Shows text (default: the channel's placeholder) and forgets the last value, so the next sample is drawn."""
+        self.bounds = None; self.text = self.channel.placeholder if text is None else text
+        self.setter(self.text)
+
+def skip_ratios():
+    """{channel: (samples, skipped, ratio)} for every channel that has had a sample, plus "all"."""
+    totals = {}
+    for (channel, result), count in list(_COUNTS.items()):
+        counts = totals.setdefault(channel, [0, 0]); counts[0] += count
+        if result == "skipped": counts[1] += count
+    if totals: totals["all"] = [sum(c[0] for c in totals.values()), sum(c[1] for c in totals.values())]
+    return {channel: (samples, skipped, skipped / samples) for channel, (samples, skipped) in totals.items() if samples}
+
+REGISTRY.gauge("sailui_display_skip_ratio", "Fraction of bound instrument samples that left the display unchanged.").set_function(
+    lambda: skip_ratios().get("all", (0, 0, None))[2])
+
+if __name__ == "__main__":
+    # A noisy depth hovering on a rounding boundary, a heading across north, and a NaN.
+    import random, time
+    rng = random.Random(3); shown = []
+    depth = DisplayBinding("depth", shown.append)
+    samples = [(3.05 + rng.uniform(-0.02, 0.02)) / M_TO_FT for i in range(1000)]
+    for sample in samples: depth(sample)
+    texts = [f"{sample * M_TO_FT:.1f}" for sample in samples]; flips = 1 + sum(a != b for a, b in zip(texts, texts[1:]))
+    print(f"depth on a boundary: {len(shown)} setText calls for 1000 samples ({flips} without hysteresis): {shown}")
+    assert len(shown) == 1
+    shown.clear(); heading = DisplayBinding("heading", shown.append)
+    for h in (359.2, 359.6, 0.1, 0.4, 359.9, 1.2): heading(h)
+    print(f"heading: {shown}"); assert shown == ["359", "0", "1"]
+    shown.clear(); clock = DisplayBinding("trip_time", shown.append)
+    for s in range(0, 7300, 1): clock(s)
+    assert shown[:2] == ["00:00", "00:01"] and shown[-1] == "02:01" and len(shown) == 122
+    shown.clear(); speed = DisplayBinding("boat_speed", shown.append)
+    for v in (5.0, float('nan'), 5.0): speed(v)
+    assert shown == ["5.0", "---", "5.0"]
+    # GPS jitter well under 0.0001°, against what the slot did before: format both, then the tile compared strings
+    lat, lon = math.radians(47.6), math.radians(-122.3); n = 100000
+    fixes = [(lat + rng.gauss(0, 2e-10), lon + rng.gauss(0, 2e-10)) for i in range(n)]
+    position = DisplayBinding("position", shown.append); start = time.perf_counter()
+    for fix in fixes: position(*fix)
+    skip_us = (time.perf_counter() - start) / n * 1e6; last = None; start = time.perf_counter()
+    for a, b in fixes:
+        text = f"{math.degrees(a):.4f}°    {math.degrees(b):.4f}°"
+        if text != last: last = text
+    format_us = (time.perf_counter() - start) / n * 1e6
+    print(f"position: {skip_us:.2f} us per bound sample vs {format_us:.2f} us formatting; ratios {skip_ratios()}")
+    assert skip_ratios()["position"][2] > 0.99
+    print("OK")
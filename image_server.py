@@ -1,19 +1,34 @@
 # image_server.py
-from flask import Flask, send_file
+from flask import Flask, send_file, Response, request
 from threading import Thread
 import io
+from metrics import HTTP_REQUESTS
 
-def create_image_server(shared_image_obj):
+def create_image_server(shared_image_obj, metrics_text=None):
     app = Flask(__name__)
     
     @app.route('/image.bmp')
     def get_image():
-        image_bytes = shared_image_obj.get_image_bytes()
+        image_bytes, etag = shared_image_obj.get_image()
         if image_bytes:
-            return send_file(io.BytesIO(image_bytes), mimetype='image/bmp')
+            if etag in request.if_none_match: return Response(status=304, headers={'ETag': f'"{etag}"'})
+            response = send_file(io.BytesIO(image_bytes), mimetype='image/bmp')
+            response.set_etag(etag)
+            return response
         else:
             return "No image available", 404
-            
+
+    @app.route('/metrics')
+    def get_metrics():
+        # Prometheus text format (metrics.REGISTRY.exposition); a callable so the numbers are read at scrape time.
+        if metrics_text is None: return "Metrics not enabled", 404
+        return Response(metrics_text(), mimetype='text/plain; version=0.0.4')
+
+    @app.after_request
+    def count_request(response):
+        HTTP_REQUESTS.inc(request.path, response.status_code)
+        return response
+
     return app
 
 def run_server(app):
@@ -0,0 +1,29 @@
+# instrument_store.py
+import time
+
+class InstrumentStore:
+    """
+    The latest value of each instrument channel with the (monotonic) time it
+    arrived. The reader thread writes, anything may read: set() is a single
+    dict assignment of a (value, time) tuple, which the GIL makes atomic, so
+    a reader needs no lock and never pairs one sample's value with another's
+    time. Channels: depth_m, aws_mps, tws_mps, position (lat, lon degrees),
+    anchor_state.
+    """
+    def __init__(self):
+        self.values = {}
+
+    def set(self, channel, value, now=None):
+        self.values[channel] = (value, time.monotonic() if now is None else now)
+
+    def get(self, channel, max_age_s=None, now=None):
+        """The value, or None if there isn't one (or it's older than max_age_s)."""
+        entry = self.values.get(channel)
+        if entry is None: return None
+        if max_age_s is not None and (time.monotonic() if now is None else now) - entry[1] > max_age_s: return None
+        return entry[0]
+
+    def age(self, channel, now=None):
+        """Seconds since the channel was last set, or None if it never was."""
+        entry = self.values.get(channel)
+        return None if entry is None else (time.monotonic() if now is None else now) - entry[1]
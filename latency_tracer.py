@@ -0,0 +1,134 @@
+# latency_tracer.py
+import bisect
+from array import array
+from collections import deque
+from threading import Lock
+from time import perf_counter
+
+# Every stage is measured from the frame's ingest, which is the time origin rather than a stage of its own.
+DECODE, DISPATCH, UI_APPLY, RENDER, PUBLISH = range(5)
+STAGES = ("decode", "dispatch", "ui_apply", "render", "publish")
+# Upper bucket bounds in seconds (1-2-5 steps from 10 us to 10 s); the last bucket is +Inf.
+BUCKET_BOUNDS = tuple(m * 10.0 ** e for e in range(-5, 1) for m in (1, 2, 5)) + (10.0,)
+
+class StageHistogram:
+    """Fixed-size latency histogram: one array of bucket counts plus count/sum/max."""
+    __slots__ = ('counts', 'count', 'total', 'maximum')
+
+    def __init__(self):
+        self.counts = array('Q', [0] * (len(BUCKET_BOUNDS) + 1))
+        self.reset()
+
+    def reset(self):
+        for i in range(len(self.counts)): self.counts[i] = 0
+        self.count = 0; self.total = 0.0; self.maximum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1; self.total += seconds
+        if seconds > self.maximum: self.maximum = seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile, capped at the largest sample."""
+        if not self.count: return None
+        target = q * self.count; running = 0
+        for i, bucket in enumerate(self.counts):
+            running += bucket
+            if running >= target: return min(BUCKET_BOUNDS[i], self.maximum) if i < len(BUCKET_BOUNDS) else self.maximum
+        return self.maximum
+
+class LatencyTracer:
+    """
+    Follows values from CAN frame to e-ink pixel. Every stage is timed from
+    the frame's ingest (perf_counter, monotonic): decode and dispatch on the
+    reader thread, ui_apply when the queued Qt slot runs, and render/publish
+    as the age of the newest applied value when the SailUI image is drawn
+    and handed to the image server.
+
+    Call sites check `tracer.enabled` first, so a disabled tracer costs one
+    attribute lookup per hook.
+    """
+    def __init__(self, max_in_flight=256):
+        self.enabled = False
+        self.histograms = [StageHistogram() for _ in STAGES]
+        self.current_ingest = None # Set by the decoder on the reader thread, read by its handler
+        self._in_flight = {}       # channel -> ingest times of dispatched values, in signal order
+        self._applied = {}         # channel -> ingest time of the value now on screen
+        self._render_ingest = {}
+        self._max_in_flight = max_in_flight
+        self._lock = Lock()
+
+    def set_enabled(self, enabled):
+        with self._lock:
+            self.enabled = bool(enabled)
+            self._in_flight.clear(); self._applied.clear(); self._render_ingest.clear()
+            self.current_ingest = None
+
+    def reset(self):
+        with self._lock:
+            for histogram in self.histograms: histogram.reset()
+
+    def stage(self, stage, ingest):
+        elapsed = perf_counter() - ingest
+        with self._lock: self.histograms[stage].observe(elapsed)
+
+    # --- Reader thread ---
+    def ingest(self):
+        self.current_ingest = perf_counter()
+        return self.current_ingest
+
+    def dispatch(self, channel):
+        """The handler is about to emit: remember this value's ingest time until the UI applies it."""
+        ingest = self.current_ingest
+        if ingest is None: return
+        self.stage(DISPATCH, ingest)
+        with self._lock:
+            queue = self._in_flight.get(channel)
+            if queue is None: queue = self._in_flight[channel] = deque(maxlen=self._max_in_flight)
+            queue.append(ingest)
+
+    # --- UI thread ---
+    def ui_apply(self, channel):
+        with self._lock:
+            queue = self._in_flight.get(channel)
+            if not queue: return
+            ingest = queue.popleft()
+            self._applied[channel] = ingest
+        self.stage(UI_APPLY, ingest)
+
+    def render(self):
+        with self._lock: self._render_ingest = dict(self._applied)
+        for ingest in self._render_ingest.values(): self.stage(RENDER, ingest)
+
+    def publish(self):
+        for ingest in self._render_ingest.values(): self.stage(PUBLISH, ingest)
+
+    def summary(self):
+        """{stage: {count, avg_ms, p50_ms, p95_ms, p99_ms, max_ms}} for stages that have samples."""
+        result = {}
+        with self._lock:
+            for name, histogram in zip(STAGES, self.histograms):
+                if not histogram.count: continue
+                ms = lambda value: None if value is None else value * 1e3
+                result[name] = {'count': histogram.count, 'avg_ms': histogram.total / histogram.count * 1e3,
+                                'p50_ms': ms(histogram.quantile(0.5)), 'p95_ms': ms(histogram.quantile(0.95)),
+                                'p99_ms': ms(histogram.quantile(0.99)), 'max_ms': histogram.maximum * 1e3}
+        return result
+
+    def prometheus(self):
+        """Histograms in the Prometheus text exposition format."""
+        lines = ["# HELP sailui_latency_seconds Time from CAN frame ingest to each pipeline stage.",
+                 "# TYPE sailui_latency_seconds histogram"]
+        with self._lock:
+            for name, histogram in zip(STAGES, self.histograms):
+                cumulative = 0
+                for bound, bucket in zip(BUCKET_BOUNDS + (float('inf'),), histogram.counts):
+                    cumulative += bucket
+                    le = "+Inf" if bound == float('inf') else f"{bound:g}"
+                    lines.append(f'sailui_latency_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'sailui_latency_seconds_sum{{stage="{name}"}} {histogram.total:.9f}')
+                lines.append(f'sailui_latency_seconds_count{{stage="{name}"}} {histogram.count}')
+        lines.append(f"sailui_latency_tracing_enabled {int(self.enabled)}")
+        return "\n".join(lines) + "\n"
+
+tracer = LatencyTracer()
@@ -0,0 +1,91 @@
+# laylines.py
+import math
+from spatial_index import LocalProjection
+
+DEFAULT_UPWIND_TWA = 45.0
+DEFAULT_DOWNWIND_TWA = 150.0
+
+def angle_diff(a_deg, b_deg):
+    return (a_deg - b_deg + 180) % 360 - 180
+
+class LaylineModel:
+    """
+    Port/starboard laylines to a mark from the true wind direction and the
+    polar target angles. The layline geometry is only rebuilt when the mark,
+    the leg type or the target angle changes, or the wind shifts by more than
+    shift_threshold_deg; the per-fix work is a 2x2 solve for time on each tack.
+    """
+    def __init__(self, polar=None, shift_threshold_deg=3.0, length_m=1500.0):
+        self.polar = polar
+        self.shift_threshold_deg = shift_threshold_deg
+        self.length_m = length_m
+        self.clear()
+
+    def clear(self):
+        self.mark = None; self.projection = None
+        self.twd_deg = None; self.tws_kts = None
+        self.lines = None; self.target_speed_kts = None; self.tack_angle_deg = None; self.upwind = True
+        self._key = None; self._built_twd = None
+        self.rebuilds = 0
+
+    def set_mark(self, mark_key, lat, lon):
+        mark = (mark_key, float(lat), float(lon)) # The position too: a new course starts again at mark 0
+        if mark == self.mark: return
+        self.mark = mark; self.projection = LocalProjection(lat, lon)
+
+    def set_wind(self, twd_deg, tws_kts):
+        self.twd_deg = twd_deg; self.tws_kts = tws_kts
+
+    def _targets(self, upwind):
+        if self.polar and self.tws_kts:
+            optimum = self.polar.optimal_angles(self.tws_kts)
+            if upwind: return optimum['upwind_twa'], optimum['upwind_speed']
+            return optimum['downwind_twa'], optimum['downwind_speed']
+        return (DEFAULT_UPWIND_TWA if upwind else DEFAULT_DOWNWIND_TWA), None
+
+    def _tack_headings(self):
+        # Starboard tack has the wind over the starboard side: heading = TWD - TWA.
+        return (self.twd_deg + self.tack_angle_deg) % 360, (self.twd_deg - self.tack_angle_deg) % 360
+
+    def update(self, boat_lat=None, boat_lon=None):
+        """Rebuilds layline geometry if needed. Returns True when it changed."""
+        if not self.mark or self.twd_deg is None:
+            changed = self.lines is not None; self.lines = None; self._key = None
+            return changed
+        if boat_lat is not None:
+            bx, by = self.projection.to_xy(boat_lat, boat_lon)
+            bearing_to_mark = math.degrees(math.atan2(-bx, -by)) % 360
+            self.upwind = abs(angle_diff(bearing_to_mark, self.twd_deg)) < 90
+        tack_angle, target_speed = self._targets(self.upwind)
+        key = (self.mark, self.upwind, tack_angle)
+        if key == self._key and abs(angle_diff(self.twd_deg, self._built_twd)) < self.shift_threshold_deg:
+            return False
+        self.tack_angle_deg = tack_angle; self.target_speed_kts = target_speed
+        self._key = key; self._built_twd = self.twd_deg
+        lines = {}
+        for name, heading in zip(("port", "starboard"), self._tack_headings()):
+            # The layline is the track that arrives at the mark on this tack, drawn back from the mark.
+            h = math.radians(heading)
+            end_lat, end_lon = self.projection.to_latlon(-self.length_m * math.sin(h), -self.length_m * math.cos(h))
+            lines[name] = ((self.mark[1], self.mark[2]), (end_lat, end_lon))
+        self.lines = lines; self.rebuilds += 1
+        return True
+
+    def time_on_tacks(self, boat_lat, boat_lon, boat_speed_kts=0.0):
+        """
+        Splits the run to the mark into a port and a starboard leg and returns
+        {'port': s, 'starboard': s}. A negative leg means that layline is
+        already overstood; None means no speed estimate.
+        """
+        if not self.lines: return None
+        speed_kts = self.target_speed_kts or boat_speed_kts
+        if not speed_kts or speed_kts <= 0: return None
+        bx, by = self.projection.to_xy(boat_lat, boat_lon)
+        dx, dy = -bx, -by
+        port_h, stbd_h = (math.radians(h) for h in self._tack_headings())
+        px, py = math.sin(port_h), math.cos(port_h); sx, sy = math.sin(stbd_h), math.cos(stbd_h)
+        det = px * sy - py * sx
+        if abs(det) < 1e-9: return None
+        port_m = (dx * sy - dy * sx) / det; stbd_m = (px * dy - py * dx) / det
+        speed_mps = speed_kts * 0.514444
+        return {'port': port_m / speed_mps, 'starboard': stbd_m / speed_mps}
@@ -0,0 +1,78 @@
+# line_crossing.py
+import math
+from spatial_index import LocalProjection
+
+class LineCrossingDetector:
+    """
+    Incremental start/finish line tracker. Each fix is projected into metres
+    around the line midpoint and the segment between consecutive fixes is
+    intersected with the line, giving an interpolated crossing time.
+
+    The course side is left of start pin -> end pin (positive side_m) unless
+    set_course_side() says otherwise; each crossing records whether it went
+    onto the course side, which is what makes it a start.
+    """
+    def __init__(self, start_lat, start_lon, end_lat, end_lon):
+        self.projection = LocalProjection((start_lat + end_lat) / 2, (start_lon + end_lon) / 2)
+        self.ax, self.ay = self.projection.to_xy(start_lat, start_lon)
+        bx, by = self.projection.to_xy(end_lat, end_lon)
+        self.length_m = math.hypot(bx - self.ax, by - self.ay)
+        # Unit vector along the line, start pin -> end pin.
+        self.ux = (bx - self.ax) / self.length_m if self.length_m else 1.0
+        self.uy = (by - self.ay) / self.length_m if self.length_m else 0.0
+        self.course_sign = 1
+        self.reset()
+
+    def side_of(self, lat, lon):
+        """Signed perpendicular distance in metres, positive left of start pin -> end pin."""
+        x, y = self.projection.to_xy(lat, lon)
+        return self.ux * (y - self.ay) - self.uy * (x - self.ax)
+
+    def set_course_side(self, lat, lon):
+        """The side the given point (normally the first mark) is on is the course side; the other is pre-start."""
+        self.course_sign = -1 if self.side_of(lat, lon) < 0 else 1
+
+    def reset(self):
+        self.last_time = None; self.last_side = None; self.last_along = None
+        self.crossings = []
+
+    def update(self, lat, lon, timestamp, velocity=None):
+        """
+        Returns a dict with 'distance_m' (to the line segment), 'side_m' (signed
+        perpendicular distance), 'closing_speed_mps', 'time_to_line_s' and
+        'crossing' (None unless the line was crossed since the previous fix).
+
+        velocity is (east, north) m/s, MotionEstimator's fit over several
+        seconds of fixes: differencing two raw fixes at 10 Hz turns metres of
+        GPS noise into a time to line that jumps about. Without it, or while
+        the boat isn't closing on the line, closing speed and time are None.
+        """
+        x, y = self.projection.to_xy(lat, lon)
+        dx, dy = x - self.ax, y - self.ay
+        along = dx * self.ux + dy * self.uy
+        side = self.ux * dy - self.uy * dx
+        clamped = min(max(along, 0.0), self.length_m)
+        distance_m = math.hypot(dx - clamped * self.ux, dy - clamped * self.uy)
+
+        closing_speed = None; time_to_line = None; crossing = None
+        if velocity is not None and not math.isnan(velocity[0]):
+            side_rate = self.ux * velocity[1] - self.uy * velocity[0]
+            # Positive closing speed means the boat is moving toward the line.
+            closing_speed = -side_rate if side > 0 else side_rate
+            if closing_speed > 0: time_to_line = abs(side) / closing_speed
+        if self.last_time is not None and timestamp > self.last_time:
+            dt = timestamp - self.last_time
+            if (self.last_side < 0) != (side < 0) and self.last_side != side:
+                fraction = self.last_side / (self.last_side - side)
+                along_at_cross = self.last_along + fraction * (along - self.last_along)
+                if 0.0 <= along_at_cross <= self.length_m:
+                    crossing = {
+                        'time': self.last_time + fraction * dt,
+                        'direction': "forward" if self.last_side < 0 else "reverse",
+                        'to_course': (side < 0) == (self.course_sign < 0),
+                        'along_m': along_at_cross
+                    }
+                    self.crossings.append(crossing)
+        self.last_time = timestamp; self.last_side = side; self.last_along = along
+        return {'distance_m': distance_m, 'side_m': side, 'closing_speed_mps': closing_speed,
+                'time_to_line_s': time_to_line, 'crossing': crossing}
@@ -3,6 +3,7 @@ import json
 import os
 import time
 from datetime import datetime
+from metrics import TRIP_SAVE_SECONDS
 
 class LogManager:
     """
@@ -22,7 +23,7 @@ class LogManager:
 
     def save_trips(self):
         """Saves trip data to a JSON file."""
-        with open(self.log_file, 'w') as f:
+        with TRIP_SAVE_SECONDS.time(), open(self.log_file, 'w') as f:
             json.dump(self.trips, f, indent=4)
 
     def start_new_trip(self):
@@ -40,7 +41,8 @@ class LogManager:
             "wind_direction": None,
             "people": None,
             "type": "Cruise",  # New field
-            "course": None     # New field
+            "course": None,    # New field
+            "line_crossings": []
         }
         self.trips.append(self.current_trip)
         return trip_id
@@ -91,4 +93,9 @@ class LogManager:
     def set_trip_course(self, course_name):
         """Sets the course for the current trip."""
         if self.current_trip:
-            self.current_trip['course'] = course_name
\ No newline at end of file
+            self.current_trip['course'] = course_name
+
+    def record_line_crossing(self, crossing):
+        """Appends a start/finish line crossing (with its leg number) to the current trip."""
+        if self.current_trip:
+            self.current_trip.setdefault('line_crossings', []).append(crossing)
@@ -1,39 +1,61 @@
 # main_app.py
+import os
 import sys
+from startup_profile import profile # First, so --profile-startup can time every import after it
 import platform
+from threading import Thread
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QPixmap, QImage
 from PySide6.QtCore import QTimer, Slot
-from PIL import Image
 
 from log_manager import LogManager
 from nmea_reader import NMEA2000Reader
+from data_sources import source_from_args
+from source_arbiter import SourceArbiter, PositionFilter
+from barometer import BarometerRecorder
+from anchor_watch import AnchorWatch, DEFAULT_RADIUS_M
+from instrument_store import InstrumentStore
+from alarm_manager import AlarmManager
+from latency_tracer import tracer
+from metrics import REGISTRY, RENDER_SECONDS, ENCODE_SECONDS, FRAME_BYTES, watch_signal_queue
 from sail_ui import SailUI
 from dashboard_ui import DashboardUI
 from bluetooth_manager import BluetoothManager
-
-# Import the new server and shared image components
 from shared_image import SharedImage
-from image_server import create_image_server, run_server
+# PIL and the Flask image server are imported once the instruments are up (see start_deferred).
+profile.mark("imports")
 
 class MainApplication:
     def __init__(self):
-        """Initializes the main application, UI windows, and connections."""
+        """Brings up the instruments and NMEA reader first; everything else follows in start_deferred."""
         self.app=QApplication(sys.argv)
         primary_screen=self.app.primaryScreen()
-        
+        profile.mark("QApplication")
+
         self.log_manager = LogManager()
-        self.nmea_thread=NMEA2000Reader(self.log_manager)
+        self.store = InstrumentStore()
+        self.alarm_manager = AlarmManager(self.store, sound_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "beep.wav"))
+        source = source_from_args(sys.argv[1:])
+        # Sim timestamps start at 0 and replays carry old log times: either would overwrite real pressure history,
+        # or leave a simulated anchor watch set on the next boot. Only live data is persisted.
+        barometer = BarometerRecorder('barometer.ring' if source.live else None)
+        self.anchor_watch = AnchorWatch('anchor_watch.json' if source.live else None, radius_m=self.anchor_radius())
+        self.nmea_thread=NMEA2000Reader(self.log_manager, source=source, capture=self.capture_sink(),
+                                        arbiter=self.source_arbiter(), position_filter=PositionFilter() if '--gps-filter' in sys.argv else None,
+                                        barometer=barometer, anchor_watch=self.anchor_watch, store=self.store)
         self.bt_manager=BluetoothManager()
         self.sail_ui=SailUI()
         self.dashboard_ui=DashboardUI()
-
-        # --- New Server Setup ---
         self.shared_image = SharedImage()
-        self.image_server_app = create_image_server(self.shared_image)
-        run_server(self.image_server_app) # Start the server in a background thread
+        tracer.set_enabled('--trace' in sys.argv)
+        profile.mark("windows built")
 
         self.connect_signals()
+        reader = self.nmea_thread
+        self.signal_probe = watch_signal_queue([reader.wind_data_received, reader.true_wind_data_received, reader.depth_data_received, reader.speed_data_received,
+                                                reader.pressure_data_received, reader.position_data_received, reader.heading_data_received, reader.trip_data_received, reader.trends_updated,
+                                                reader.barometer_updated, reader.anchor_watch_changed, reader.anchor_distance_updated, self.alarm_manager.alarms_changed])
+        self.dashboard_ui.update_anchor_watch(self.anchor_watch.snapshot()) # A watch restored from before a restart
         self.dashboard_ui.show()
         
         # The sail_ui no longer needs to be shown on the Pi 4, but it's useful for debugging on a PC
@@ -45,10 +67,53 @@ class MainApplication:
         # This timer now updates the shared image, not a physical display
         self.update_timer=QTimer()
         self.update_timer.timeout.connect(self.update_shared_image)
-        self.update_timer.start(5000) # Update image every 5 seconds
 
         self.nmea_thread.start()
+        self.alarm_manager.start() # Its own thread and timer: alarms keep time however long a frame takes to draw
+        profile.mark("instruments up")
+        QTimer.singleShot(0, self.start_deferred) # Runs once the event loop has drawn the first frame
+
+    def start_deferred(self):
+        """Second stage: the image server (on its own thread), the e-ink image, the trip log and dashboard extras."""
+        self.image_server_thread = Thread(target=self.start_image_server, daemon=True)
+        self.image_server_thread.start()
+        self.update_shared_image() # So the e-ink client has an image as soon as the server answers
+        self.update_timer.start(5000) # Update image every 5 seconds
+        profile.mark("first e-ink image")
         self.dashboard_ui.populate_log_table(self.log_manager.get_all_trips())
+        self.dashboard_ui.load_deferred()
+        self.alarm_manager.load_audio()
+        profile.mark("dashboard extras")
+        if profile.enabled:
+            self.image_server_thread.join()
+            profile.report()
+
+    def start_image_server(self):
+        """Imports Flask and starts serving off the UI thread; Flask is the slowest import in the app."""
+        from image_server import create_image_server, run_server
+        REGISTRY.add_collector(tracer.prometheus)
+        self.image_server_app = create_image_server(self.shared_image, metrics_text=REGISTRY.exposition)
+        run_server(self.image_server_app) # Start the server in a background thread
+        profile.mark("image server (background)")
+
+    def capture_sink(self):
+        """`--capture=<dir>` records every raw CAN frame into rotating, gzipped binary segments."""
+        directory = next((arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--capture=')), None)
+        if not directory: return None
+        from can_capture import CanCapture
+        return CanCapture(directory=directory)
+
+    def anchor_radius(self):
+        """`--anchor-radius=30` sets the anchor alarm radius in metres (default 75 ft)."""
+        radius = next((arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--anchor-radius=')), None)
+        return float(radius) if radius else DEFAULT_RADIUS_M
+
+    def source_arbiter(self):
+        """`--source-priority=12,3` prefers device address 12, then 3, when several send the same PGN."""
+        arbiter = SourceArbiter()
+        priority = next((arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--source-priority=')), None)
+        if priority: arbiter.set_priority([int(address, 0) for address in priority.split(',')])
+        return arbiter
 
     def connect_signals(self):
         """Connects all the signals and slots between components."""
@@ -61,9 +126,14 @@ class MainApplication:
         self.nmea_thread.depth_data_received.connect(self.sail_ui.update_depth_display)
         self.nmea_thread.speed_data_received.connect(self.sail_ui.update_speed_display)
         self.nmea_thread.wind_data_received.connect(self.dashboard_ui.update_wind_display)
+        self.nmea_thread.true_wind_data_received.connect(self.sail_ui.update_true_wind_display)
+        self.nmea_thread.true_wind_data_received.connect(self.dashboard_ui.update_true_wind_display)
         self.nmea_thread.depth_data_received.connect(self.dashboard_ui.update_depth_display)
         self.nmea_thread.pressure_data_received.connect(self.dashboard_ui.update_pressure_display)
+        self.nmea_thread.barometer_updated.connect(self.dashboard_ui.update_barometer_display)
         self.nmea_thread.trip_data_received.connect(self.dashboard_ui.update_trip_display)
+        self.nmea_thread.trends_updated.connect(self.sail_ui.update_trend_display)
+        self.nmea_thread.trends_updated.connect(self.dashboard_ui.update_trend_display)
         self.dashboard_ui.theme_changed.connect(self.sail_ui.setTheme)
         self.dashboard_ui.ui_config_list.currentRowChanged.connect(self.sail_ui.setView)
         self.dashboard_ui.race_selected.connect(self.sail_ui.load_race_course)
@@ -80,25 +150,35 @@ class MainApplication:
         self.dashboard_ui.set_people_requested.connect(self.set_people)
         self.dashboard_ui.trip_type_changed.connect(self.set_trip_type)
         self.dashboard_ui.trip_course_changed.connect(self.set_trip_course)
-        self.dashboard_ui.anchor_drift_alarm.connect(self.dashboard_ui.on_anchor_drift_alarm)
+        self.alarm_manager.alarms_changed.connect(self.dashboard_ui.update_alarms)
+        self.dashboard_ui.alarm_acknowledged.connect(self.alarm_manager.acknowledge)
+        self.dashboard_ui.anchor_watch_toggled.connect(self.nmea_thread.set_anchor_watch)
+        self.nmea_thread.anchor_watch_changed.connect(self.dashboard_ui.update_anchor_watch)
+        self.nmea_thread.anchor_distance_updated.connect(self.dashboard_ui.update_anchor_distance)
+        map_widget.line_crossed.connect(self.record_line_crossing)
 
     def update_shared_image(self):
         """Renders the SailUI to an image and places it in the shared buffer."""
-        pixmap=QPixmap(self.sail_ui.size())
-        self.sail_ui.render(pixmap)
-        
-        qimage=pixmap.toImage()
-        # Ensure the format is RGBA for consistency
-        qimage = qimage.convertToFormat(QImage.Format_RGBA8888)
+        from PIL import Image
+        with RENDER_SECONDS.time():
+            pixmap=QPixmap(self.sail_ui.size())
+            self.sail_ui.render(pixmap)
+        if tracer.enabled: tracer.render()
 
-        buffer=qimage.bits().tobytes()
-        pil_image=Image.frombytes("RGBA",(qimage.width(),qimage.height()),buffer,'raw',"RGBA")
-        
-        # Convert to black and white for the e-ink display
-        bw_image = pil_image.convert("1")
-        
-        self.shared_image.update_image(bw_image)
-        print("Updated shared image buffer.") # Uncomment for debugging
+        with ENCODE_SECONDS.time():
+            qimage=pixmap.toImage()
+            # Ensure the format is RGBA for consistency
+            qimage = qimage.convertToFormat(QImage.Format_RGBA8888)
+
+            buffer=qimage.bits().tobytes()
+            pil_image=Image.frombytes("RGBA",(qimage.width(),qimage.height()),buffer,'raw',"RGBA")
+
+            # Convert to black and white for the e-ink display
+            bw_image = pil_image.convert("1")
+
+            image_bytes = self.shared_image.update_image(bw_image)
+        FRAME_BYTES.set(len(image_bytes))
+        if tracer.enabled: tracer.publish()
 
     def run(self):
         """Executes the application's main loop."""
@@ -108,6 +188,8 @@ class MainApplication:
         """Stops background threads."""
         print("Cleaning up and stopping threads...")
         self.nmea_thread.stop()
+        self.alarm_manager.stop()
+        self.bt_manager.stop()
 
     @Slot(str)
     def delete_trip(self, trip_id):
@@ -127,6 +209,10 @@ class MainApplication:
     def set_trip_course(self, course_name):
         self.log_manager.set_trip_course(course_name)
 
+    @Slot(dict)
+    def record_line_crossing(self, crossing):
+        self.log_manager.record_line_crossing(crossing)
+
 if __name__=="__main__":
     main_app=MainApplication()
     exit_code=main_app.run()
@@ -0,0 +1,191 @@
+# metrics.py
+import bisect
+import os
+import resource
+import time
+from array import array
+from threading import Lock
+
+# Default histogram buckets in seconds, 1-2-5 steps from 100 us to 10 s.
+DEFAULT_BUCKETS = tuple(m * 10.0 ** e for e in range(-4, 1) for m in (1, 2, 5)) + (10.0,)
+
+def _format_labels(names, values):
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, values)) + "}" if names else ""
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name; self.help = help_text; self.labels = tuple(labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """
+    Monotonic count, optionally split by label values. inc() takes the
+    counter's lock: the read-modify-write would lose increments between
+    threads (Flask's request handlers; signals emitted from the reader, GUI
+    and alarm threads), and an uncontended lock costs ~0.25 us. Scrapes read
+    without it.
+    """
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self.values = {}; self.function = None
+        self._lock = Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock: self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def value(self, *label_values): return self.values.get(label_values, 0)
+
+    def set_function(self, function):
+        """Reads an unlabelled value from function() at scrape time instead."""
+        self.function = function
+
+    def collect(self):
+        if self.function is not None:
+            value = self.function()
+            return self.header() + ([f"{self.name} {value}"] if value is not None else [])
+        return self.header() + [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in list(self.values.items())]
+
+class Gauge(Counter):
+    """Current value: set() it, or set_function()."""
+    kind = "gauge"
+
+    def set(self, value, *label_values): self.values[label_values] = value
+
+class Histogram(_Metric):
+    """
+    Fixed buckets in an array('Q'): observe() is a bisect and three adds
+    under the histogram's lock, with no allocation. The lock is there for the
+    same reason as Counter's: some histograms have several writers
+    (TRIP_SAVE_SECONDS is observed from both the reader and GUI threads), and
+    count, total and the buckets must move together.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.bounds = tuple(buckets)
+        self.counts = array('Q', [0] * (len(self.bounds) + 1))
+        self.count = 0; self.total = 0.0
+        self._lock = Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1; self.total += value
+
+    def time(self):
+        """`with histogram.time(): ...` observes the block's duration."""
+        return _Timer(self)
+
+    def collect(self):
+        lines = self.header(); cumulative = 0
+        for bound, bucket in zip(self.bounds + (float('inf'),), self.counts):
+            cumulative += bucket
+            le = "+Inf" if bound == float('inf') else f"{bound:g}"
+            lines.append(f'{self.name}_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {self.total:.9f}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+    def __init__(self, histogram): self.histogram = histogram
+    def __enter__(self): self.start = time.perf_counter(); return self
+    def __exit__(self, *exc): self.histogram.observe(time.perf_counter() - self.start)
+
+class Registry:
+    """
+    Named metrics plus collectors (callables returning exposition text, such
+    as LatencyTracer.prometheus). Registration takes a lock; updates never do.
+    """
+    def __init__(self):
+        self.metrics = {}; self.collectors = []
+        self._lock = Lock()
+
+    def register(self, metric):
+        with self._lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None: return existing # Re-imported modules get the same metric
+            self.metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labels=()): return self.register(Counter(name, help_text, labels))
+    def gauge(self, name, help_text, labels=()): return self.register(Gauge(name, help_text, labels))
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS): return self.register(Histogram(name, help_text, buckets))
+
+    def add_collector(self, collector):
+        with self._lock:
+            if collector not in self.collectors: self.collectors.append(collector)
+
+    def exposition(self):
+        """Everything in the Prometheus text format (version 0.0.4)."""
+        with self._lock: metrics = list(self.metrics.values()); collectors = list(self.collectors)
+        lines = []
+        for metric in metrics: lines.extend(metric.collect())
+        text = "\n".join(lines) + "\n"
+        return text + "".join(collector() for collector in collectors)
+
+REGISTRY = Registry()
+
+# --- Process ---
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def resident_bytes():
+    try:
+        with open('/proc/self/statm') as f: return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 # Peak, in KiB on Linux
+
+REGISTRY.gauge("process_resident_memory_bytes", "Resident memory size in bytes.").set_function(resident_bytes)
+REGISTRY.counter("process_cpu_seconds_total", "User and system CPU time in seconds.").set_function(time.process_time)
+REGISTRY.gauge("process_start_time_seconds", "Start time of the process since the epoch.").set(time.time())
+
+# --- Pipeline ---
+FRAMES_DECODED = REGISTRY.counter("sailui_messages_decoded_total", "NMEA 2000 messages decoded and dispatched, by PGN.", ("pgn",))
+SIGNALS_EMITTED = REGISTRY.counter("sailui_qt_signals_emitted_total", "Reader thread signals emitted.")
+SIGNALS_DELIVERED = REGISTRY.counter("sailui_qt_signals_delivered_total", "Reader thread signals delivered on the UI thread.")
+REGISTRY.gauge("sailui_qt_signal_queue_depth", "Reader signals queued but not yet delivered to the UI thread.").set_function(
+    lambda: SIGNALS_EMITTED.value() - SIGNALS_DELIVERED.value())
+RENDER_SECONDS = REGISTRY.histogram("sailui_render_seconds", "Time to render the SailUI into a pixmap.")
+ENCODE_SECONDS = REGISTRY.histogram("sailui_encode_seconds", "Time to convert the pixmap to a 1-bit BMP.")
+FRAME_BYTES = REGISTRY.gauge("sailui_frame_bytes", "Size of the last published BMP.")
+HTTP_REQUESTS = REGISTRY.counter("sailui_http_requests_total", "Image server requests, by path and status.", ("path", "code"))
+TRIP_SAVE_SECONDS = REGISTRY.histogram("sailui_trip_save_seconds", "Time to write the trip log to disk.")
+
+def watch_signal_queue(signals):
+    """
+    Counts each signal when it is emitted (direct connection, on the
+    emitting thread) and when the UI thread delivers it (queued), so the
+    difference is the backlog waiting in the Qt event queue.
+    """
+    from PySide6.QtCore import QObject, Qt
+
+    class SignalQueueProbe(QObject):
+        def emitted(self, *args): SIGNALS_EMITTED.inc()
+        def delivered(self, *args): SIGNALS_DELIVERED.inc()
+
+    probe = SignalQueueProbe()
+    for signal in signals:
+        signal.connect(probe.emitted, Qt.DirectConnection)
+        signal.connect(probe.delivered, Qt.QueuedConnection)
+    return probe
+
+if __name__ == "__main__":
+    # Update cost check: the reader thread pays for these on every message.
+    counter = REGISTRY.counter("demo_total", "Demo counter.", ("pgn",)); histogram = REGISTRY.histogram("demo_seconds", "Demo histogram.")
+    n = 200000; start = time.perf_counter()
+    for i in range(n): counter.inc(130306)
+    counter_ns = (time.perf_counter() - start) / n * 1e9; start = time.perf_counter()
+    for i in range(n): histogram.observe(i * 1e-7)
+    histogram_ns = (time.perf_counter() - start) / n * 1e9
+    print(f"Counter.inc {counter_ns:.0f} ns, Histogram.observe {histogram_ns:.0f} ns")
+    text = REGISTRY.exposition()
+    assert 'demo_total{pgn="130306"} 200000' in text and 'demo_seconds_count 200000' in text
+    print(text)
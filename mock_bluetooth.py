@@ -0,0 +1,90 @@
+# mock_bluetooth.py
+import sys
+from PySide6.QtDBus import QDBusConnection, QDBusMessage, QDBusVirtualObject, QDBusVariant
+from bluetooth_manager import BLUEZ_SERVICE, ADAPTER_PATH, ADAPTER_INTERFACE, DEVICE_INTERFACE, PROPERTIES_INTERFACE, INTROSPECTABLE_INTERFACE
+
+class FakeBlueZService(QDBusVirtualObject):
+    """
+    Stands in for bluetoothd on a (session) bus so DBusBluetoothMonitor can be
+    exercised without hardware. Like bluetoothd it emits a bare
+    PropertiesChanged for scripted connects/disconnects and answers
+    Properties.GetAll on devices, Properties.Set on the adapter and an
+    Introspect of the adapter listing its device nodes.
+    """
+    def __init__(self, bus=None, parent=None):
+        super().__init__(parent)
+        self.bus = bus if bus is not None else QDBusConnection.sessionBus()
+        self.adapter_properties = {"Discoverable": False}
+        self.devices = {}
+
+    def start(self):
+        if not self.bus.registerService(BLUEZ_SERVICE): return False
+        return self.bus.registerVirtualObject("/org/bluez", self, QDBusConnection.SubPath)
+
+    def stop(self):
+        self.bus.unregisterObject("/org/bluez", QDBusConnection.UnregisterTree)
+        self.bus.unregisterService(BLUEZ_SERVICE)
+
+    def introspect(self, path):
+        return ""
+
+    def handleMessage(self, message, connection):
+        if message.interface() == INTROSPECTABLE_INTERFACE and message.member() == "Introspect" and message.path() == ADAPTER_PATH:
+            # Like bluetoothd: one child node per known device, which is how the monitor finds them at startup
+            nodes = "".join(f'<node name="{path.rsplit("/", 1)[-1]}"/>' for path in self.devices)
+            reply = message.createReply(); reply.setArguments([f"<node>{nodes}</node>"])
+            connection.send(reply)
+            return True
+        if message.interface() == PROPERTIES_INTERFACE and message.member() == "GetAll" and message.path() in self.devices:
+            reply = message.createReply()
+            reply.setArguments([{key: QDBusVariant(value) for key, value in self.devices[message.path()].items()}])
+            connection.send(reply)
+            return True
+        if message.interface() == PROPERTIES_INTERFACE and message.member() == "Set" and message.path() == ADAPTER_PATH:
+            interface, name, value = message.arguments()
+            value = value.variant() if isinstance(value, QDBusVariant) else value
+            self.adapter_properties[name] = value
+            connection.send(message.createReply())
+            self._emit_changed(ADAPTER_PATH, ADAPTER_INTERFACE, {name: value})
+            return True
+        return False
+
+    def _emit_changed(self, path, interface, changed):
+        signal = QDBusMessage.createSignal(path, PROPERTIES_INTERFACE, "PropertiesChanged")
+        signal.setArguments([interface, {key: QDBusVariant(value) for key, value in changed.items()}, []])
+        self.bus.send(signal)
+
+    def _device_path(self, address):
+        return f"{ADAPTER_PATH}/dev_{address.replace(':', '_')}"
+
+    def connect_device(self, address, name):
+        path = self._device_path(address)
+        self.devices[path] = {"Address": address, "Alias": name, "Connected": True}
+        self._emit_changed(path, DEVICE_INTERFACE, {"Connected": True})
+
+    def disconnect_device(self, address):
+        path = self._device_path(address)
+        if path in self.devices: self.devices[path]["Connected"] = False
+        self._emit_changed(path, DEVICE_INTERFACE, {"Connected": False})
+
+if __name__ == "__main__":
+    # Run under `dbus-run-session python mock_bluetooth.py` to watch the monitor follow a scripted session.
+    from PySide6.QtCore import QCoreApplication, QTimer
+    from bluetooth_manager import BluetoothManager, DBusBluetoothMonitor
+
+    app = QCoreApplication(sys.argv)
+    bus = QDBusConnection.sessionBus()
+    service = FakeBlueZService(bus)
+    if not service.start(): sys.exit("Could not register the fake BlueZ service on the session bus.")
+    service.connect_device("11:22:33:44:55:66", "Autopilot Remote") # Already connected when the monitor starts
+    manager = BluetoothManager(monitor=DBusBluetoothMonitor(bus=bus))
+    manager.connection_status_changed.connect(lambda status: print(f"Status: {status}"))
+    QTimer.singleShot(100, lambda: service.disconnect_device("11:22:33:44:55:66"))
+    QTimer.singleShot(200, lambda: service.connect_device("AA:BB:CC:DD:EE:FF", "Cockpit Speaker"))
+    QTimer.singleShot(400, lambda: service.connect_device("AA:BB:CC:DD:EE:FF", "Cockpit Speaker")) # No transition, no output
+    QTimer.singleShot(600, lambda: manager.make_discoverable(1))
+    QTimer.singleShot(800, lambda: print(f"Discoverable: {service.adapter_properties['Discoverable']}"))
+    QTimer.singleShot(2000, lambda: print(f"Discoverable: {service.adapter_properties['Discoverable']}"))
+    QTimer.singleShot(2200, lambda: service.disconnect_device("AA:BB:CC:DD:EE:FF"))
+    QTimer.singleShot(2500, app.quit)
+    app.exec()
@@ -0,0 +1,143 @@
+# motion_estimator.py
+import math
+from spatial_index import LocalProjection
+
+REANCHOR_M = 10000.0
+
+class MotionEstimator:
+    """
+    Streaming SOG/COG over the last window_s seconds of fixes: a
+    least-squares line through x(t) and y(t) in local metres, kept as
+    running sums over a preallocated ring buffer (max_fixes) so each fix
+    costs amortised O(1) and allocates nothing. The sums are rebuilt from
+    the buffer every max_fixes updates to stop float drift.
+
+    Below stationary_mps (with 50% hysteresis) the boat is stationary: COG
+    holds its last moving value and no distance accrues. Distance only
+    advances once the fitted position is jitter_floor_m from the last
+    committed point, so GPS wander at anchor doesn't inflate the log.
+    """
+    def __init__(self, window_s=8.0, max_fixes=128, stationary_mps=0.25, jitter_floor_m=3.0):
+        self.window_s = window_s
+        self.window = max_fixes
+        self.stationary_mps = stationary_mps
+        self.jitter_floor_m = jitter_floor_m
+        self._t = [0.0] * max_fixes; self._x = [0.0] * max_fixes; self._y = [0.0] * max_fixes
+        self.reset()
+
+    def reset(self):
+        self.projection = None; self._t0 = 0.0
+        self._head = 0; self._count = 0; self._since_rebuild = 0
+        self._st = self._stt = self._sx = self._sy = self._stx = self._sty = 0.0
+        self.sog_mps = 0.0; self.cog_deg = None; self.stationary = True
+        self.east_mps = self.north_mps = 0.0 # The fitted velocity SOG/COG come from
+        self.distance_m = 0.0
+        self._committed_x = self._committed_y = None
+        self.fit_x = self.fit_y = 0.0
+
+    def _rebuild(self):
+        """Re-sums the buffer relative to its oldest fix (and, if needed, a new projection origin)."""
+        n = self._count; start = (self._head - n) % self.window
+        t0 = self._t[start]
+        self._t0 += t0
+        self._st = self._stt = self._sx = self._sy = self._stx = self._sty = 0.0
+        for k in range(n):
+            i = (start + k) % self.window
+            self._t[i] -= t0
+            t, x, y = self._t[i], self._x[i], self._y[i]
+            self._st += t; self._stt += t * t; self._sx += x; self._sy += y; self._stx += t * x; self._sty += t * y
+        self._since_rebuild = 0
+
+    def _reanchor(self, lat_deg, lon_deg):
+        new = LocalProjection(lat_deg, lon_deg)
+        for i in range(self.window):
+            self._x[i], self._y[i] = new.to_xy(*self.projection.to_latlon(self._x[i], self._y[i]))
+        if self._committed_x is not None:
+            self._committed_x, self._committed_y = new.to_xy(*self.projection.to_latlon(self._committed_x, self._committed_y))
+        self.projection = new
+        self._rebuild()
+
+    def update(self, lat_deg, lon_deg, t):
+        """Adds a fix. Returns True once there are enough fixes for an estimate; results are in the attributes."""
+        if self.projection is None:
+            self.projection = LocalProjection(lat_deg, lon_deg); self._t0 = t
+        x, y = self.projection.to_xy(lat_deg, lon_deg)
+        if abs(x) > REANCHOR_M or abs(y) > REANCHOR_M:
+            self._reanchor(lat_deg, lon_deg); x, y = 0.0, 0.0
+        t -= self._t0
+        if self._count and t <= self._t[(self._head - 1) % self.window]: return self._count >= 3 # Duplicate or out of order
+
+        while self._count and (self._count == self.window or t - self._t[(self._head - self._count) % self.window] > self.window_s):
+            oldest = (self._head - self._count) % self.window
+            ot, ox, oy = self._t[oldest], self._x[oldest], self._y[oldest]
+            self._st -= ot; self._stt -= ot * ot; self._sx -= ox; self._sy -= oy; self._stx -= ot * ox; self._sty -= ot * oy
+            self._count -= 1
+        slot = self._head
+        self._t[slot] = t; self._x[slot] = x; self._y[slot] = y
+        self._st += t; self._stt += t * t; self._sx += x; self._sy += y; self._stx += t * x; self._sty += t * y
+        self._head = (slot + 1) % self.window; self._count += 1
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window: self._rebuild(); t = self._t[slot]
+
+        n = self._count
+        # A velocity from a fraction of a second of noisy fixes is meaningless; wait for a quarter window.
+        if n < 3 or t - self._t[(self._head - n) % self.window] < self.window_s / 4: return False
+        denominator = n * self._stt - self._st * self._st
+        if denominator <= 1e-12: return False
+        vx = (n * self._stx - self._st * self._sx) / denominator
+        vy = (n * self._sty - self._st * self._sy) / denominator
+        mean_t = self._st / n
+        self.fit_x = self._sx / n + vx * (t - mean_t); self.fit_y = self._sy / n + vy * (t - mean_t)
+        self.sog_mps = math.hypot(vx, vy); self.east_mps = vx; self.north_mps = vy
+
+        threshold = self.stationary_mps * (1.5 if self.stationary else 1.0)
+        self.stationary = self.sog_mps < threshold
+        if not self.stationary: self.cog_deg = math.degrees(math.atan2(vx, vy)) % 360
+
+        if self._committed_x is None:
+            self._committed_x, self._committed_y = self.fit_x, self.fit_y
+        elif not self.stationary:
+            step = math.hypot(self.fit_x - self._committed_x, self.fit_y - self._committed_y)
+            if step >= self.jitter_floor_m:
+                self.distance_m += step
+                self._committed_x, self._committed_y = self.fit_x, self.fit_y
+        return True
+
+if __name__ == "__main__":
+    # Accuracy self-check on synthetic tracks with 1 m white GPS noise.
+    import random
+    rng = random.Random(7)
+    origin = LocalProjection(34.05, -118.25)
+
+    def run(track, seconds, noise_m=1.0, hz=10):
+        estimator = MotionEstimator(); errors = []
+        for i in range(int(seconds * hz)):
+            t = i / hz
+            x, y, sog, cog = track(t)
+            lat, lon = origin.to_latlon(x + rng.gauss(0, noise_m), y + rng.gauss(0, noise_m))
+            if estimator.update(lat, lon, 1.7e9 + t) and t > 10:
+                course_error = abs((estimator.cog_deg - cog + 180) % 360 - 180) if sog and estimator.cog_deg is not None else 0.0
+                errors.append((abs(estimator.sog_mps - sog), course_error))
+        return estimator, max(e[0] for e in errors), sum(e[0] for e in errors) / len(errors), max(e[1] for e in errors)
+
+    straight = lambda t: (3.0 * t * math.sin(math.radians(40)), 3.0 * t * math.cos(math.radians(40)), 3.0, 40.0)
+    estimator, sog_max, sog_mean, cog_max = run(straight, 600)
+    print(f"Straight 3 m/s @ 040: SOG err mean {sog_mean:.3f} max {sog_max:.3f} m/s, COG err max {cog_max:.1f} deg, distance {estimator.distance_m:.0f}/1800 m")
+    assert sog_mean < 0.1 and cog_max < 10 and abs(estimator.distance_m - 1800) < 1800 * 0.02
+
+    radius = 200.0; omega = 3.0 / radius
+    circle = lambda t: (radius * math.sin(omega * t), radius * math.cos(omega * t) - radius, 3.0, math.degrees(math.pi / 2 + omega * t) % 360)
+    estimator, sog_max, sog_mean, cog_max = run(circle, 300)
+    print(f"Turning 3 m/s, r=200 m: SOG err mean {sog_mean:.3f} max {sog_max:.3f} m/s, COG err max {cog_max:.1f} deg")
+    assert sog_mean < 0.15 and cog_max < 15
+
+    at_anchor = lambda t: (0.0, 0.0, 0.0, 0.0)
+    estimator, sog_max, sog_mean, _ = run(at_anchor, 3600)
+    print(f"At anchor, 1 h: SOG max {sog_max:.3f} m/s, stationary {estimator.stationary}, distance {estimator.distance_m:.1f} m")
+    assert estimator.stationary and estimator.distance_m < 10
+
+    far = lambda t: (6.0 * t, 0.0, 6.0, 90.0) # 21.6 km: exercises re-anchoring
+    estimator, sog_max, sog_mean, cog_max = run(far, 3600, hz=1)
+    print(f"Long leg 6 m/s, 1 Hz: SOG err mean {sog_mean:.3f} m/s, COG err max {cog_max:.1f} deg, distance {estimator.distance_m:.0f}/21600 m")
+    assert sog_mean < 0.15 and abs(estimator.distance_m - 21600) < 21600 * 0.02 # Only 8 fixes per window at 1 Hz
+    print("OK")
@@ -5,155 +5,238 @@ import time
 import struct
 from PySide6.QtCore import QThread, Signal, Slot
 from log_manager import LogManager
-
-IS_RASPBERRY_PI = False
-if IS_RASPBERRY_PI:
-    import can
-else:
-    from mock_nmea_data import MockNMEA2000
-
-def haversine_distance(lat1_rad, lon1_rad, lat2_rad, lon2_rad):
-    R = 6371000
-    dlat = lat2_rad - lat1_rad
-    dlon = lon2_rad - lon1_rad
-    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
-
-def calculate_bearing(lat1_rad, lon1_rad, lat2_rad, lon2_rad):
-    dLon = lon2_rad - lon1_rad
-    y = math.sin(dLon) * math.cos(lat2_rad)
-    x = math.cos(lat1_rad) * math.sin(lat2_rad) - math.sin(lat1_rad) * math.cos(lat2_rad) * math.cos(dLon)
-    bearing_rad = math.atan2(y, x)
-    return (math.degrees(bearing_rad) + 360) % 360
+from true_wind import TrueWindCalculator
+from source_arbiter import SourceArbiter
+from motion_estimator import MotionEstimator
+from latency_tracer import tracer, DECODE
+from rolling_stats import TrendEngine
+from barometer import BarometerRecorder
+from anchor_watch import AnchorWatch, OFF
+from instrument_store import InstrumentStore
+
+WIND_REFERENCES = ["True (ground ref)", "Magnetic (ground ref)", "Apparent", "True (boat ref)", "True (water ref)", "Reserved", "Reserved", "Reserved"]
+
+class CanFrame:
+    """Minimal stand-in for python-can's Message for frames we build or replay ourselves."""
+    __slots__ = ('arbitration_id', 'data', 'timestamp')
+    def __init__(self, arbitration_id, data, timestamp=0.0):
+        self.arbitration_id = arbitration_id; self.data = data; self.timestamp = timestamp
+
+def encode_pgn(pgn, fields, source=0, priority=2, timestamp=0.0):
+    """Builds a single-frame CAN message in the same layouts NMEA2000Parser.parse_pgn decodes."""
+    if pgn == 130306:
+        data = struct.pack('<BHHB', 0, round(fields['WindSpeed'] * 100) & 0xFFFF, round(fields['WindAngle'] * 10000) % 62832,
+                           0xF8 | WIND_REFERENCES.index(fields['Reference']))
+    elif pgn == 127250:
+        data = struct.pack('<BHhhB', 0, round(fields['Heading'] * 10000) % 62832, 0x7FFF, 0x7FFF,
+                           0xFC | (1 if fields.get('Reference') == "Magnetic" else 0))
+    elif pgn == 128267:
+        data = struct.pack('<BIhB', 0, round(fields['Depth'] * 100), 0, 0xFF)
+    elif pgn == 129025:
+        data = struct.pack('<ii', round(math.degrees(fields['Latitude']) * 1e7), round(math.degrees(fields['Longitude']) * 1e7))
+    elif pgn == 130314:
+        data = struct.pack('<BBBiB', 0, 0, 0, round(fields['Pressure'] * 10), 0xFF)
+    else:
+        raise ValueError(f"No encoder for PGN {pgn}")
+    data = data.ljust(8, b'\xff')
+    return CanFrame((priority & 0x7) << 26 | (pgn & 0x1FFFF) << 8 | (source & 0xFF), data, timestamp)
 
 class NMEA2000Parser:
     def __init__(self): self.callbacks = {}
     def add_callback(self, pgn, func): self.callbacks[pgn] = func
-    def handle_message(self, msg):
-        pgn = (msg.arbitration_id >> 8) & 0x1FFFF
+    def handle_message(self, msg): self.dispatch(msg.arbitration_id, msg.data, msg.timestamp)
+    def dispatch(self, arbitration_id, payload, timestamp=None):
+        pgn = (arbitration_id >> 8) & 0x1FFFF
         if pgn in self.callbacks:
-            data = self.parse_pgn(pgn, msg.data)
-            if data: self.callbacks[pgn](pgn, data)
+            ingest = tracer.ingest() if tracer.enabled else None
+            data = self.parse_pgn(pgn, payload)
+            if data:
+                if ingest: tracer.stage(DECODE, ingest)
+                data['Source'] = arbitration_id & 0xFF
+                if timestamp is not None: data['Timestamp'] = timestamp
+                self.callbacks[pgn](pgn, data)
     def parse_pgn(self, pgn, data):
-        if pgn == 130306: # Wind
-            _, speed, angle, ref_raw = struct.unpack('<BHBB', data[:5])
-            ref_map = ["True (ground ref)", "Magnetic (ground ref)", "Apparent"]
-            return {'WindSpeed': speed * 0.01, 'WindAngle': angle * 0.0001, 'Reference': ref_map[ref_raw & 0x07]}
-        elif pgn == 128267: # Depth
-            _, depth, _ = struct.unpack('<Bf', data[:5])
-            return {'Depth': depth}
-        elif pgn == 129025: # Position
-            lat_deg, lon_deg = struct.unpack('<ii', data)
+        if pgn == 130306: # Wind: SID, speed 0.01 m/s, angle 0.0001 rad, reference
+            _, speed, angle, ref_raw = struct.unpack('<BHHB', data[:6])
+            if speed == 0xFFFF or angle == 0xFFFF: return None
+            return {'WindSpeed': speed * 0.01, 'WindAngle': angle * 0.0001, 'Reference': WIND_REFERENCES[ref_raw & 0x07]}
+        elif pgn == 127250: # Vessel Heading: SID, heading 0.0001 rad, deviation, variation, reference
+            _, heading, _, _, ref_raw = struct.unpack('<BHhhB', data[:8])
+            if heading == 0xFFFF: return None
+            return {'Heading': heading * 0.0001, 'Reference': "Magnetic" if ref_raw & 0x03 else "True"}
+        elif pgn == 128267: # Depth: SID, depth 0.01 m, offset 0.001 m, range
+            _, depth, _, _ = struct.unpack('<BIhB', data[:8])
+            if depth == 0xFFFFFFFF: return None
+            return {'Depth': depth * 0.01}
+        elif pgn == 129025: # Position, rapid update: lat/lon 1e-7 deg
+            lat_deg, lon_deg = struct.unpack('<ii', data[:8])
             return {'Latitude': math.radians(lat_deg * 1e-7), 'Longitude': math.radians(lon_deg * 1e-7)}
-        elif pgn == 130314: # Pressure
-            _, _, pressure_hpa, _ = struct.unpack('<BBHB', data[:5])
-            return {'Pressure': pressure_hpa * 100} # hPa to Pa
+        elif pgn == 130314: # Actual Pressure: SID, instance, source, pressure 0.1 Pa
+            _, _, _, pressure_dpa, _ = struct.unpack('<BBBiB', data[:8])
+            return {'Pressure': pressure_dpa * 0.1}
         return None
 
 class NMEA2000Reader(QThread):
     wind_data_received = Signal(float, float, str)
     depth_data_received = Signal(float)
     speed_data_received = Signal(float)
-    position_data_received = Signal(float, float)
+    position_data_received = Signal(float, float, float, float, float) # Radians; the fix's own time (the frame's, under sim or replay); MotionEstimator's east/north m/s, NaN until it has a fit
     heading_data_received = Signal(float)
     pressure_data_received = Signal(float)
     trip_data_received = Signal(float, float)
+    true_wind_data_received = Signal(float, float, float)
+    trends_updated = Signal(dict) # TrendEngine.snapshot(), once a second
+    barometer_updated = Signal(dict) # BarometerRecorder.snapshot(), once a minute
+    anchor_watch_changed = Signal(dict) # AnchorWatch.snapshot(), when a watch is set or cleared and on each holding/dragging transition
+    anchor_distance_updated = Signal(float) # Metres from the anchor, each fix while a watch is set
 
-    def __init__(self, log_manager, parent=None):
+    def __init__(self, log_manager, parent=None, source=None, capture=None, arbiter=None, position_filter=None, barometer=None, anchor_watch=None, store=None):
         super().__init__(parent)
         self._running = True
-        self.last_gps_pos = None
-        self.last_gps_time = None
         self.total_distance_m = 0.0
         self.start_time = time.time()
         self.log_manager = log_manager
         self.current_wind_speed = 0
         self.current_wind_direction = "N/A"
         self.current_boat_speed = 0
-
-        if IS_RASPBERRY_PI:
-            self.n2k_parser = NMEA2000Parser()
-            self.bus = None
-            self.notifier = None
-        else:
-            self.mock_n2k = MockNMEA2000()
+        self.true_wind = TrueWindCalculator()
+        self.capture = capture # Optional CanCapture tee for the raw frames
+        self.arbiter = arbiter or SourceArbiter() # One device per PGN when several send it
+        self.position_filter = position_filter # Optional PositionFilter to smooth the displayed position
+        self.motion = MotionEstimator()
+        self.trends = TrendEngine() # Wind and pressure trends, computed here rather than on the GUI thread
+        self.barometer = barometer or BarometerRecorder() # In memory unless given a ring file to persist to
+        self.anchor_watch = anchor_watch or AnchorWatch() # Checked here, per fix, so a busy UI can't delay a drag alarm
+        self.store = store or InstrumentStore() # Latest readings for the AlarmManager's rules
+        self.store.set('anchor_state', self.anchor_watch.state) # A watch restored from disk may already be dragging
+
+        if source is None:
+            from data_sources import make_source
+            source = make_source("mock")
+        self.source = source # See data_sources.make_source: socketcan, mock, sim, replay, tcp/udp gateway
 
         self.setup_callbacks()
 
     def setup_callbacks(self):
         callbacks = {
             130306: self._on_wind_data,
+            127250: self._on_heading_data,
             128267: self._on_depth_data,
             129025: self._on_gps_data,
             130314: self._on_pressure_data
         }
-        if IS_RASPBERRY_PI:
-            for pgn, func in callbacks.items(): self.n2k_parser.add_callback(pgn, func)
-        else:
-            for pgn, func in callbacks.items(): self.mock_n2k.add_callback(pgn, func)
+        for pgn, func in callbacks.items(): self.source.add_callback(pgn, func)
+
+    def source_stats(self):
+        return self.source.stats()
+
+    def source_health(self):
+        return self.arbiter.health(time.time())
 
     def run(self):
         self.log_manager.start_new_trip()
+        if self.capture:
+            self.capture.start()
+            self.source.frame_sink = self.capture.record
         try:
-            if IS_RASPBERRY_PI:
-                self.bus = can.interface.Bus(channel='can0', bustype='socketcan')
-                self.notifier = can.Notifier(self.bus, [self.n2k_parser.handle_message])
-            else:
-                self.mock_n2k.start()
+            self.source.start()
             while self._running:
                 self.log_manager.update_trip_data(self.total_distance_m, self.current_wind_speed, self.current_wind_direction, self.current_boat_speed)
+                trends = self.trends.snapshot()
+                if trends: self.trends_updated.emit(trends)
                 self.msleep(1000)
+        except Exception as e:
+            print(f"Could not start data source '{self.source.name}': {e}")
         finally:
             self.log_manager.end_current_trip()
-            if IS_RASPBERRY_PI:
-                if self.notifier: self.notifier.stop()
-                if self.bus: self.bus.shutdown()
-            else:
-                if hasattr(self, 'mock_n2k'): self.mock_n2k.stop()
+            self.source.stop()
+            if self.capture: self.capture.stop()
+            self.barometer.close()
+            self.anchor_watch.close()
             print("NMEA2000 thread stopped.")
 
     def stop(self):
         self._running = False
         self.wait(2000)
 
+    @Slot(bool)
+    def set_anchor_watch(self, watching):
+        """Sets a watch at the last fix, or clears it. Called from the UI thread; AnchorWatch locks."""
+        snapshot = self.anchor_watch.set_anchor() if watching else self.anchor_watch.clear()
+        self.store.set('anchor_state', self.anchor_watch.state)
+        self.anchor_watch_changed.emit(snapshot or self.anchor_watch.snapshot())
+
     @Slot(int, dict)
     def _on_wind_data(self, pgn, data):
-        self.current_wind_speed = data['WindSpeed']
-        angle_deg = math.degrees(data['WindAngle'])
-        dirs = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
-        idx = round(angle_deg / 45) % 8
-        self.current_wind_direction = dirs[idx]
+        if not self.arbiter.accept((pgn, data['Reference']), data.get('Source'), time.time()): return
+        if tracer.enabled: tracer.dispatch(pgn)
         self.wind_data_received.emit(data['WindSpeed'], data['WindAngle'], data['Reference'])
+        if data['Reference'] == "Apparent":
+            t = data.get('Timestamp', time.time()) # The frame's clock, like heading and motion, so sim and replay pair up
+            self.store.set('aws_mps', data['WindSpeed'])
+            self.trends.update('wind', t, data['WindSpeed'] * 1.94384)
+            true_wind = self.true_wind.update_apparent(data['WindSpeed'], data['WindAngle'], t)
+            if true_wind: self._publish_true_wind(*true_wind)
+        else:
+            self.current_wind_speed = data['WindSpeed']
+
+    def _publish_true_wind(self, speed_mps, angle_rad, direction_rad):
+        """Derived true wind goes out through a signal, exactly like a raw channel."""
+        self.current_wind_speed = speed_mps; self.store.set('tws_mps', speed_mps)
+        dirs = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
+        self.current_wind_direction = dirs[round(math.degrees(direction_rad) / 45) % 8]
+        self.true_wind_data_received.emit(speed_mps, angle_rad, direction_rad)
+
+    @Slot(int, dict)
+    def _on_heading_data(self, pgn, data):
+        if not self.arbiter.accept(pgn, data.get('Source'), time.time()): return
+        if data['Reference'] == "True": self.true_wind.update_heading(data['Heading'], data.get('Timestamp', time.time()))
 
     @Slot(int, dict)
     def _on_depth_data(self, pgn, data):
+        if not self.arbiter.accept(pgn, data.get('Source'), time.time()): return
+        if tracer.enabled: tracer.dispatch(pgn)
+        self.store.set('depth_m', data['Depth'])
         self.depth_data_received.emit(data['Depth'])
 
     @Slot(int, dict)
     def _on_pressure_data(self, pgn, data):
+        if not self.arbiter.accept(pgn, data.get('Source'), time.time()): return
+        t = data.get('Timestamp', time.time())
+        self.trends.update('pressure', t, data['Pressure'])
         self.pressure_data_received.emit(data['Pressure'])
+        if self.barometer.update(t, data['Pressure']): self.barometer_updated.emit(self.barometer.snapshot())
 
     @Slot(int, dict)
     def _on_gps_data(self, pgn, data):
-        lat_rad, lon_rad = data['Latitude'], data['Longitude']
         current_time = time.time()
-        current_pos_rad = (lat_rad, lon_rad)
-
-        if self.last_gps_pos and self.last_gps_time:
-            distance_m = haversine_distance(self.last_gps_pos[0], self.last_gps_pos[1], current_pos_rad[0], current_pos_rad[1])
-            time_diff_s = current_time - self.last_gps_time
-            if time_diff_s > 0.5:
-                speed_mps = distance_m / time_diff_s
-                self.current_boat_speed = speed_mps * 1.94384
-                self.speed_data_received.emit(self.current_boat_speed)
-                self.total_distance_m += distance_m
-                bearing_deg = calculate_bearing(self.last_gps_pos[0], self.last_gps_pos[1], current_pos_rad[0], current_pos_rad[1])
-                self.heading_data_received.emit(bearing_deg)
+        if not self.arbiter.accept(pgn, data.get('Source'), current_time): return
+        lat_rad, lon_rad = data['Latitude'], data['Longitude']
+        # Fix time comes from the frame when there is one, so replays and simulations run at any speed.
+        fix_time = data.get('Timestamp', current_time)
+
+        distance_before = self.motion.distance_m
+        velocity = (math.nan, math.nan)
+        if self.motion.update(math.degrees(lat_rad), math.degrees(lon_rad), fix_time):
+            velocity = (self.motion.east_mps, self.motion.north_mps)
+            self.total_distance_m += self.motion.distance_m - distance_before
+            self.current_boat_speed = self.motion.sog_mps * 1.94384
+            self.speed_data_received.emit(self.current_boat_speed)
+            if self.motion.cog_deg is not None and not self.motion.stationary:
+                self.heading_data_received.emit(self.motion.cog_deg)
+            self.true_wind.update_motion(self.current_boat_speed, self.motion.cog_deg or 0.0, fix_time)
+
+        if self.position_filter:
+            lat_deg, lon_deg, _, _ = self.position_filter.update(math.degrees(lat_rad), math.degrees(lon_rad), fix_time)
+            lat_rad, lon_rad = math.radians(lat_deg), math.radians(lon_deg)
+
+        # On the raw fix, not the filtered one: smoothing would hide the start of a drag.
+        self.store.set('position', (math.degrees(data['Latitude']), math.degrees(data['Longitude'])))
+        if self.anchor_watch.update(fix_time, math.degrees(data['Latitude']), math.degrees(data['Longitude'])):
+            self.store.set('anchor_state', self.anchor_watch.state)
+            self.anchor_watch_changed.emit(self.anchor_watch.snapshot())
+        if self.anchor_watch.state != OFF: self.anchor_distance_updated.emit(self.anchor_watch.distance_m)
 
         elapsed_time_s = current_time - self.start_time
         self.trip_data_received.emit(self.total_distance_m, elapsed_time_s)
-        self.position_data_received.emit(lat_rad, lon_rad)
-
-        self.last_gps_pos = current_pos_rad
-        self.last_gps_time = current_time
\ No newline at end of file
+        self.position_data_received.emit(lat_rad, lon_rad, fix_time, *velocity)
@@ -0,0 +1,213 @@
+# nmea_simulator.py
+import heapq
+import json
+import math
+import random
+import time
+from threading import Thread, Event
+from nmea_reader import NMEA2000Parser, encode_pgn
+from spatial_index import LocalProjection
+
+DEFAULT_RATES_HZ = {
+    129025: 10.0, # Position, rapid update
+    127250: 10.0, # Heading
+    130306: 10.0, # Wind
+    128267: 1.0,  # Depth
+    130314: 0.5   # Pressure
+}
+
+# Scenario steps: {"at": virtual seconds, "do": action, ...params}.
+SCENARIOS = {
+    "race": [
+        {"at": 0, "do": "set", "tws_kts": 12, "twd": 0, "heading": 315},
+        {"at": 90, "do": "tack"},
+        {"at": 150, "do": "wind_shift", "degrees": 12, "over": 30},
+        {"at": 200, "do": "tack"},
+        {"at": 300, "do": "round_mark", "heading": 170},
+        {"at": 420, "do": "wind_shift", "degrees": -8, "over": 60},
+        {"at": 480, "do": "round_mark", "heading": 330}
+    ],
+    "anchor_drag": [
+        {"at": 0, "do": "set", "tws_kts": 18, "twd": 200},
+        {"at": 0, "do": "anchor"},
+        {"at": 600, "do": "drag", "speed_kts": 0.6, "direction": 20},
+        {"at": 900, "do": "anchor"}
+    ]
+}
+
+class VirtualClock:
+    """Simulation time in seconds, independent of the wall clock."""
+    def __init__(self, start=0.0): self.now = start
+    def advance_to(self, t): self.now = max(self.now, t)
+
+class SimulatedBoat:
+    """Very small kinematic boat: steers toward a target heading at a fixed turn rate and sails a rough polar."""
+    def __init__(self, lat=34.0515, lon=-118.2442, rng=None):
+        self.projection = LocalProjection(lat, lon)
+        self.x = 0.0; self.y = 0.0
+        self.heading = 0.0; self.target_heading = 0.0; self.turn_rate = 12.0
+        self.tws_kts = 10.0; self.twd = 0.0; self.twd_target = 0.0; self.twd_rate = 0.0
+        self.depth = 10.0; self.pressure_pa = 101325.0; self.pressure_rate_pa_s = 0.0
+        self.anchored = False; self.drag_speed_kts = 0.0; self.drag_direction = 0.0
+        self.sog_kts = 0.0; self.cog = 0.0
+        self.rng = rng or random.Random(0)
+
+    def boat_speed_kts(self):
+        twa = abs((self.twd - self.heading + 180) % 360 - 180)
+        if twa < 35: return 0.5
+        return min(self.tws_kts * 0.6, 7.5) * (0.75 + 0.25 * math.sin(math.radians(twa)))
+
+    def step(self, dt):
+        if dt <= 0: return
+        turn = (self.target_heading - self.heading + 180) % 360 - 180
+        self.heading = (self.heading + max(-self.turn_rate * dt, min(self.turn_rate * dt, turn))) % 360
+        if self.twd_rate:
+            shift = (self.twd_target - self.twd + 180) % 360 - 180
+            if abs(shift) <= abs(self.twd_rate) * dt: self.twd = self.twd_target % 360; self.twd_rate = 0.0
+            else: self.twd = (self.twd + math.copysign(abs(self.twd_rate) * dt, shift)) % 360
+        if self.anchored:
+            self.sog_kts = self.drag_speed_kts; self.cog = self.drag_direction
+        else:
+            self.sog_kts = self.boat_speed_kts(); self.cog = self.heading
+        distance = self.sog_kts * 0.514444 * dt
+        self.x += distance * math.sin(math.radians(self.cog)); self.y += distance * math.cos(math.radians(self.cog))
+        self.depth = max(1.0, self.depth + self.rng.gauss(0, 0.02) * math.sqrt(dt))
+        self.pressure_pa += self.pressure_rate_pa_s * dt
+
+    def apparent_wind(self):
+        """Apparent wind speed (m/s) and angle (rad, clockwise from the bow)."""
+        tws = self.tws_kts * 0.514444 + self.rng.gauss(0, 0.15)
+        twa = math.radians(self.twd - self.heading)
+        drift = math.radians(self.cog - self.heading); sog = self.sog_kts * 0.514444
+        ax = tws * math.cos(twa) + sog * math.cos(drift); ay = tws * math.sin(twa) + sog * math.sin(drift)
+        return math.hypot(ax, ay), math.atan2(ay, ax) % (2 * math.pi)
+
+    def fields(self, pgn):
+        if pgn == 129025:
+            lat, lon = self.projection.to_latlon(self.x + self.rng.gauss(0, 0.5), self.y + self.rng.gauss(0, 0.5))
+            return {'Latitude': math.radians(lat), 'Longitude': math.radians(lon)}
+        if pgn == 127250: return {'Heading': math.radians(self.heading), 'Reference': "True"}
+        if pgn == 130306:
+            aws, awa = self.apparent_wind()
+            return {'WindSpeed': max(aws, 0.0), 'WindAngle': awa, 'Reference': "Apparent"}
+        if pgn == 128267: return {'Depth': self.depth}
+        if pgn == 130314: return {'Pressure': self.pressure_pa}
+        return None
+
+class NMEASimulator:
+    """
+    Deterministic, scriptable replacement for MockNMEA2000. Runs on a virtual
+    clock with per-PGN rates and either hands decoded dicts straight to the
+    callbacks or encodes real CAN frames and pushes them through
+    NMEA2000Parser.handle_message, exactly like the live bus.
+
+    speed: 1.0 is real time, 50.0 is fifty times faster, 0 runs as fast as possible.
+    """
+    def __init__(self, scenario="race", rates_hz=None, encode_frames=False, speed=1.0, seed=0, frame_sink=None):
+        self.rates_hz = dict(DEFAULT_RATES_HZ if rates_hz is None else rates_hz)
+        self.encode_frames = encode_frames
+        self.speed = speed
+        self.frame_sink = frame_sink
+        self.parser = NMEA2000Parser()
+        self.clock = VirtualClock()
+        self.boat = SimulatedBoat(rng=random.Random(seed))
+        if isinstance(scenario, str): scenario = SCENARIOS[scenario]
+        self.scenario = sorted(scenario, key=lambda step: step['at'])
+        self._scenario_index = 0
+        self._callbacks = {}
+        self._schedule = [(0.0, pgn) for pgn in self.rates_hz]; heapq.heapify(self._schedule)
+        self.messages_emitted = 0
+        self._stop_event = Event(); self._thread = None
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path, 'r') as f: return cls(scenario=json.load(f), **kwargs)
+
+    def add_callback(self, pgn, func):
+        self._callbacks[pgn] = func; self.parser.add_callback(pgn, func)
+
+    def _apply_step(self, step):
+        boat = self.boat; action = step['do']
+        if action == "set":
+            if 'tws_kts' in step: boat.tws_kts = step['tws_kts']
+            if 'twd' in step: boat.twd = boat.twd_target = step['twd'] % 360
+            if 'heading' in step: boat.heading = boat.target_heading = step['heading'] % 360
+            if 'depth' in step: boat.depth = step['depth']
+            if 'pressure_trend_hpa_h' in step: boat.pressure_rate_pa_s = step['pressure_trend_hpa_h'] * 100 / 3600
+        elif action == "tack":
+            # Mirror the heading across the wind: same TWA on the other tack (a gybe when running).
+            boat.target_heading = (2 * boat.twd - boat.heading) % 360
+        elif action in ("steer", "round_mark"):
+            boat.target_heading = step['heading'] % 360
+        elif action == "wind_shift":
+            boat.twd_target = (boat.twd + step['degrees']) % 360
+            boat.twd_rate = abs(step['degrees']) / max(step.get('over', 1.0), 1e-3)
+        elif action == "anchor":
+            boat.anchored = True; boat.drag_speed_kts = 0.0
+        elif action == "drag":
+            boat.anchored = True; boat.drag_speed_kts = step['speed_kts']; boat.drag_direction = step['direction'] % 360
+        elif action == "sail":
+            boat.anchored = False
+
+    def _emit(self, pgn, timestamp):
+        fields = self.boat.fields(pgn)
+        if fields is None: return
+        self.messages_emitted += 1
+        if self.encode_frames:
+            frame = encode_pgn(pgn, fields, source=1, timestamp=timestamp)
+            if self.frame_sink: self.frame_sink(frame)
+            self.parser.handle_message(frame)
+        elif pgn in self._callbacks:
+            fields['Timestamp'] = timestamp
+            self._callbacks[pgn](pgn, fields)
+
+    def run_until(self, end_time, pace=None):
+        """Advances the virtual clock to end_time, emitting every due message. `pace(t)` may sleep."""
+        while self._schedule and self._schedule[0][0] <= end_time and not self._stop_event.is_set():
+            due, pgn = heapq.heappop(self._schedule)
+            while self._scenario_index < len(self.scenario) and self.scenario[self._scenario_index]['at'] <= due:
+                step = self.scenario[self._scenario_index]
+                self.boat.step(step['at'] - self.clock.now); self.clock.advance_to(step['at'])
+                self._apply_step(step); self._scenario_index += 1
+            if pace: pace(due)
+            self.boat.step(due - self.clock.now); self.clock.advance_to(due)
+            self._emit(pgn, due)
+            heapq.heappush(self._schedule, (due + 1.0 / self.rates_hz[pgn], pgn))
+        self.boat.step(end_time - self.clock.now); self.clock.advance_to(end_time)
+
+    def run_for(self, seconds):
+        self.run_until(self.clock.now + seconds)
+
+    # --- Same threaded interface as MockNMEA2000 ---
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = Thread(target=self._run_realtime, daemon=True)
+            self._thread.start()
+            print(f"SIMULATOR: running at {'max' if not self.speed else f'{self.speed:g}x'} speed.")
+
+    def stop(self):
+        if self._thread and self._thread.is_alive():
+            self._stop_event.set()
+            self._thread.join(timeout=2)
+            print("SIMULATOR: stopped.")
+
+    def _run_realtime(self):
+        wall_start = time.monotonic(); virtual_start = self.clock.now
+        def pace(t):
+            if self.speed:
+                delay = wall_start + (t - virtual_start) / self.speed - time.monotonic()
+                if delay > 0: self._stop_event.wait(delay)
+        while not self._stop_event.is_set():
+            self.run_until(self.clock.now + 1.0, pace)
+
+if __name__ == "__main__":
+    # Headless load test: push a scripted race through the real decoder as fast as possible.
+    import sys
+    rates = {pgn: rate * 10 for pgn, rate in DEFAULT_RATES_HZ.items()}
+    sim = NMEASimulator(scenario=sys.argv[1] if len(sys.argv) > 1 else "race", rates_hz=rates, encode_frames=True, speed=0)
+    decoded = {}
+    for pgn in rates: sim.add_callback(pgn, lambda pgn, data: decoded.__setitem__(pgn, decoded.get(pgn, 0) + 1))
+    start = time.perf_counter(); sim.run_for(600); elapsed = time.perf_counter() - start
+    print(f"{sim.messages_emitted} frames over 600 virtual s in {elapsed:.2f} s wall ({sim.messages_emitted / elapsed:.0f} frames/s)")
+    for pgn, count in sorted(decoded.items()): print(f"  PGN {pgn}: {count} decoded")
@@ -0,0 +1,96 @@
+# polar.py
+import math
+import re
+import numpy as np
+
+class PolarTable:
+    """
+    Boat polar (target boat speed in knots over a TWS x TWA grid).
+
+    Files use the common .pol/.csv layout: a header row of TWS values and one
+    row per TWA, separated by semicolons, commas, tabs or spaces. The table
+    is resampled onto a 1-degree by 1-knot grid, a column (and its best-VMG
+    angles) computed the first time a TWS needs it; a query interpolates
+    between the two columns either side of the TWS in plain Python, so a
+    damped TWS that changes on every tick never reruns the numpy work.
+    """
+
+    def __init__(self, tws, twa, speeds):
+        tws = np.asarray(tws, dtype=float); twa = np.asarray(twa, dtype=float); speeds = np.asarray(speeds, dtype=float)
+        if tws[0] > 0: # Anchor the table at zero wind so light air interpolates down to 0.
+            tws = np.concatenate(([0.0], tws)); speeds = np.hstack((np.zeros((speeds.shape[0], 1)), speeds))
+        if twa[0] > 0:
+            twa = np.concatenate(([0.0], twa)); speeds = np.vstack((np.zeros((1, speeds.shape[1])), speeds))
+        self.tws = tws; self.twa = twa; self.speeds = speeds
+        # Angles tighter than the first sailable row are interpolated towards zero, never optimal.
+        self._min_twa = int(math.ceil(twa[np.argmax(speeds.max(axis=1) > 0)]))
+        # Resample every TWS column onto a 1-degree TWA grid once.
+        self._fine_twa = np.arange(0, 181, dtype=float)
+        self._fine = np.column_stack([np.interp(self._fine_twa, twa, speeds[:, i]) for i in range(len(tws))])
+        self._columns = {} # Whole knots of TWS -> (1-degree row as a list, best-VMG angles)
+        self._max_tws = float(tws[-1])
+        self._optimum_tws = None; self._optimum = None # The last optimal_angles(), which performance() and the laylines share
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            rows = [re.split(r"[;,\t ]+", line.strip()) for line in f if line.strip() and not line.startswith('#')]
+        tws = [float(v) for v in rows[0][1:]]
+        twa = [float(row[0]) for row in rows[1:]]
+        speeds = [[float(v) if v else 0.0 for v in row[1:len(tws) + 1]] for row in rows[1:]]
+        return cls(tws, twa, speeds)
+
+    def _column(self, knots):
+        column = self._columns.get(knots)
+        if column is None: column = self._columns[knots] = self._build_column(float(knots))
+        return column
+
+    def _build_column(self, tws_kts):
+        i = int(np.clip(np.searchsorted(self.tws, tws_kts) - 1, 0, len(self.tws) - 2))
+        w = float(np.clip((tws_kts - self.tws[i]) / (self.tws[i + 1] - self.tws[i]), 0.0, 1.0))
+        row = (1 - w) * self._fine[:, i] + w * self._fine[:, i + 1]
+        vmg = row * np.cos(np.radians(self._fine_twa))
+        up = self._min_twa + int(np.argmax(vmg[self._min_twa:90])); down = 90 + int(np.argmin(vmg[90:]))
+        return row.tolist(), {
+            'upwind_twa': float(self._fine_twa[up]), 'upwind_speed': float(row[up]), 'upwind_vmg': float(vmg[up]),
+            'downwind_twa': float(self._fine_twa[down]), 'downwind_speed': float(row[down]), 'downwind_vmg': float(-vmg[down])
+        }
+
+    def _columns_for(self, tws_kts):
+        """The columns either side of tws_kts (clamped to the table) and the weight of the upper one."""
+        tws_kts = min(max(tws_kts, 0.0), self._max_tws)
+        knots = min(int(tws_kts), int(math.ceil(self._max_tws)) - 1)
+        return self._column(knots), self._column(knots + 1), tws_kts - knots
+
+    def target_speed(self, tws_kts, twa_deg):
+        """Bilinear target boat speed (knots). TWA is folded onto 0-180 degrees."""
+        (low, _), (high, _), w = self._columns_for(tws_kts)
+        twa = abs((twa_deg + 180) % 360 - 180)
+        i = min(int(twa), 179); frac = twa - i
+        below = low[i] + frac * (low[i + 1] - low[i]); above = high[i] + frac * (high[i + 1] - high[i])
+        return below + w * (above - below)
+
+    def optimal_angles(self, tws_kts):
+        """Best-VMG upwind and downwind TWA, speed and VMG for the given TWS, interpolated between whole knots."""
+        if tws_kts == self._optimum_tws: return self._optimum
+        (_, low), (_, high), w = self._columns_for(tws_kts)
+        self._optimum = low if w == 0.0 else {key: value + w * (high[key] - value) for key, value in low.items()}
+        self._optimum_tws = tws_kts
+        return self._optimum
+
+    @staticmethod
+    def vmg(boat_speed_kts, twa_deg):
+        return boat_speed_kts * math.cos(math.radians(twa_deg))
+
+    def performance(self, tws_kts, twa_deg, boat_speed_kts):
+        """Percent of polar plus the target TWA/speed for the current point of sail."""
+        target = self.target_speed(tws_kts, twa_deg)
+        optimum = self.optimal_angles(tws_kts)
+        upwind = abs((twa_deg + 180) % 360 - 180) < 90
+        return {
+            'target_speed': target,
+            'percent_polar': 100.0 * boat_speed_kts / target if target > 0 else 0.0,
+            'vmg': self.vmg(boat_speed_kts, abs((twa_deg + 180) % 360 - 180)),
+            'target_twa': optimum['upwind_twa'] if upwind else optimum['downwind_twa'],
+            'target_vmg': optimum['upwind_vmg'] if upwind else optimum['downwind_vmg']
+        }
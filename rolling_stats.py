@@ -0,0 +1,165 @@
+# rolling_stats.py
+import math
+from collections import deque
+from threading import Lock
+
+# Channel -> (regression/extrema window, EWMA time constant), seconds.
+TREND_WINDOWS = {
+    'wind': (5 * 60.0, 30.0),            # Wind speed in knots: building or easing over the last 5 minutes
+    'pressure': (3 * 3600.0, 10 * 60.0), # Pressure in Pa: barometric tendency is defined over 3 hours
+}
+
+def trend_text(change, steady_below, decimals=1):
+    """'▲ 1.2' / '▼ 0.8', or '= 0.1' when the change over the window is within steady_below."""
+    if change is None: return ""
+    arrow = "=" if abs(change) < steady_below else "▲" if change > 0 else "▼"
+    return f"{arrow} {abs(change):.{decimals}f}"
+
+class EWMA:
+    """Exponentially weighted moving average with a time constant, so irregular sample rates weigh correctly."""
+    __slots__ = ('tau_s', 'value', '_t')
+
+    def __init__(self, tau_s):
+        self.tau_s = tau_s; self.value = None; self._t = None
+
+    def update(self, t, x):
+        if self.value is None: self.value = x
+        elif t > self._t: self.value += (1.0 - math.exp(-(t - self._t) / self.tau_s)) * (x - self.value)
+        else: return self.value # Same or older timestamp: keep the average we have
+        self._t = t
+        return self.value
+
+class RollingExtrema:
+    """Min and max over the last window_s seconds from two monotonic deques: amortised O(1) per sample."""
+    def __init__(self, window_s):
+        self.window_s = window_s
+        self._min = deque(); self._max = deque() # (t, x), x increasing / decreasing from the left
+
+    def update(self, t, x):
+        lows = self._min; highs = self._max
+        while lows and lows[-1][1] >= x: lows.pop()
+        lows.append((t, x))
+        while highs and highs[-1][1] <= x: highs.pop()
+        highs.append((t, x))
+        cutoff = t - self.window_s
+        while lows[0][0] < cutoff: lows.popleft()   # The newest sample is always inside the window,
+        while highs[0][0] < cutoff: highs.popleft() # so neither deque can empty here
+
+    @property
+    def minimum(self): return self._min[0][1] if self._min else None
+
+    @property
+    def maximum(self): return self._max[0][1] if self._max else None
+
+class RollingSlope:
+    """
+    Least-squares slope of x against t over the last window_s seconds, from
+    running sums that are added to and subtracted from as samples enter and
+    leave the window. Times and values are kept relative to a reference
+    sample, which moves to the oldest sample on every rebuild so the sums
+    stay small and float error can't accumulate.
+    """
+    def __init__(self, window_s, rebuild_every=4096):
+        self.window_s = window_s; self.rebuild_every = rebuild_every
+        self.samples = deque()
+        self._t0 = self._x0 = None
+        self._st = self._stt = self._sx = self._stx = 0.0
+        self._updates = 0
+
+    def update(self, t, x):
+        if self._t0 is None: self._t0 = t; self._x0 = x
+        if self.samples and t - self._t0 <= self.samples[-1][0]: return # Duplicate or out of order
+        dt = t - self._t0; dx = x - self._x0
+        self.samples.append((dt, dx))
+        self._st += dt; self._stt += dt * dt; self._sx += dx; self._stx += dt * dx
+        cutoff = dt - self.window_s
+        while self.samples[0][0] < cutoff:
+            ot, ox = self.samples.popleft()
+            self._st -= ot; self._stt -= ot * ot; self._sx -= ox; self._stx -= ot * ox
+        self._updates += 1
+        if self._updates >= self.rebuild_every: self._rebuild()
+
+    def _rebuild(self):
+        ot, ox = self.samples[0]
+        self._t0 += ot; self._x0 += ox
+        self.samples = deque((t - ot, x - ox) for t, x in self.samples)
+        self._st = self._stt = self._sx = self._stx = 0.0
+        for t, x in self.samples:
+            self._st += t; self._stt += t * t; self._sx += x; self._stx += t * x
+        self._updates = 0
+
+    @property
+    def count(self): return len(self.samples)
+
+    @property
+    def span_s(self): return self.samples[-1][0] - self.samples[0][0] if self.samples else 0.0
+
+    @property
+    def slope(self):
+        """Units of x per second, or None until there are two distinct times."""
+        n = len(self.samples)
+        if n < 2: return None
+        denominator = n * self._stt - self._st * self._st
+        if denominator <= 1e-12: return None
+        return (n * self._stx - self._st * self._sx) / denominator
+
+class RollingStats:
+    """EWMA, rolling min/max and regression slope of one channel, updated together."""
+    def __init__(self, window_s, ewma_tau_s):
+        self.window_s = window_s
+        self.ewma = EWMA(ewma_tau_s)
+        self.extrema = RollingExtrema(window_s)
+        self.fit = RollingSlope(window_s)
+        self.last = None
+
+    def update(self, t, x):
+        self.last = x
+        self.ewma.update(t, x); self.extrema.update(t, x); self.fit.update(t, x)
+
+    def snapshot(self):
+        slope = self.fit.slope
+        return {'value': self.last, 'ewma': self.ewma.value, 'min': self.extrema.minimum, 'max': self.extrema.maximum,
+                'slope_per_s': slope, 'change_per_window': slope * self.window_s if slope is not None else None,
+                'window_s': self.window_s, 'span_s': self.fit.span_s, 'count': self.fit.count}
+
+class TrendEngine:
+    """
+    RollingStats per instrument channel. update() runs on the data source
+    thread and snapshot() on the reader's, so both take a (per-engine,
+    uncontended) lock; the GUI only ever receives finished snapshots.
+    """
+    def __init__(self, windows=TREND_WINDOWS):
+        self.channels = {name: RollingStats(window_s, tau_s) for name, (window_s, tau_s) in windows.items()}
+        self._lock = Lock()
+
+    def update(self, channel, t, x):
+        with self._lock: self.channels[channel].update(t, x)
+
+    def snapshot(self):
+        """{channel: RollingStats.snapshot()} for channels that have data."""
+        with self._lock:
+            return {name: stats.snapshot() for name, stats in self.channels.items() if stats.last is not None}
+
+if __name__ == "__main__":
+    # Self-check against brute force over the same window, plus per-update cost.
+    import random, time
+    rng = random.Random(3)
+    stats = RollingStats(window_s=300.0, ewma_tau_s=30.0)
+    history = []; t = 0.0
+    for i in range(20000):
+        t += rng.uniform(0.2, 1.8) # Irregular sampling
+        x = 12.0 + 0.002 * t + rng.gauss(0, 1.5)
+        stats.update(t, x); history.append((t, x))
+        if i and (i % 997 == 0 or i == 19999):
+            window = [(wt, wx) for wt, wx in history if wt >= t - 300.0]
+            n = len(window); mt = sum(w[0] for w in window) / n; mx = sum(w[1] for w in window) / n
+            slope = sum((wt - mt) * (wx - mx) for wt, wx in window) / sum((wt - mt) ** 2 for wt, _ in window)
+            snapshot = stats.snapshot()
+            assert snapshot['min'] == min(w[1] for w in window) and snapshot['max'] == max(w[1] for w in window)
+            assert abs(snapshot['slope_per_s'] - slope) < 1e-9, (snapshot['slope_per_s'], slope)
+    print(f"Slope over last 5 min {snapshot['slope_per_s']:.5f}/s (true 0.00200), EWMA {snapshot['ewma']:.2f}, range {snapshot['min']:.1f}..{snapshot['max']:.1f}")
+
+    engine = TrendEngine(); n = 100000; start = time.perf_counter()
+    for i in range(n): engine.update('pressure', i * 1.0, 101325.0 + i * 0.01)
+    print(f"TrendEngine.update {(time.perf_counter() - start) / n * 1e6:.2f} us, pressure change over 3 h {engine.snapshot()['pressure']['change_per_window']:.1f} Pa (true 108.0)")
+    print("OK")
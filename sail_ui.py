@@ -5,7 +5,8 @@ from PySide6.QtGui import QKeyEvent
 from views.standard_view import StandardSailView
 from views.no_wind_arrow_view import NoWindArrowView
 from views.race.race_view_widget import RaceViewWidget
-from theme import LIGHT_THEME, DARK_THEME
+from theme import STYLESHEETS
+from latency_tracer import tracer
 
 class SailUI(QWidget):
     escape_pressed = Signal()
@@ -27,6 +28,7 @@ class SailUI(QWidget):
         self.stacked_widget.addWidget(self.no_wind_arrow_view)
         self.stacked_widget.addWidget(self.race_view)
         self.main_layout.addWidget(self.stacked_widget)
+        self.is_light_mode = None
         self.setTheme(False)
 
     def keyPressEvent(self, event: QKeyEvent):
@@ -44,8 +46,10 @@ class SailUI(QWidget):
 
     @Slot(bool)
     def setTheme(self,is_light_mode):
-        theme=LIGHT_THEME if is_light_mode else DARK_THEME
-        self.setStyleSheet(f"background-color: {theme['bg']};")
+        """One precomputed stylesheet for the whole window (a single polish pass), then the painted items' pens."""
+        if is_light_mode==self.is_light_mode: return
+        self.is_light_mode=is_light_mode
+        self.setStyleSheet(STYLESHEETS[is_light_mode])
         if hasattr(self.standard_view,'setTheme'): self.standard_view.setTheme(is_light_mode)
         if hasattr(self.race_view,'setTheme'): self.race_view.setTheme(is_light_mode)
 
@@ -53,9 +57,16 @@ class SailUI(QWidget):
     def load_race_course(self,race_dir): self.race_view.load_course(race_dir)
     @Slot(float,float,str)
     def update_wind_display(self,speed_mps,angle_rad,reference):
+        if tracer.enabled: tracer.ui_apply(130306)
         self.standard_view.update_wind_display(speed_mps,angle_rad,reference); self.race_view.update_wind_display(speed_mps,angle_rad,reference)
+    @Slot(dict)
+    def update_trend_display(self,trends): self.race_view.update_trend_display(trends)
+    @Slot(float,float,float)
+    def update_true_wind_display(self,speed_mps,angle_rad,direction_rad): self.race_view.update_true_wind(speed_mps,angle_rad,direction_rad)
     @Slot(float)
-    def update_depth_display(self,depth_meters): self.standard_view.update_depth_display(depth_meters)
+    def update_depth_display(self,depth_meters):
+        if tracer.enabled: tracer.ui_apply(128267)
+        self.standard_view.update_depth_display(depth_meters)
     @Slot(float)
     def update_speed_display(self,speed_knots):
         self.standard_view.update_speed_display(speed_knots); self.race_view.update_speed_display(speed_knots)
\ No newline at end of file
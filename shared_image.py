@@ -1,18 +1,28 @@
 # shared_image.py
 from threading import Lock
 import io
+import zlib
 
 class SharedImage:
     def __init__(self):
         self.image_bytes = None
+        self.etag = None # Changes only when the image does, so e-ink clients can poll with If-None-Match
         self.lock = Lock()
 
     def update_image(self, pil_image):
+        byte_arr = io.BytesIO()
+        pil_image.save(byte_arr, format='BMP')
+        image_bytes = byte_arr.getvalue()
         with self.lock:
-            byte_arr = io.BytesIO()
-            pil_image.save(byte_arr, format='BMP')
-            self.image_bytes = byte_arr.getvalue()
+            self.image_bytes = image_bytes
+            self.etag = f"{zlib.crc32(image_bytes):08x}-{len(image_bytes)}"
+        return image_bytes
 
     def get_image_bytes(self):
         with self.lock:
             return self.image_bytes
+
+    def get_image(self):
+        """(bytes, etag) from the same update."""
+        with self.lock:
+            return self.image_bytes, self.etag
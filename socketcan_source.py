@@ -0,0 +1,147 @@
+# socketcan_source.py
+import select
+import socket
+import struct
+import time
+from threading import Thread, Event
+from data_sources import DataSource
+from nmea_reader import CanFrame
+
+# struct can_frame: 32-bit id (with EFF/RTR/ERR flags), length, 3 padding/reserved bytes, 8 data bytes.
+CAN_FRAME = struct.Struct('=IB3x8s')
+CAN_FILTER = struct.Struct('=II')
+PGN_ID_MASK = 0x1FFFF << 8
+PDU1_PGN_ID_MASK = 0x1FF00 << 8 # PDU1 (PF < 240) PGNs carry the destination address in their low byte
+SO_TIMESTAMP = getattr(socket, 'SO_TIMESTAMP', 29) # Linux's value; the socket module doesn't export it
+TIMEVAL = struct.Struct('@ll')
+TIMESTAMP_SPACE = socket.CMSG_SPACE(TIMEVAL.size)
+
+def pgn_filter(pgn):
+    """Kernel can_filter matching any priority and source for one PGN, extended frames only."""
+    mask = PDU1_PGN_ID_MASK if ((pgn >> 8) & 0xFF) < 240 else PGN_ID_MASK
+    return CAN_FILTER.pack(((pgn << 8) & mask) | socket.CAN_EFF_FLAG, mask | socket.CAN_EFF_FLAG)
+
+class RawSocketCanSource(DataSource):
+    """
+    Reads a SocketCAN interface directly instead of through python-can. The
+    kernel only passes up the PGNs that have callbacks (CAN_RAW_FILTER), and
+    frames are drained into a preallocated buffer with non-blocking
+    recv_into calls, then decoded a batch at a time, so CPU follows the
+    frames we use rather than total backbone load. Each frame keeps the
+    time the kernel received it (SO_TIMESTAMP), so two GPS fixes drained in
+    one batch stay two fixes rather than one duplicate.
+    """
+    name = "socketcan"
+
+    def __init__(self, channel='can0', batch_frames=64, filtered=True, sock=None):
+        super().__init__()
+        self.channel = channel
+        self.batch_frames = batch_frames
+        self.filtered = filtered
+        self._sock = sock
+        self._buffer = bytearray(CAN_FRAME.size * batch_frames)
+        self._times = [0.0] * batch_frames # Receive time of each frame in the buffer
+        self._stop_event = Event(); self._thread = None
+        self.batches = 0; self.cpu_s = 0.0
+
+    def add_callback(self, pgn, func):
+        super().add_callback(pgn, func)
+        if self._sock and self.filtered and self._thread: self.install_filters()
+
+    def install_filters(self):
+        filters = b''.join(pgn_filter(pgn) for pgn in sorted(self.parser.callbacks))
+        # An empty filter list would mean "receive nothing", which is right when nothing is subscribed.
+        self._sock.setsockopt(socket.SOL_CAN_RAW, socket.CAN_RAW_FILTER, filters)
+
+    def start(self):
+        super().start()
+        self.batches = 0; self.cpu_s = 0.0
+        if self._sock is None:
+            self._sock = socket.socket(socket.PF_CAN, socket.SOCK_RAW, socket.CAN_RAW)
+            self._sock.bind((self.channel,))
+        if self.filtered and self._sock.family == socket.PF_CAN: self.install_filters()
+        try: self._sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMP, 1)
+        except OSError: pass # Frames get the time they were read instead
+        self._sock.setblocking(False)
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread: self._thread.join(timeout=2)
+        if self._sock: self._sock.close()
+        self._sock = None; self._thread = None
+
+    def _receive_batch(self):
+        """Waits (up to 0.5 s) for the first frame, then drains whatever else is queued."""
+        if not select.select([self._sock], [], [], 0.5)[0]: return 0
+        view = memoryview(self._buffer); size = CAN_FRAME.size; times = self._times
+        count = 0
+        while count < self.batch_frames:
+            offset = count * size
+            try: received, ancillary, _, _ = self._sock.recvmsg_into([view[offset:offset + size]], TIMESTAMP_SPACE)
+            except (BlockingIOError, InterruptedError): break
+            if received < size: break
+            times[count] = time.time()
+            for level, kind, data in ancillary:
+                if level == socket.SOL_SOCKET and kind == SO_TIMESTAMP:
+                    seconds, microseconds = TIMEVAL.unpack_from(data); times[count] = seconds + microseconds * 1e-6
+            count += 1
+        return count
+
+    def _run(self):
+        cpu_start = time.thread_time()
+        while not self._stop_event.is_set():
+            try: count = self._receive_batch()
+            except OSError: break
+            if count: self.handle_batch(count)
+            self.cpu_s = time.thread_time() - cpu_start
+
+    def handle_batch(self, count):
+        self.batches += 1
+        frames = CAN_FRAME.iter_unpack(memoryview(self._buffer)[:count * CAN_FRAME.size])
+        sink = self.frame_sink; dispatch = self.parser.dispatch
+        for timestamp, (can_id, length, data) in zip(self._times, frames):
+            self._frame_time = timestamp
+            self.frames += 1
+            if not can_id & socket.CAN_EFF_FLAG: continue # NMEA 2000 is extended frames only
+            arbitration_id = can_id & socket.CAN_EFF_MASK; data = data[:length]
+            if sink: sink(CanFrame(arbitration_id, data, timestamp))
+            try: dispatch(arbitration_id, data, timestamp)
+            except (struct.error, IndexError, ValueError): self.errors += 1
+
+    def stats(self):
+        stats = super().stats()
+        stats.update({'batches': self.batches, 'frames_per_batch': self.frames / self.batches if self.batches else None,
+                      'reader_cpu_s': self.cpu_s})
+        return stats
+
+if __name__ == "__main__":
+    # Benchmark on a virtual bus, no hardware needed:
+    #   sudo modprobe vcan && sudo ip link add dev vcan0 type vcan && sudo ip link set up vcan0
+    #   python socketcan_source.py vcan0 200000
+    # Floods the bus with 90% frames nobody subscribes to and compares reader CPU with and without kernel filters.
+    import sys
+    from nmea_reader import encode_pgn
+    channel = sys.argv[1] if len(sys.argv) > 1 else 'vcan0'
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    wanted = encode_pgn(130306, {'WindSpeed': 5.0, 'WindAngle': 1.0, 'Reference': "Apparent"}, source=1)
+    noise = [CAN_FRAME.pack(((2 << 26) | (pgn << 8) | 0x10) | socket.CAN_EFF_FLAG, 8, b'\x00' * 8) for pgn in (127488, 127489, 129026, 126992, 127245, 127257, 128259, 129029, 130312)]
+    frames = noise + [CAN_FRAME.pack(wanted.arbitration_id | socket.CAN_EFF_FLAG, 8, wanted.data)]
+
+    for filtered in (False, True):
+        source = RawSocketCanSource(channel, filtered=filtered)
+        source.add_callback(130306, lambda pgn, data: None)
+        source.start()
+        sender = socket.socket(socket.PF_CAN, socket.SOCK_RAW, socket.CAN_RAW); sender.bind((channel,))
+        start = time.perf_counter()
+        for i in range(total):
+            while True:
+                try: sender.send(frames[i % len(frames)]); break
+                except OSError: time.sleep(0.0005) # Transmit queue full
+        time.sleep(0.5); source.stop(); sender.close()
+        stats = source.stats()
+        print(f"{'filtered  ' if filtered else 'unfiltered'}: {total} sent in {time.perf_counter() - start:.2f} s, "
+              f"{stats['frames']} frames reached Python in {stats['batches']} batches, "
+              f"{stats['messages']} decoded, reader CPU {stats['reader_cpu_s']:.3f} s")
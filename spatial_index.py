@@ -0,0 +1,135 @@
+# spatial_index.py
+import math
+
+EARTH_RADIUS_M = 6371000
+
+class LocalProjection:
+    """
+    Equirectangular projection around a fixed origin. Accurate to well under a
+    metre over a race course or anchorage, and far cheaper than a haversine.
+    """
+    def __init__(self, origin_lat, origin_lon):
+        self.origin_lat = origin_lat
+        self.origin_lon = origin_lon
+        self._lat0_rad = math.radians(origin_lat)
+        self._kx = EARTH_RADIUS_M * math.cos(self._lat0_rad) * math.pi / 180
+        self._ky = EARTH_RADIUS_M * math.pi / 180
+
+    def to_xy(self, lat, lon):
+        """Degrees in, metres east/north of the origin out."""
+        return (lon - self.origin_lon) * self._kx, (lat - self.origin_lat) * self._ky
+
+    def to_latlon(self, x, y):
+        return self.origin_lat + y / self._ky, self.origin_lon + x / self._kx
+
+class SpatialIndex:
+    """
+    Uniform grid over projected metres holding marks, waypoints and circular
+    hazard zones. Each entry is registered in every cell its radius touches, so
+    "which zones contain this point" is a single cell lookup.
+    """
+    def __init__(self, origin_lat, origin_lon, cell_size_m=50.0):
+        self.projection = LocalProjection(origin_lat, origin_lon)
+        self.cell_size_m = cell_size_m
+        self.entries = {}
+        self._cells = {}
+
+    def __len__(self): return len(self.entries)
+    def __contains__(self, key): return key in self.entries
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cell_size_m)), int(math.floor(y / self.cell_size_m))
+
+    def _cells_for(self, x, y, radius_m):
+        cx0, cy0 = self._cell(x - radius_m, y - radius_m)
+        cx1, cy1 = self._cell(x + radius_m, y + radius_m)
+        return [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+
+    def add(self, key, lat, lon, kind="mark", radius_m=0.0, data=None):
+        """Adds (or replaces) an entry. `radius_m` is the zone radius used by contains()."""
+        if key in self.entries: self.remove(key)
+        x, y = self.projection.to_xy(lat, lon)
+        entry = {'key': key, 'kind': kind, 'lat': lat, 'lon': lon, 'x': x, 'y': y,
+                 'radius_m': radius_m, 'data': data, 'cells': self._cells_for(x, y, radius_m)}
+        for cell in entry['cells']: self._cells.setdefault(cell, []).append(entry)
+        self.entries[key] = entry
+        return entry
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if not entry: return
+        for cell in entry['cells']:
+            bucket = self._cells.get(cell)
+            if bucket:
+                bucket.remove(entry)
+                if not bucket: del self._cells[cell]
+
+    def clear(self):
+        self.entries.clear(); self._cells.clear()
+
+    def distance_to(self, key, lat, lon):
+        entry = self.entries[key]
+        x, y = self.projection.to_xy(lat, lon)
+        return math.hypot(x - entry['x'], y - entry['y'])
+
+    def contains(self, lat, lon, kind=None):
+        """Returns [(distance_m, entry)] for every zone whose radius covers the point."""
+        x, y = self.projection.to_xy(lat, lon)
+        hits = []
+        for entry in self._cells.get(self._cell(x, y), ()):
+            if kind and entry['kind'] != kind: continue
+            d = math.hypot(x - entry['x'], y - entry['y'])
+            if d <= entry['radius_m']: hits.append((d, entry))
+        return hits
+
+    def within(self, lat, lon, radius_m, kind=None):
+        """Returns [(distance_m, entry)] for entries within radius_m of the point, nearest first."""
+        x, y = self.projection.to_xy(lat, lon)
+        seen = set(); hits = []
+        for cell in self._cells_for(x, y, radius_m):
+            for entry in self._cells.get(cell, ()):
+                if entry['key'] in seen or (kind and entry['kind'] != kind): continue
+                seen.add(entry['key'])
+                d = math.hypot(x - entry['x'], y - entry['y'])
+                if d <= radius_m: hits.append((d, entry))
+        hits.sort(key=lambda hit: hit[0])
+        return hits
+
+    def nearest(self, lat, lon, kind=None, max_radius_m=5000.0):
+        """Expanding ring search. Returns (distance_m, entry) or None."""
+        x, y = self.projection.to_xy(lat, lon)
+        cx, cy = self._cell(x, y)
+        best = None; seen = set(); ring = 0
+        max_ring = int(max_radius_m / self.cell_size_m) + 1
+        while ring <= max_ring:
+            for gx in range(cx - ring, cx + ring + 1):
+                for gy in range(cy - ring, cy + ring + 1):
+                    if max(abs(gx - cx), abs(gy - cy)) != ring: continue
+                    for entry in self._cells.get((gx, gy), ()):
+                        if entry['key'] in seen or (kind and entry['kind'] != kind): continue
+                        seen.add(entry['key'])
+                        d = math.hypot(x - entry['x'], y - entry['y'])
+                        if d <= max_radius_m and (best is None or d < best[0]): best = (d, entry)
+            # Anything in ring N+1 is at least N cells away.
+            if best and best[0] <= ring * self.cell_size_m: break
+            ring += 1
+        return best
+
+class ProximityMonitor:
+    """
+    Tracks which zones of a SpatialIndex the boat is inside and reports only the
+    transitions, so mark rounding and anchor alarms share one code path.
+    """
+    def __init__(self, index):
+        self.index = index
+        self.inside = set()
+
+    def reset(self): self.inside.clear()
+
+    def update(self, lat, lon):
+        """Returns (entered, exited) lists of entries for this fix."""
+        hits = {entry['key']: entry for _, entry in self.index.contains(lat, lon)}
+        entered = [hits[key] for key in hits.keys() - self.inside]
+        exited = [self.index.entries[key] for key in self.inside - hits.keys() if key in self.index.entries]
+        self.inside = set(hits)
+        return entered, exited
@@ -0,0 +1,48 @@
+# startup_profile.py
+import builtins
+import sys
+import time
+
+class StartupProfile:
+    """
+    Startup timeline behind --profile-startup: mark() stages as they finish,
+    and while enabled every import is timed (inclusive of what it imports in
+    turn) so report() can list the slowest modules. Disabled, mark() only
+    appends a timestamp and imports are untouched.
+    """
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.marks = []
+        self.imports = {} # module name -> seconds, first (real) import only
+        self._original_import = None
+        if enabled: self._hook_imports()
+
+    def _hook_imports(self):
+        original = self._original_import = builtins.__import__
+        imports = self.imports; modules = sys.modules
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in modules: return original(name, globals, locals, fromlist, level)
+            start = time.perf_counter()
+            try: return original(name, globals, locals, fromlist, level)
+            finally: imports.setdefault(name, time.perf_counter() - start)
+        builtins.__import__ = timed_import
+
+    def mark(self, stage):
+        self.marks.append((stage, time.perf_counter(), len(sys.modules)))
+
+    def report(self, top=15):
+        """Prints the stage timeline and the slowest imports, then stops timing imports."""
+        if not self.enabled: return
+        if self._original_import: builtins.__import__ = self._original_import; self._original_import = None
+        print("Startup profile (ms since process start of this module):")
+        previous = self.start
+        for stage, at, modules in self.marks:
+            print(f"  {stage:32s} +{(at - previous) * 1e3:8.1f}  = {(at - self.start) * 1e3:8.1f}   {modules} modules")
+            previous = at
+        print(f"Slowest imports (inclusive ms), top {top}:")
+        for name, seconds in sorted(self.imports.items(), key=lambda item: -item[1])[:top]:
+            print(f"  {name:32s} {seconds * 1e3:8.1f}")
+
+profile = StartupProfile('--profile-startup' in sys.argv)
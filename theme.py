@@ -1,5 +1,6 @@
 # theme.py
-from PySide6.QtGui import QColor
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QFont, QPen
 
 DARK_THEME = {
     "bg": "#282828",
@@ -15,4 +16,48 @@ LIGHT_THEME = {
     "text_secondary": "#505050",
     "boat": QColor(80, 80, 80),
     "arrow": QColor(0, 0, 0)
-}
\ No newline at end of file
+}
+
+THEMES = {False: DARK_THEME, True: LIGHT_THEME} # Keyed by is_light_mode, as the theme_changed signal sends it
+FONT_FAMILY = "Oxanium"
+
+# Themes are applied once, at the top-level window: labels carry a "tone"
+# dynamic property and a font set at construction (instrument tiles take
+# their colours as qproperties), so a switch is a single
+# setStyleSheet (one polish pass over the tree) plus swapping cached pens and
+# colours on the painted items. Nothing is built per switch.
+def _stylesheet(theme):
+    return (f"QWidget {{ background-color: {theme['bg']}; }}\n"
+            f"QLabel[tone=\"primary\"] {{ color: {theme['text_primary']}; }}\n"
+            f"QLabel[tone=\"secondary\"] {{ color: {theme['text_secondary']}; }}\n"
+            f"InstrumentTile {{ qproperty-primaryColor: {theme['text_primary']}; qproperty-secondaryColor: {theme['text_secondary']}; }}")
+
+STYLESHEETS = {is_light: _stylesheet(theme) for is_light, theme in THEMES.items()}
+_fonts = {}; _pens = {}; _colors = {}
+
+def font(pixel_size, bold=True):
+    """A shared QFont, created on first use (QFont wants a QGuiApplication)."""
+    key = (pixel_size, bold)
+    cached = _fonts.get(key)
+    if cached is None:
+        cached = _fonts[key] = QFont(FONT_FAMILY)
+        cached.setPixelSize(pixel_size); cached.setBold(bold)
+    return cached
+
+def pen(is_light_mode, color_key, width, style=Qt.SolidLine, cap=Qt.SquareCap):
+    """A shared QPen in a theme colour."""
+    key = (is_light_mode, color_key, width, style, cap)
+    cached = _pens.get(key)
+    if cached is None: cached = _pens[key] = QPen(QColor(THEMES[is_light_mode][color_key]), width, style, cap)
+    return cached
+
+def color(is_light_mode, color_key):
+    key = (is_light_mode, color_key)
+    cached = _colors.get(key)
+    if cached is None: cached = _colors[key] = QColor(THEMES[is_light_mode][color_key])
+    return cached
+
+def style_label(label, pixel_size, tone="secondary", bold=True):
+    """Gives a label its font and tone ("primary" or "secondary") once; the top-level stylesheet colours it."""
+    label.setFont(font(pixel_size, bold))
+    label.setProperty("tone", tone)
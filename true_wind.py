@@ -0,0 +1,99 @@
+# true_wind.py
+import math
+import time
+
+KNOTS_TO_MPS = 0.514444
+
+class DampingFilter:
+    """First-order low-pass with a time constant in seconds (0 disables damping)."""
+    def __init__(self, time_constant_s):
+        self.time_constant_s = time_constant_s
+        self.value = None; self.last_time = None
+
+    def update(self, value, timestamp):
+        if self.value is None or self.time_constant_s <= 0:
+            self.value = value
+        else:
+            dt = max(timestamp - self.last_time, 0.0)
+            self.value += (1 - math.exp(-dt / self.time_constant_s)) * (value - self.value)
+        self.last_time = timestamp
+        return self.value
+
+class AngleDampingFilter:
+    """Damps an angle (radians) through its sin/cos components so 359->1 degree does not swing through 180."""
+    def __init__(self, time_constant_s):
+        self._sin = DampingFilter(time_constant_s); self._cos = DampingFilter(time_constant_s)
+
+    def update(self, angle_rad, timestamp):
+        s = self._sin.update(math.sin(angle_rad), timestamp); c = self._cos.update(math.cos(angle_rad), timestamp)
+        return math.atan2(s, c) % (2 * math.pi)
+
+class AlignedChannel:
+    """
+    Holds the last two samples of a channel so it can be read at another
+    channel's timestamp. Values are linearly interpolated (or extrapolated up
+    to max_age_s); angle channels are unwrapped first.
+    """
+    def __init__(self, max_age_s, is_angle=False):
+        self.max_age_s = max_age_s; self.is_angle = is_angle
+        self.prev = None; self.last = None
+
+    def add(self, value, timestamp):
+        self.prev = self.last; self.last = (timestamp, value)
+
+    def value_at(self, timestamp):
+        if self.last is None or abs(timestamp - self.last[0]) > self.max_age_s: return None
+        t1, v1 = self.last
+        if self.prev is None or t1 <= self.prev[0]: return v1
+        t0, v0 = self.prev
+        delta = v1 - v0
+        if self.is_angle: delta = (delta + math.pi) % (2 * math.pi) - math.pi
+        value = v1 + delta * (timestamp - t1) / (t1 - t0)
+        return value % (2 * math.pi) if self.is_angle else value
+
+class TrueWindCalculator:
+    """
+    Derives true wind speed, angle and direction from apparent wind and boat
+    motion. Speed over ground stands in for speed through water, and COG for
+    heading when no heading sensor is fresh.
+    """
+    def __init__(self, apparent_tau_s=1.0, motion_tau_s=2.0, true_tau_s=3.0, max_age_s=3.0):
+        self.sog = AlignedChannel(max_age_s); self.cog = AlignedChannel(max_age_s, is_angle=True)
+        self.heading = AlignedChannel(max_age_s, is_angle=True)
+        self._aws = DampingFilter(apparent_tau_s); self._awa = AngleDampingFilter(apparent_tau_s)
+        self._sog = DampingFilter(motion_tau_s)
+        self._tws = DampingFilter(true_tau_s); self._twa = AngleDampingFilter(true_tau_s); self._twd = AngleDampingFilter(true_tau_s)
+        self.ticks = 0; self.total_compute_s = 0.0; self.max_compute_s = 0.0
+
+    def update_motion(self, sog_kts, cog_deg, timestamp):
+        self.sog.add(sog_kts * KNOTS_TO_MPS, timestamp); self.cog.add(math.radians(cog_deg), timestamp)
+
+    def update_heading(self, heading_rad, timestamp):
+        self.heading.add(heading_rad, timestamp)
+
+    def update_apparent(self, aws_mps, awa_rad, timestamp):
+        """Returns damped (tws_mps, twa_rad, twd_rad), or None while boat motion is unknown or stale."""
+        start = time.perf_counter()
+        sog = self.sog.value_at(timestamp); cog = self.cog.value_at(timestamp)
+        if sog is None or cog is None: return None
+        heading = self.heading.value_at(timestamp)
+        if heading is None: heading = cog
+        aws = self._aws.update(aws_mps, timestamp); awa = self._awa.update(awa_rad, timestamp)
+        sog = self._sog.update(sog, timestamp)
+        # Work in the boat frame: x forward, y to starboard, vectors point where the wind comes from.
+        drift = cog - heading
+        tx = aws * math.cos(awa) - sog * math.cos(drift)
+        ty = aws * math.sin(awa) - sog * math.sin(drift)
+        tws = self._tws.update(math.hypot(tx, ty), timestamp)
+        twa_raw = math.atan2(ty, tx) % (2 * math.pi)
+        twa = self._twa.update(twa_raw, timestamp)
+        twd = self._twd.update((heading + twa_raw) % (2 * math.pi), timestamp)
+        elapsed = time.perf_counter() - start
+        self.ticks += 1; self.total_compute_s += elapsed; self.max_compute_s = max(self.max_compute_s, elapsed)
+        return tws, twa, twd
+
+    def stats(self):
+        """Per-tick cost of the derivation in microseconds."""
+        return {'ticks': self.ticks,
+                'avg_us': 1e6 * self.total_compute_s / self.ticks if self.ticks else 0.0,
+                'max_us': 1e6 * self.max_compute_s}
@@ -0,0 +1,108 @@
+# views/instrument_tile.py
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QPointF, QRect, Property
+from PySide6.QtGui import QPainter, QColor, QStaticText, QFontMetrics, QTransform
+import theme
+
+TITLE, VALUE, UNIT, TREND = range(4)
+
+class InstrumentTile(QWidget):
+    """
+    One instrument: title, value, unit and an optional trend, painted from
+    prepared QStaticText at positions worked out once from the font metrics.
+    The value area is sized from value_sample (or value_width), so a new
+    value never changes the tile's size or triggers a layout pass; setValue()
+    only repaints the value's own rect, and only when the formatted text
+    changes. An accessory widget (an arrow, a sparkline) can sit to the right.
+
+    Colours are the primaryColor / secondaryColor properties, which the
+    SailUI stylesheet sets per theme (qproperty-...), so a theme switch still
+    happens in the one polish pass.
+    """
+    CACHE_SIZE = 64 # Prepared texts kept per tile; instrument values repeat a lot
+
+    def __init__(self, title, unit="", title_size=18, value_size=64, unit_size=18, bold=(True, True, False),
+                 value_sample="888", value_width=None, unit_sample=None, trend_size=None, trend_sample="▼ 88.8",
+                 spacing=4, accessory=None, accessory_align=Qt.AlignBottom, accessory_spacing=15, colors=None, parent=None):
+        super().__init__(parent)
+        self.fonts = {TITLE: theme.font(title_size, bold[0]), VALUE: theme.font(value_size, bold[1]), UNIT: theme.font(unit_size, bold[2])}
+        if trend_size: self.fonts[TREND] = theme.font(trend_size)
+        primary, secondary = colors or (theme.DARK_THEME['text_primary'], theme.DARK_THEME['text_secondary'])
+        self._primary = QColor(primary); self._secondary = QColor(secondary); self._unit_color = None
+        self._cache = {}; self._text = {TITLE: title, VALUE: "", UNIT: unit or "", TREND: ""}
+        self.has_unit = unit is not None # None: no unit row at all
+        self._layout(value_sample, value_width, unit_sample, trend_sample, spacing, accessory, accessory_align, accessory_spacing)
+
+    def _layout(self, value_sample, value_width, unit_sample, trend_sample, spacing, accessory, accessory_align, accessory_spacing):
+        metrics = {slot: QFontMetrics(font) for slot, font in self.fonts.items()}
+        title_gap, unit_gap = spacing if isinstance(spacing, tuple) else (spacing, spacing)
+        # Rows run from the cap height down, leaving out the leading a label's box has above its capitals. Values
+        # are digits, signs and degrees, none of which descend, so the value row stops at its baseline.
+        title, value, unit = metrics[TITLE], metrics[VALUE], metrics[UNIT]
+        title_h = title.capHeight() + title.descent()
+        baseline = title_h + title_gap + value.capHeight(); x = value_width or value.horizontalAdvance(value_sample)
+        self.origins = {TITLE: QPointF(0, title.capHeight() - title.ascent()), VALUE: QPointF(0, baseline - value.ascent())}
+        self.rects = {TITLE: QRect(0, 0, title.horizontalAdvance(self._text[TITLE]), title_h),
+                      VALUE: QRect(0, baseline - value.ascent(), x, value.height())}
+        if TREND in self.fonts: # On the value's baseline, to its right
+            x += accessory_spacing; trend = metrics[TREND]; trend_w = trend.horizontalAdvance(trend_sample)
+            self.origins[TREND] = QPointF(x, baseline - trend.ascent())
+            self.rects[TREND] = QRect(x, baseline - trend.ascent(), trend_w, trend.height()); x += trend_w
+        self.accessory = accessory
+        bottom = baseline
+        if accessory:
+            accessory.setParent(self); size = accessory.minimumSize().expandedTo(accessory.sizeHint()); accessory.resize(size)
+            x += accessory_spacing
+            y = baseline - size.height() if accessory_align == Qt.AlignBottom else baseline - (value.capHeight() + size.height()) // 2
+            accessory.move(x, max(y, 0)); x += size.width(); bottom = max(bottom, accessory.geometry().bottom() + 1)
+        unit_top = baseline + unit_gap
+        unit_h = unit.capHeight() + unit.descent() if self.has_unit else 0
+        unit_w = unit.horizontalAdvance(unit_sample if unit_sample is not None else self._text[UNIT])
+        width = max(self.rects[TITLE].width(), x, unit_w)
+        self.origins[UNIT] = QPointF(0, unit_top + unit.capHeight() - unit.ascent()); self.rects[UNIT] = QRect(0, unit_top, width, unit_h)
+        self.setFixedSize(width, max(unit_top + unit_h, bottom))
+
+    def _static(self, slot, text):
+        key = (slot, text)
+        static = self._cache.get(key)
+        if static is None:
+            if len(self._cache) >= self.CACHE_SIZE: self._cache.clear()
+            static = self._cache[key] = QStaticText(text)
+            static.setTextFormat(Qt.PlainText); static.setPerformanceHint(QStaticText.AggressiveCaching)
+            static.prepare(QTransform(), self.fonts[slot])
+        return static
+
+    def _set(self, slot, text):
+        old = self._text[slot]
+        if text == old: return
+        self._text[slot] = text
+        rect = self.rects[slot] & self.rect()
+        # Text wider than its area (a sample that was too short) spills over: repaint the whole tile then.
+        if max(self._static(slot, text).size().width(), self._static(slot, old).size().width() if old else 0) > rect.width(): rect = self.rect()
+        self.update(rect)
+
+    def setValue(self, text): self._set(VALUE, text)
+    def setTrend(self, text): self._set(TREND, text)
+
+    def setUnit(self, text, color=None):
+        """color overrides the secondary colour, e.g. for an alert; None goes back to it."""
+        color = QColor(color) if color else None
+        if color != self._unit_color: self._unit_color = color; self.update(self.rects[UNIT])
+        self._set(UNIT, text)
+
+    def paintEvent(self, event):
+        painter = QPainter(self) # Clipped to the updated rect, so only what changed is rasterised
+        for slot in (TITLE, VALUE, UNIT, TREND):
+            text = self._text[slot]
+            if not text: continue
+            painter.setFont(self.fonts[slot])
+            painter.setPen(self._primary if slot == VALUE else self._unit_color if slot == UNIT and self._unit_color else self._secondary)
+            painter.drawStaticText(self.origins[slot], self._static(slot, text))
+
+    # --- Colours, settable from a stylesheet as qproperty-primaryColor / qproperty-secondaryColor ---
+    def getPrimaryColor(self): return self._primary
+    def setPrimaryColor(self, color): self._primary = QColor(color); self.update()
+    def getSecondaryColor(self): return self._secondary
+    def setSecondaryColor(self, color): self._secondary = QColor(color); self.update()
+    primaryColor = Property(QColor, getPrimaryColor, setPrimaryColor)
+    secondaryColor = Property(QColor, getSecondaryColor, setSecondaryColor)
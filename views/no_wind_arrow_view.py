@@ -2,6 +2,7 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
 # --- ADD THIS IMPORT ---
 from PySide6.QtCore import Qt
+import theme
 
 class NoWindArrowView(QWidget):
     def __init__(self):
@@ -9,5 +10,5 @@ class NoWindArrowView(QWidget):
         layout = QVBoxLayout(self)
         label = QLabel("Standard View (No Wind Arrow)")
         label.setAlignment(Qt.AlignCenter)
-        label.setStyleSheet("font-size: 30px; font-family: Oxanium;")
+        theme.style_label(label, 30, "primary", bold=False)
         layout.addWidget(label)
\ No newline at end of file
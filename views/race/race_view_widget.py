@@ -3,16 +3,24 @@ import math
 import os
 import json
 from PySide6.QtWidgets import QWidget, QLabel, QHBoxLayout, QVBoxLayout, QGridLayout
-from PySide6.QtCore import Qt, Slot, Signal, QSize, QPointF, QRectF
+from PySide6.QtCore import Qt, Slot, Signal, QSize, QPointF, QRectF, QTimer
 from PySide6.QtGui import QFont, QPainter, QColor, QPolygonF, QBrush, QPen, QPixmap, QPainterPath
-from theme import LIGHT_THEME, DARK_THEME
+import theme
+from spatial_index import SpatialIndex, ProximityMonitor
+from line_crossing import LineCrossingDetector
+from laylines import LaylineModel
+from rolling_stats import trend_text
+from views.instrument_tile import InstrumentTile
+from display_binding import DisplayBinding
+
+PROXIMITY_METERS = 30.48
+# Map pens don't change with the theme (the chart is the same in both), so they're built once, not per paint.
+START_LINE_PEN = QPen(QColor("#767676"), 2, Qt.DotLine)
+COURSE_PEN = QPen(QColor("white"), 2, Qt.SolidLine)
+BUOY_PEN = QPen(QColor("white"), 3)
+LAYLINE_PENS = {"port": QPen(QColor("#F28B82"), 2, Qt.DashLine), "starboard": QPen(QColor("#81C995"), 2, Qt.DashLine)}
 
 # --- Utility Functions ---
-def haversine_distance(lat1, lon1, lat2, lon2):
-    R = 6371000; lat1_rad, lon1_rad = math.radians(lat1), math.radians(lon1); lat2_rad, lon2_rad = math.radians(lat2), math.radians(lon2)
-    dlat = lat2_rad - lat1_rad; dlon = lon2_rad - lon1_rad
-    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)); return R * c
 def calculate_bearing(lat1, lon1, lat2, lon2):
     lat1_rad, lon1_rad = math.radians(lat1), math.radians(lon1); lat2_rad, lon2_rad = math.radians(lat2), math.radians(lon2)
     dLon = lon2_rad - lon1_rad; y = math.sin(dLon) * math.cos(lat2_rad)
@@ -20,29 +28,15 @@ def calculate_bearing(lat1, lon1, lat2, lon2):
     return (math.degrees(math.atan2(y, x)) + 360) % 360
 
 # --- Re-usable Data Widget ---
-class DataWidget(QWidget):
-    def __init__(self, title, unit="", title_size=18, value_size=48, unit_size=18):
-        super().__init__()
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.setSpacing(-15)
-        self.title_label = QLabel(title)
-        self.value_label = QLabel("---")
-        self.unit_label = QLabel(unit)
-        self.title_size = title_size
-        self.value_size = value_size
-        self.unit_size = unit_size
-        layout.addWidget(self.title_label)
-        layout.addWidget(self.value_label)
-        layout.addWidget(self.unit_label)
-
-    def setTheme(self, theme):
-        self.title_label.setStyleSheet(f"font-family: Oxanium; font-weight: bold; font-size: {self.title_size}px; color: {theme['text_secondary']};")
-        self.value_label.setStyleSheet(f"font-family: Oxanium; font-weight: bold; font-size: {self.value_size}px; color: {theme['text_primary']};")
-        self.unit_label.setStyleSheet(f"font-family: Oxanium; font-size: {self.unit_size}px; color: {theme['text_secondary']};")
+def data_tile(title, unit, value_sample="888"):
+    """A start-line / performance readout."""
+    tile = InstrumentTile(title, unit, title_size=20, value_size=36, unit_size=20, value_sample=value_sample)
+    tile.setValue("---")
+    return tile
 
 class RaceMapWidget(QWidget):
     start_line_data_updated = Signal(float, float)
+    line_crossed = Signal(dict)
     def __init__(self):
         super().__init__()
         self.map_pixmap = None; self.buoys = []; self.bounds = {}
@@ -50,6 +44,9 @@ class RaceMapWidget(QWidget):
         self.is_in_proximity = False; self.last_distance_to_buoy = float('inf')
         self.race_name = ""; self.start_finish_line = None; self.course_path = []
         self.boat_speed_knots = 0.0
+        self.mark_index = None; self.proximity_monitor = None
+        self.line_detector = None; self.race_start_time = None
+        self.laylines = LaylineModel(); self.tack_times = None
         self.setStyleSheet("border-radius: 10px;")
         self.banner_label = QLabel(self); self.banner_label.setAlignment(Qt.AlignCenter)
         self.banner_label.setStyleSheet("background-color:rgba(0,0,0,0.7);color:white;font-family:Oxanium;font-size:24px;font-weight:bold;padding:10px;")
@@ -59,12 +56,20 @@ class RaceMapWidget(QWidget):
         super().resizeEvent(event)
         self.banner_label.setGeometry(0, self.height() - 60, self.width(), 60)
 
+    def build_mark_index(self):
+        """Indexes the course marks so each fix is a grid lookup instead of a haversine per mark."""
+        self.mark_index = None; self.proximity_monitor = None; self.is_in_proximity = False
+        if not self.buoys: return
+        self.mark_index = SpatialIndex(self.buoys[0]['lat'], self.buoys[0]['lon'])
+        for i, buoy in enumerate(self.buoys):
+            self.mark_index.add(i, buoy['lat'], buoy['lon'], kind="mark", radius_m=PROXIMITY_METERS, data=buoy)
+        self.proximity_monitor = ProximityMonitor(self.mark_index)
+
     def _check_buoy_proximity(self):
-        if not self.boat_position or not self.buoys or self.next_buoy_index >= len(self.buoys): return
-        next_buoy = self.buoys[self.next_buoy_index]; boat_lat, boat_lon = self.boat_position
-        distance_m = haversine_distance(boat_lat, boat_lon, next_buoy['lat'], next_buoy['lon'])
-        PROXIMITY_METERS = 30.48
-        if distance_m <= PROXIMITY_METERS:
+        if not self.boat_position or not self.proximity_monitor or self.next_buoy_index >= len(self.buoys): return
+        buoy_index = self.next_buoy_index; next_buoy = self.buoys[buoy_index]; boat_lat, boat_lon = self.boat_position
+        self.proximity_monitor.update(boat_lat, boat_lon)
+        if buoy_index in self.proximity_monitor.inside:
             if not self.is_in_proximity:
                 bearing_to_buoy = calculate_bearing(boat_lat, boat_lon, next_buoy['lat'], next_buoy['lon'])
                 heading_diff = abs((self.boat_heading - bearing_to_buoy + 180) % 360 - 180)
@@ -77,23 +82,54 @@ class RaceMapWidget(QWidget):
                 if self.next_buoy_index >= len(self.buoys): self.banner_label.setText("Race Finished!"); self.banner_label.show()
                 else: self.banner_label.hide()
                 self.is_in_proximity = False
-        self.last_distance_to_buoy = distance_m
-
-    def _update_start_line_info(self):
-        if not self.boat_position or not self.start_finish_line: return
-        mid_lat = (self.start_finish_line['start']['lat'] + self.start_finish_line['end']['lat']) / 2
-        mid_lon = (self.start_finish_line['start']['lon'] + self.start_finish_line['end']['lon']) / 2
-        distance_m = haversine_distance(self.boat_position[0], self.boat_position[1], mid_lat, mid_lon)
-        eta_seconds = 0
-        if self.boat_speed_knots > 0:
-            speed_mps = self.boat_speed_knots * 0.514444
-            eta_seconds = distance_m / speed_mps
-        self.start_line_data_updated.emit(distance_m, eta_seconds)
-
-    @Slot(float, float)
-    def update_boat_position(self, lat_rad, lon_rad):
+        self.last_distance_to_buoy = self.mark_index.distance_to(buoy_index, boat_lat, boat_lon)
+
+    def build_line_detector(self):
+        self.line_detector = None; self.race_start_time = None
+        if not self.start_finish_line: return
+        start_point = self.start_finish_line['start']; end_point = self.start_finish_line['end']
+        self.line_detector = LineCrossingDetector(start_point['lat'], start_point['lon'], end_point['lat'], end_point['lon'])
+        if self.buoys: self.line_detector.set_course_side(self.buoys[0]['lat'], self.buoys[0]['lon']) # Pre-start is away from the first mark
+
+    def _update_laylines(self):
+        if not self.buoys or self.next_buoy_index >= len(self.buoys):
+            self.laylines.mark = None
+        else:
+            mark = self.buoys[self.next_buoy_index]; self.laylines.set_mark(self.next_buoy_index, mark['lat'], mark['lon'])
+        if self.boat_position:
+            self.laylines.update(self.boat_position[0], self.boat_position[1])
+            self.tack_times = self.laylines.time_on_tacks(self.boat_position[0], self.boat_position[1], self.boat_speed_knots)
+        else:
+            self.laylines.update(); self.tack_times = None
+
+    def set_true_wind(self, direction_deg, speed_kts):
+        self.laylines.set_wind(direction_deg, speed_kts)
+        if self.laylines.update(*(self.boat_position or ())): self.update()
+
+    def _update_start_line_info(self, timestamp, velocity=None):
+        if not self.boat_position or not self.line_detector: return
+        line_info = self.line_detector.update(self.boat_position[0], self.boat_position[1], timestamp, velocity)
+        eta_seconds = line_info['time_to_line_s']
+        self.start_line_data_updated.emit(line_info['distance_m'], math.nan if eta_seconds is None else eta_seconds) # NaN: the binding shows "--"
+        crossing = line_info['crossing']
+        if crossing:
+            if self.race_start_time is None:
+                # Only pre-start side -> course side starts the race; dipping back before the gun doesn't.
+                if not crossing['to_course']: return
+                event = "start"; self.race_start_time = crossing['time']
+            elif self.next_buoy_index >= len(self.buoys): event = "finish"
+            else: event = "crossing"
+            self.line_crossed.emit({
+                'event': event, 'leg': self.next_buoy_index, 'time': crossing['time'],
+                'elapsed_s': crossing['time'] - self.race_start_time,
+                'direction': crossing['direction'], 'race': self.race_name
+            })
+
+    @Slot(float, float, float, float, float)
+    def update_boat_position(self, lat_rad, lon_rad, fix_time, east_mps=math.nan, north_mps=math.nan):
+        """Crossings are timed on the fix's clock, not on when this queued slot happens to run."""
         self.boat_position = (math.degrees(lat_rad), math.degrees(lon_rad)); self._check_buoy_proximity()
-        self._update_start_line_info(); self.update()
+        self._update_start_line_info(fix_time, (east_mps, north_mps)); self._update_laylines(); self.update()
 
     @Slot()
     def show_test_banner(self):
@@ -128,12 +164,10 @@ class RaceMapWidget(QWidget):
             pos1 = self._gps_to_screen(start_point['lat'], start_point['lon'], map_rect)
             pos2 = self._gps_to_screen(end_point['lat'], end_point['lon'], map_rect)
             if pos1 and pos2:
-                pen = QPen(QColor("#767676"), 2, Qt.DotLine); painter.setPen(pen)
+                painter.setPen(START_LINE_PEN)
                 painter.drawLine(pos1, pos2)
         
         if len(self.course_path) > 1:
-            line_pen = QPen(QColor("white"), 2, Qt.SolidLine)
-            rounding_pen = QPen(QColor("#FFA500"), 2); rounding_brush = QBrush(QColor("#FFA500"))
             legs = set()
             for i in range(len(self.course_path)):
                 if i < len(self.course_path) - 1:
@@ -152,7 +186,7 @@ class RaceMapWidget(QWidget):
                         legs.add(leg_id)
                         offset_pos1 = QPointF(pos1.x() + offset_x, pos1.y() + offset_y)
                         offset_pos2 = QPointF(pos2.x() + offset_x, pos2.y() + offset_y)
-                        painter.setPen(line_pen); painter.drawLine(offset_pos1, offset_pos2)
+                        painter.setPen(COURSE_PEN); painter.drawLine(offset_pos1, offset_pos2)
                         midpoint_arrow_head = QPolygonF([QPointF(0, 0), QPointF(-10, -5), QPointF(-10, 5)])
                         line_angle = math.atan2(offset_pos2.y() - offset_pos1.y(), offset_pos2.x() - offset_pos1.x())
                         mid_point = QPointF((offset_pos1.x() + offset_pos2.x()) / 2, (offset_pos1.y() + offset_pos2.y()) / 2)
@@ -166,9 +200,12 @@ class RaceMapWidget(QWidget):
                         font = QFont("Oxanium", 14, QFont.Bold); painter.setFont(font); painter.setPen(QColor("white"))
                         painter.drawText(pos2.x() -15, pos2.y() + 15, rounding_char)
         
+        if self.laylines.lines:
+            self._paint_laylines(painter, map_rect)
+
         for buoy in self.buoys:
             pos=self._gps_to_screen(buoy['lat'],buoy['lon'],map_rect)
-            if pos: painter.setBrush(QBrush(QColor("#000000"))); painter.setPen(QPen(QColor("white"), 3)); painter.drawEllipse(pos,6,6)
+            if pos: painter.setBrush(QBrush(QColor("#000000"))); painter.setPen(BUOY_PEN); painter.drawEllipse(pos,6,6)
         
         if self.boat_position:
             boat_pos_screen=self._gps_to_screen(self.boat_position[0],self.boat_position[1],map_rect)
@@ -177,6 +214,19 @@ class RaceMapWidget(QWidget):
                 boat_poly=QPolygonF([QPointF(0,-12),QPointF(8,10),QPointF(-8,10)])
                 painter.setBrush(QBrush(QColor("#007acc"))); painter.setPen(Qt.NoPen); painter.drawPolygon(boat_poly); painter.restore()
 
+    def _paint_laylines(self, painter, map_rect):
+        for name, (mark_point, end_point) in self.laylines.lines.items():
+            pos1 = self._gps_to_screen(mark_point[0], mark_point[1], map_rect)
+            pos2 = self._gps_to_screen(end_point[0], end_point[1], map_rect)
+            if pos1 and pos2: painter.setPen(LAYLINE_PENS[name]); painter.drawLine(pos1, pos2)
+        if self.tack_times:
+            painter.setFont(QFont("Oxanium", 14, QFont.Bold))
+            for row, name in enumerate(("port", "starboard")):
+                seconds = self.tack_times[name]
+                text = f"{'P' if name == 'port' else 'S'} " + (f"{int(seconds // 60)}:{int(seconds % 60):02}" if seconds >= 0 else "OVER")
+                painter.setPen(LAYLINE_PENS[name].color())
+                painter.drawText(map_rect.right() - 90, map_rect.y() + 30 + row * 24, text)
+
     @Slot(float)
     def update_boat_heading(self,heading_deg): self.boat_heading=heading_deg; self.update()
 
@@ -208,36 +258,25 @@ class BoatSpeedWidget(QWidget):
         layout=QVBoxLayout(self)
         layout.setContentsMargins(10, 0, 0, 0)
         layout.setSpacing(0)
-        self.title=QLabel("BOAT SPEED (kts)")
-        self.speed_label=QLabel("---")
-        max_min_layout=QGridLayout()
+        self.speed_tile=InstrumentTile("BOAT SPEED (kts)", None, title_size=24, value_size=110, value_sample="88.8")
+        max_min_layout=QHBoxLayout()
         max_min_layout.setContentsMargins(10, 0, 0, 0)
-        self.max_label=QLabel("Max")
-        self.max_speed_label=QLabel("---")
-        self.min_label=QLabel("Min")
-        self.min_speed_label=QLabel("---")
-        max_min_layout.addWidget(self.max_label,0,0)
-        max_min_layout.addWidget(self.max_speed_label,1,0)
-        max_min_layout.addWidget(self.min_label,0,1)
-        max_min_layout.addWidget(self.min_speed_label,1,1)
-        layout.addWidget(self.title)
-        layout.addWidget(self.speed_label)
+        self.max_tile=InstrumentTile("Max", None, title_size=20, value_size=36, bold=(False, False, False), value_sample="88.8")
+        self.min_tile=InstrumentTile("Min", None, title_size=20, value_size=36, bold=(False, False, False), value_sample="88.8")
+        for tile in (self.speed_tile, self.max_tile, self.min_tile): tile.setValue("---")
+        self.speed_binding = DisplayBinding("boat_speed", self.speed_tile.setValue)
+        max_min_layout.addWidget(self.max_tile)
+        max_min_layout.addWidget(self.min_tile)
+        max_min_layout.addStretch()
+        layout.addWidget(self.speed_tile)
         layout.addLayout(max_min_layout)
         layout.addStretch()
 
-    def setTheme(self, theme):
-        self.title.setStyleSheet(f"font-family: Oxanium; font-size: 24px; color: {theme['text_secondary']}; font-weight: bold;")
-        self.speed_label.setStyleSheet(f"font-family: Oxanium; font-size: 110px; color: {theme['text_primary']}; font-weight: bold;")
-        self.max_label.setStyleSheet(f"font-family: Oxanium; font-size: 20px; color: {theme['text_secondary']};")
-        self.max_speed_label.setStyleSheet(f"font-family: Oxanium; font-size: 36px; color: {theme['text_primary']};")
-        self.min_label.setStyleSheet(f"font-family: Oxanium; font-size: 20px; color: {theme['text_secondary']};")
-        self.min_speed_label.setStyleSheet(f"font-family: Oxanium; font-size: 36px; color: {theme['text_primary']};")
-
     @Slot(float)
     def update_speed(self, speed_knots):
-        self.speed_label.setText(f"{speed_knots:.1f}")
-        if speed_knots > self.max_speed: self.max_speed=speed_knots; self.max_speed_label.setText(f"{self.max_speed:.1f}")
-        if 0 < speed_knots < self.min_speed: self.min_speed=speed_knots; self.min_speed_label.setText(f"{self.min_speed:.1f}")
+        self.speed_binding(speed_knots)
+        if speed_knots > self.max_speed: self.max_speed=speed_knots; self.max_tile.setValue(f"{self.max_speed:.1f}")
+        if 0 < speed_knots < self.min_speed: self.min_speed=speed_knots; self.min_tile.setValue(f"{self.min_speed:.1f}")
 
 class RaceWindWidget(QWidget):
     def __init__(self):
@@ -245,24 +284,14 @@ class RaceWindWidget(QWidget):
         # Use a QGridLayout for precise cell control
         main_layout = QGridLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
-        main_layout.setSpacing(25) # Space between columns
+        main_layout.setHorizontalSpacing(25) # Space between columns
+        main_layout.setVerticalSpacing(0)
 
-        # --- Column 0: Wind Speed Section ---
-        self.speed_title_label = QLabel("WIND SPEED")
-        
-        # Layout for the numeric speed and trend indicator
-        speed_data_layout = QHBoxLayout()
-        speed_data_layout.setContentsMargins(0,0,0,0)
-        speed_data_layout.setSpacing(5)
-        self.speed_label = QLabel("---")
-        self.trend_label = QLabel("▲0")
-        speed_data_layout.addWidget(self.speed_label)
-        speed_data_layout.addWidget(self.trend_label, alignment=Qt.AlignBottom)
-        speed_data_layout.addStretch()
-
-        # Add speed widgets to the grid
-        main_layout.addWidget(self.speed_title_label, 0, 0) # Row 0, Col 0
-        main_layout.addLayout(speed_data_layout, 1, 0)     # Row 1, Col 0
+        # --- Column 0: Wind Speed Section (title, speed and trend indicator in one tile) ---
+        self.speed_tile = InstrumentTile("WIND SPEED", None, title_size=24, value_size=64, value_sample="88",
+                                         trend_size=24, trend_sample="▼ 88", accessory_spacing=5)
+        self.speed_tile.setValue("---")
+        main_layout.addWidget(self.speed_tile, 0, 0, 2, 1, alignment=Qt.AlignTop) # Rows 0-1, Col 0
 
         # --- Column 1: Wind Direction Section ---
         self.wind_dir_title_label = QLabel("WIND DIR")
@@ -271,7 +300,7 @@ class RaceWindWidget(QWidget):
         # Layout for the arrow and direction letter
         direction_data_layout = QVBoxLayout()
         direction_data_layout.setContentsMargins(0,0,0,0)
-        direction_data_layout.setSpacing(5)
+        direction_data_layout.setSpacing(0)
         self.arrow_widget = SmallArrowWidget()
         self.direction_label = QLabel("N")
         self.direction_label.setAlignment(Qt.AlignCenter)
@@ -285,52 +314,52 @@ class RaceWindWidget(QWidget):
         # --- Final layout adjustments ---
         main_layout.setRowStretch(2, 1)      # Pushes everything to the top
         main_layout.setColumnStretch(1, 1)   # Allows column 1 to expand slightly
+        for label in (self.wind_dir_title_label, self.direction_label): theme.style_label(label, 24)
+        self.speed_binding = DisplayBinding("wind_speed", self.speed_tile.setValue)
+        self.direction_binding = DisplayBinding("wind_point", self.direction_label.setText)
 
-    def setTheme(self, theme):
-        # Apply stylesheets for precise styling
-        self.speed_title_label.setStyleSheet(f"font-family: Oxanium; font-size: 24px; color: {theme['text_secondary']}; font-weight: bold;")
-        self.speed_label.setStyleSheet(f"font-family: Oxanium; font-size: 64px; color: {theme['text_primary']}; font-weight: bold;")
-        self.trend_label.setStyleSheet(f"font-family: Oxanium; font-size: 24px; color: {theme['text_secondary']}; font-weight: bold; padding-bottom: 5px;")
-        
-        self.wind_dir_title_label.setStyleSheet(f"font-family: Oxanium; font-size: 24px; color: {theme['text_secondary']}; font-weight: bold;")
-        self.direction_label.setStyleSheet(f"font-family: Oxanium; font-size: 24px; color: {theme['text_secondary']}; font-weight: bold;")
-        
-        self.arrow_widget.arrow_color = QColor(theme['arrow'])
+    def setTheme(self, is_light_mode):
+        self.arrow_widget.arrow_color = theme.color(is_light_mode, 'arrow')
         self.arrow_widget.update()
 
     @Slot(float,float)
     def update_wind(self,speed_mps,angle_rad):
-        speed_knots=speed_mps*1.94384
-        angle_deg=math.degrees(angle_rad)
-        dirs=["N","NE","E","SE","S","SW","W","NW"]
-        idx=round(angle_deg/45)%8
-        self.speed_label.setText(f"{speed_knots:.0f}")
-        self.direction_label.setText(dirs[idx])
-        self.arrow_widget.setAngle(angle_deg)
+        self.speed_binding(speed_mps); self.direction_binding(angle_rad)
+        self.arrow_widget.setAngle(math.degrees(angle_rad))
 
 class RaceViewWidget(QWidget):
     def __init__(self):
         super().__init__()
         script_dir = os.path.dirname(__file__)
         self.races_base_path = os.path.abspath(os.path.join(script_dir, '..', '..', 'races'))
+        self.polar_path = os.path.abspath(os.path.join(script_dir, '..', '..', 'polars', 'default.pol'))
+        self.polar = None; self.true_wind_speed_kts = None; self.true_wind_angle_deg = None; self.boat_speed_kts = 0.0
         main_layout = QHBoxLayout(self)
         main_layout.setContentsMargins(20, 20, 20, 20)
         main_layout.setSpacing(20)
         
         self.map_widget = RaceMapWidget()
         
-        self.dist_to_start_widget = DataWidget("DIST TO START", "ft", title_size=20, value_size=36, unit_size=20)
-        self.eta_to_start_widget = DataWidget("ETA TO START", "s", title_size=20, value_size=36, unit_size=20)
+        self.dist_to_start_widget = data_tile("DIST TO LINE", "ft", value_sample="8888")
+        self.eta_to_start_widget = data_tile("TIME TO LINE", "s", value_sample="88:88")
+        self.polar_percent_widget = data_tile("POLAR", "%")
+        self.target_twa_widget = data_tile("TARGET TWA", "°")
+        self.bindings = {name: DisplayBinding(name, tile.setValue) for name, tile in (
+            ("line_distance", self.dist_to_start_widget), ("line_eta", self.eta_to_start_widget),
+            ("polar_percent", self.polar_percent_widget), ("target_twa", self.target_twa_widget))}
         
         self.load_shared_data()
+        QTimer.singleShot(0, self.load_polar) # Polars pull in numpy; not needed for the first frame
         
-        data_layout = QVBoxLayout()
+        data_layout = QVBoxLayout(); data_layout.setSpacing(0) # The column is only just tall enough for the tiles
         self.boat_speed_widget = BoatSpeedWidget()
         self.wind_widget = RaceWindWidget()
         
         start_line_layout = QGridLayout()
         start_line_layout.addWidget(self.dist_to_start_widget, 0, 0)
         start_line_layout.addWidget(self.eta_to_start_widget, 0, 1)
+        start_line_layout.addWidget(self.polar_percent_widget, 1, 0)
+        start_line_layout.addWidget(self.target_twa_widget, 1, 1)
 
         data_layout.addStretch()
         data_layout.addWidget(self.boat_speed_widget)
@@ -346,11 +375,8 @@ class RaceViewWidget(QWidget):
 
     @Slot(bool)
     def setTheme(self, is_light_mode):
-        theme = LIGHT_THEME if is_light_mode else DARK_THEME
-        self.dist_to_start_widget.setTheme(theme)
-        self.eta_to_start_widget.setTheme(theme)
-        self.boat_speed_widget.setTheme(theme)
-        self.wind_widget.setTheme(theme)
+        """Labels follow the SailUI stylesheet; only the painted wind arrow changes colour here."""
+        self.wind_widget.setTheme(is_light_mode)
 
     def load_shared_data(self):
         map_path = os.path.join(self.races_base_path, "shared_map.png")
@@ -360,6 +386,18 @@ class RaceViewWidget(QWidget):
             with open(bounds_path, 'r') as f: self.map_widget.bounds = json.load(f).get('bounds', {})
         self.map_widget.update()
 
+    def load_polar(self):
+        from polar import PolarTable
+        if os.path.exists(self.polar_path):
+            try: self.polar = PolarTable.load(self.polar_path)
+            except (ValueError, IndexError): print(f"Error reading polar file {self.polar_path}")
+        self.map_widget.laylines.polar = self.polar
+
+    def _update_polar_display(self):
+        if not self.polar or self.true_wind_speed_kts is None: return
+        performance = self.polar.performance(self.true_wind_speed_kts, self.true_wind_angle_deg, self.boat_speed_kts)
+        self.bindings["polar_percent"](performance['percent_polar']); self.bindings["target_twa"](performance['target_twa'])
+
     @Slot(str)
     def load_course(self, race_dir):
         data_path = os.path.join(self.races_base_path, race_dir, "race_data.json")
@@ -382,21 +420,30 @@ class RaceViewWidget(QWidget):
         self.map_widget.buoys = buoys; self.map_widget.race_name = race_name
         self.map_widget.start_finish_line = start_finish
         self.map_widget.course_path = course_path
-        self.map_widget.next_buoy_index = 0; self.map_widget.update()
+        self.map_widget.next_buoy_index = 0; self.map_widget.build_mark_index()
+        self.map_widget.build_line_detector(); self.map_widget._update_laylines(); self.map_widget.update()
 
     @Slot(float)
     def update_speed_display(self, speed_knots):
         self.boat_speed_widget.update_speed(speed_knots)
         self.map_widget.boat_speed_knots = speed_knots
+        self.boat_speed_kts = speed_knots; self._update_polar_display()
 
     @Slot(float, float)
     def update_start_line_display(self, distance, eta):
-        distance_ft = distance * 3.28084
-        self.dist_to_start_widget.value_label.setText(f"{distance_ft:.0f}")
-        # Format ETA into M:SS
-        minutes, seconds = divmod(eta, 60)
-        self.eta_to_start_widget.value_label.setText(f"{int(minutes)}:{int(seconds):02}")
+        self.bindings["line_distance"](distance); self.bindings["line_eta"](eta) # ETA as M:SS
 
     @Slot(float, float, str)
     def update_wind_display(self, speed_mps, angle_rad, reference):
-        self.wind_widget.update_wind(speed_mps, angle_rad)
\ No newline at end of file
+        self.wind_widget.update_wind(speed_mps, angle_rad)
+
+    @Slot(dict)
+    def update_trend_display(self, trends):
+        if 'wind' in trends: self.wind_widget.speed_tile.setTrend(trend_text(trends['wind']['change_per_window'], 0.5, decimals=0))
+
+    @Slot(float, float, float)
+    def update_true_wind(self, speed_mps, angle_rad, direction_rad):
+        self.true_wind_speed_kts = speed_mps * 1.94384
+        self.true_wind_angle_deg = math.degrees(angle_rad)
+        self._update_polar_display()
+        self.map_widget.set_true_wind(math.degrees(direction_rad), self.true_wind_speed_kts)
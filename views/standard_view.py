@@ -1,13 +1,85 @@
 # views/standard_view.py
 import math
 from PySide6.QtWidgets import (
-    QWidget, QGridLayout, QVBoxLayout, QLabel, QGraphicsView, QGraphicsScene,
-    QGraphicsLineItem
+    QWidget, QGridLayout, QVBoxLayout, QGraphicsView, QGraphicsScene,
+    QGraphicsItem, QGraphicsLineItem
 )
-from PySide6.QtCore import Qt, QRectF, Slot
-from PySide6.QtGui import QColor, QPen, QFont, QPainter, QPainterPath
+from PySide6.QtCore import Qt, QRectF, QPointF, Slot
+from PySide6.QtGui import QColor, QPen, QFont, QFontMetrics, QPainter, QPainterPath, QStaticText
 
-from theme import LIGHT_THEME, DARK_THEME
+import theme
+from views.instrument_tile import InstrumentTile
+from display_binding import DisplayBinding
+
+class GaugeBackgroundItem(QGraphicsItem):
+    """
+    The boat hull and the red/green close-hauled arcs: everything on the gauge
+    that doesn't move. It's one item in DeviceCoordinateCache, so it's
+    rasterised once into a pixmap and only re-drawn when the theme changes
+    the hull pen; the arrow turning over it just blits the cache.
+    """
+    def __init__(self, hull_path, arcs):
+        super().__init__()
+        self.hull_path = hull_path; self.arcs = arcs # arcs: [(path, pen)]
+        self.hull_pen = QPen()
+        widest = max(pen.widthF() for _, pen in arcs)
+        self.bounds = hull_path.boundingRect().united(arcs[0][0].boundingRect())
+        for path, _ in arcs[1:]: self.bounds = self.bounds.united(path.boundingRect())
+        self.bounds.adjust(-widest, -widest, widest, widest)
+        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+
+    def setHullPen(self, pen):
+        self.hull_pen = pen; self.update()
+
+    def boundingRect(self): return self.bounds
+
+    def paint(self, painter, option, widget=None):
+        painter.setPen(self.hull_pen); painter.drawPath(self.hull_path)
+        for path, pen in self.arcs: painter.setPen(pen); painter.drawPath(path)
+
+class WindSpeedItem(QGraphicsItem):
+    """
+    The wind speed digits with "kts" under them, centred in the hull, drawn
+    from prepared QStaticText. Its bounds are fixed (wide enough for three
+    digits), so new digits never need a geometry change or a relayout, and
+    setText() repaints just this item, only when the text changes.
+    """
+    def __init__(self, speed_font, unit_font, unit="kts", y_offset=10):
+        super().__init__()
+        self.speed_font = speed_font; self.unit_font = unit_font
+        speed_metrics = QFontMetrics(speed_font); unit_metrics = QFontMetrics(unit_font)
+        # Where the two QGraphicsTextItems used to sit: centred, nudged down by y_offset, "kts" just below
+        self.speed_y = y_offset - speed_metrics.height() / 2
+        self.unit_y = speed_metrics.height() / 2 + 18
+        width = max(speed_metrics.horizontalAdvance("888"), unit_metrics.horizontalAdvance(unit))
+        self.bounds = QRectF(-width / 2, self.speed_y, width, self.unit_y + unit_metrics.height() - self.speed_y)
+        self.colors = (QColor("white"), QColor("grey"))
+        self._texts = {}; self.text = None
+        self.unit = self._static(unit, unit_font)
+
+    def _static(self, text, font):
+        static = self._texts.get(text)
+        if static is None:
+            if len(self._texts) > 64: self._texts.clear()
+            static = self._texts[text] = QStaticText(text)
+            static.setTextFormat(Qt.PlainText); static.setPerformanceHint(QStaticText.AggressiveCaching); static.prepare(font=font)
+        return static
+
+    def setText(self, text):
+        if text != self.text: self.text = text; self.update()
+
+    def setColors(self, primary, secondary):
+        self.colors = (primary, secondary); self.update()
+
+    def boundingRect(self): return self.bounds
+
+    def paint(self, painter, option, widget=None):
+        if self.text:
+            speed = self._static(self.text, self.speed_font)
+            painter.setFont(self.speed_font); painter.setPen(self.colors[0])
+            painter.drawStaticText(QPointF(-speed.size().width() / 2, self.speed_y), speed)
+        painter.setFont(self.unit_font); painter.setPen(self.colors[1])
+        painter.drawStaticText(QPointF(-self.unit.size().width() / 2, self.unit_y), self.unit)
 
 class StandardSailView(QWidget):
     def __init__(self):
@@ -23,6 +95,7 @@ class StandardSailView(QWidget):
         self.wind_view.setRenderHint(QPainter.Antialiasing)
         self.wind_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.wind_view.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.wind_scene.setItemIndexMethod(QGraphicsScene.NoIndex) # Four items, one of them always turning
         view_size = 220
         self.wind_scene.setSceneRect(-view_size/2, -view_size/2, view_size, view_size)
         boat_path = QPainterPath()
@@ -33,21 +106,20 @@ class StandardSailView(QWidget):
         boat_path.cubicTo(boat_width / 2 * 1.1, boat_height * -0.25, boat_width / 2 * 1.1, 0, bottom_right_x, boat_height / 2)
         boat_path.cubicTo(bottom_right_x * 0.4, boat_height / 2 + 10, bottom_left_x * 0.4, boat_height / 2 + 10, bottom_left_x, boat_height / 2)
         boat_path.cubicTo(-boat_width / 2 * 1.1, 0, -boat_width / 2 * 1.1, boat_height * -0.25, 0, -boat_height / 2)
-        self.boat_item = self.wind_scene.addPath(boat_path)
-        self.boat_wind_speed_text = self.wind_scene.addText("---")
-        self.boat_wind_speed_text.setFont(QFont("Oxanium", 40, QFont.Bold))
-        self.wind_speed_unit_text = self.wind_scene.addText("kts")
-        self.wind_speed_unit_text.setFont(QFont("Oxanium", 10, QFont.Bold))
         arc_radius, arc_width = 63, 10
         arc_rect = QRectF(-arc_radius, -arc_radius, arc_radius * 2, arc_radius * 2)
         red_arc_path = QPainterPath()
         red_arc_path.arcMoveTo(arc_rect, 140)
         red_arc_path.arcTo(arc_rect, 140, -27)
-        self.red_arc = self.wind_scene.addPath(red_arc_path, QPen(QColor(255, 0, 0), arc_width, Qt.SolidLine, Qt.RoundCap))
         green_arc_path = QPainterPath()
         green_arc_path.arcMoveTo(arc_rect, 40)
         green_arc_path.arcTo(arc_rect, 40, 27)
-        self.green_arc = self.wind_scene.addPath(green_arc_path, QPen(QColor(0, 255, 0), arc_width, Qt.SolidLine, Qt.RoundCap))
+        self.gauge_background = GaugeBackgroundItem(boat_path, [(red_arc_path, QPen(QColor(255, 0, 0), arc_width, Qt.SolidLine, Qt.RoundCap)),
+                                                                (green_arc_path, QPen(QColor(0, 255, 0), arc_width, Qt.SolidLine, Qt.RoundCap))])
+        self.wind_scene.addItem(self.gauge_background)
+        self.wind_speed_item = WindSpeedItem(QFont("Oxanium", 40, QFont.Bold), QFont("Oxanium", 10, QFont.Bold))
+        self.wind_speed_item.setText("---")
+        self.wind_scene.addItem(self.wind_speed_item)
         arrow_offset_radius, arrow_length = arc_radius - 15, 15
         self.wind_direction_arrow = QGraphicsLineItem(0, -arrow_offset_radius, 0, -(arrow_offset_radius + arrow_length))
         self.wind_direction_arrow.setTransformOriginPoint(0,0)
@@ -60,35 +132,16 @@ class StandardSailView(QWidget):
         right_column_layout.setContentsMargins(0, 0, 0, 0)
         right_column_layout.setSpacing(0)
         right_column_layout.addStretch(1)
-        self.depth_title_label = QLabel("DEPTH")
-        self.depth_value_label = QLabel("---")
-        self.depth_value_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        self.depth_value_label.setFixedWidth(140)
-        self.depth_unit_label = QLabel("ft")
-        self.depth_unit_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        depth_layout = QVBoxLayout()
-        depth_layout.setSpacing(2)
-        depth_layout.addWidget(self.depth_title_label)
-        depth_layout.addWidget(self.depth_value_label)
-        depth_layout.addSpacing(-8)
-        depth_layout.addWidget(self.depth_unit_label)
-        depth_layout.setAlignment(Qt.AlignTop | Qt.AlignLeft)
-        right_column_layout.addLayout(depth_layout)
+        # Title, value and unit painted by one tile each; sized to fit "88.8"
+        self.depth_tile = InstrumentTile("DEPTH", "ft", title_size=20, value_size=70, unit_size=20, bold=(True, True, True), value_sample="88.8")
+        self.speed_tile = InstrumentTile("SPEED", "kts", title_size=20, value_size=70, unit_size=20, bold=(True, True, True), value_sample="88.8")
+        for tile in (self.depth_tile, self.speed_tile): tile.setValue("---")
+        self.wind_speed_binding = DisplayBinding("wind_speed", self.wind_speed_item.setText)
+        self.depth_binding = DisplayBinding("depth", self.depth_tile.setValue)
+        self.speed_binding = DisplayBinding("boat_speed", self.speed_tile.setValue)
+        right_column_layout.addWidget(self.depth_tile, alignment=Qt.AlignTop | Qt.AlignLeft)
         right_column_layout.addSpacing(30)
-        self.speed_title_label = QLabel("SPEED")
-        self.speed_value_label = QLabel("---")
-        self.speed_value_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        self.speed_value_label.setFixedWidth(140)
-        self.speed_unit_label = QLabel("kts")
-        self.speed_unit_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        speed_layout = QVBoxLayout()
-        speed_layout.setSpacing(2)
-        speed_layout.addWidget(self.speed_title_label)
-        speed_layout.addWidget(self.speed_value_label)
-        speed_layout.addSpacing(-8)
-        speed_layout.addWidget(self.speed_unit_label)
-        speed_layout.setAlignment(Qt.AlignTop | Qt.AlignLeft)
-        right_column_layout.addLayout(speed_layout)
+        right_column_layout.addWidget(self.speed_tile, alignment=Qt.AlignTop | Qt.AlignLeft)
         right_column_layout.addStretch(1)
         main_grid_layout.addLayout(right_column_layout, 0, 1, 2, 1)
         
@@ -96,45 +149,20 @@ class StandardSailView(QWidget):
 
     @Slot(bool)
     def setTheme(self, is_light_mode):
-        theme = LIGHT_THEME if is_light_mode else DARK_THEME
-        
-        self.depth_title_label.setStyleSheet(f"font-family: Oxanium; font-size: 20px; color: {theme['text_secondary']}; font-weight: bold;")
-        self.depth_value_label.setStyleSheet(f"font-family: Oxanium; font-size: 70px; color: {theme['text_primary']}; font-weight: bold;")
-        self.depth_unit_label.setStyleSheet(f"font-family: Oxanium; font-size: 20px; color: {theme['text_secondary']}; font-weight: bold;")
-        self.speed_title_label.setStyleSheet(f"font-family: Oxanium; font-size: 20px; color: {theme['text_secondary']}; font-weight: bold;")
-        self.speed_value_label.setStyleSheet(f"font-family: Oxanium; font-size: 70px; color: {theme['text_primary']}; font-weight: bold;")
-        self.speed_unit_label.setStyleSheet(f"font-family: Oxanium; font-size: 20px; color: {theme['text_secondary']}; font-weight: bold;")
-
-        self.boat_item.setPen(QPen(theme['boat'], 3))
-        self.wind_direction_arrow.setPen(QPen(theme['arrow'], 8, Qt.SolidLine, Qt.RoundCap))
-        self.boat_wind_speed_text.setDefaultTextColor(QColor(theme['text_primary']))
-        self.wind_speed_unit_text.setDefaultTextColor(QColor(theme['text_secondary']))
+        """Labels follow the SailUI stylesheet; only the scene items need their cached pens and colours."""
+        self.gauge_background.setHullPen(theme.pen(is_light_mode, 'boat', 3))
+        self.wind_direction_arrow.setPen(theme.pen(is_light_mode, 'arrow', 8, Qt.SolidLine, Qt.RoundCap))
+        self.wind_speed_item.setColors(theme.color(is_light_mode, 'text_primary'), theme.color(is_light_mode, 'text_secondary'))
 
     @Slot(float, float, str)
     def update_wind_display(self, speed_mps, angle_rad, reference):
-        speed_knots = speed_mps * 1.94384
-        self.boat_wind_speed_text.setPlainText(f"{speed_knots:.0f}")
-        y_offset = 10 
-        current_speed_num_rect = self.boat_wind_speed_text.boundingRect()
-        self.boat_wind_speed_text.setPos(
-            -current_speed_num_rect.width() / 2,
-            -current_speed_num_rect.height() / 2 + y_offset
-        )
-        kts_unit_rect = self.wind_speed_unit_text.boundingRect()
-        kts_y_pos = current_speed_num_rect.height() / 2 + 5
-        self.wind_speed_unit_text.setPos(
-            -kts_unit_rect.width() / 2,
-            kts_y_pos + y_offset/2
-        )
+        """Only the arrow and (when they change) the digits repaint; the hull and arcs come from their cache."""
+        self.wind_speed_binding(speed_mps)
         angle_deg = math.degrees(angle_rad)
-        self.wind_direction_arrow.setRotation(angle_deg)
-        self.wind_scene.update()
+        if angle_deg != self.wind_direction_arrow.rotation(): self.wind_direction_arrow.setRotation(angle_deg)
 
     @Slot(float)
-    def update_depth_display(self, depth_meters):
-        depth_feet = depth_meters * 3.28084
-        self.depth_value_label.setText(f"{depth_feet:.1f}")
+    def update_depth_display(self, depth_meters): self.depth_binding(depth_meters)
 
     @Slot(float)
-    def update_speed_display(self, speed_knots):
-        self.speed_value_label.setText(f"{speed_knots:.1f}")
\ No newline at end of file
+    def update_speed_display(self, speed_knots): self.speed_binding(speed_knots)
\ No newline at end of file